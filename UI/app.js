@@ -400,7 +400,7 @@ window.generateImageForPost = (prompt, containerId) => {
         .then(data => {
             if (data.success && data.image_url) {
                 resultArea.innerHTML = `
-                <img src="${data.image_url}" style="width:100%; border-radius:8px; border:1px solid var(--glass-border); animation: fadeIn 0.5s; margin-bottom:10px;">
+                <img src="${data.image_url}?w=640" style="width:100%; border-radius:8px; border:1px solid var(--glass-border); animation: fadeIn 0.5s; margin-bottom:10px;">
                 <a href="${data.image_url}" download="generated_image.png" style="display:block; text-align:center; color:white; font-size:0.8rem; text-decoration:underline;">Download Generated Image</a>
             `;
             } else {
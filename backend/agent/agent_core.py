@@ -1,51 +1,150 @@
-from google import genai
-from google.genai import types
-from tools.load_json import load_linkedin_comments
-try:
-    from backend.agent.hashtag_scraper import scrape_hashtags
-except ImportError:
-    try:
-        from agent.hashtag_scraper import scrape_hashtags
-    except ImportError:
-         from hashtag_scraper import scrape_hashtags
-from PIL import Image
+from tools.load_json import load_compact_comments
+from analysis_cache import analysis_cache_key, get_analysis_cache, draft_cache_key, get_draft_cache
+from genai_clients import get_client, DEFAULT_MODEL
+from context_cache import CONTEXT_CACHE_ENABLED, get_context_cache
+import tracing
+from usage import record_usage
+from io import BytesIO
 import os
 import json
 import ast
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+MODEL_NAME = DEFAULT_MODEL
+
+# Draft images are downscaled to this long edge and re-encoded as JPEG
+# before being sent to Gemini Vision
+DRAFT_MAX_EDGE = int(os.environ.get("DRAFT_IMAGE_MAX_EDGE", 1536))
+DRAFT_JPEG_QUALITY = int(os.environ.get("DRAFT_IMAGE_QUALITY", 85))
+
+# Tools the audience agents may call, and how many tool round-trips they get
+AUDIENCE_TOOLS = {"load_compact_comments": load_compact_comments}
+MAX_TOOL_ROUNDS = 3
 
-def run_analysis(data_file="linkedin_comments.json", platform="linkedin"):
+def scrape_hashtags(query, all_slugs=False):
+    # The scraper (lxml/bs4) is only imported once a draft asks for hashtags
+    from hashtag_scraper import scrape_hashtags as scrape
+    return scrape(query, all_slugs=all_slugs)
+
+def load_prompt(filename):
     """
-    Runs the multi-agent analysis.
-    platform: 'linkedin' or 'instagram'
+    Loads a system prompt from the prompts/ directory.
+    Returns None if the prompt cannot be read.
     """
-    results = {
-        "youth_analysis": "",
-        "adult_analysis": "",
-        "strategy": "",
-        "error": None
-    }
+    try:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        path = os.path.join(base_dir, "prompts", filename)
+        with open(path, "r") as f:
+            return f.read()
+    except Exception as e:
+        print(f"❌ ERROR: Cannot load prompt {filename}: {e}")
+        return None
 
-    print(f"STEP 1: Starting analysis on {data_file} for {platform}...")
+def _call_tool(function_call):
+    """
+    Runs a tool the model asked for and returns its function response part
+    ({"result": ...} or {"error": ...}, like the SDK's automatic calling).
+    """
+    from google.genai import types
 
+    tool = AUDIENCE_TOOLS.get(function_call.name)
     try:
-        client = genai.Client()
-        print("STEP 2: Client created successfully.")
+        if tool is None:
+            raise ValueError(f"Unknown tool {function_call.name}")
+        response = {"result": tool(**(function_call.args or {}))}
     except Exception as e:
-        error_msg = f"Failed to create genai client: {e}"
-        print(f"❌ ERROR: {error_msg}")
-        results["error"] = error_msg
-        return results
+        print(f"⚠️ Tool {function_call.name} failed: {e}")
+        response = {"error": str(e)}
+    return types.Part.from_function_response(name=function_call.name, response=response)
+
+def _run_audience_agent(client, label, prompt_file, message, cached_content=None):
+    """
+    Runs a single audience agent (one chat round-trip) and returns its text.
+    With cached_content the comments come from the shared cached context;
+    otherwise (or if that call fails) the agent loads them via the tool.
+    Errors are caught here so one failing agent never takes down the other.
+    Returns (text, elapsed_seconds).
+    """
+    from google.genai import types
 
-    # Helper to load prompts safely
-    def load_prompt(filename):
+    started = time.perf_counter()
+    with tracing.span(f"agent.audience.{label}", model=MODEL_NAME) as span:
         try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            path = os.path.join(base_dir, "prompts", filename)
-            with open(path, "r") as f:
-                return f.read()
+            instructions = load_prompt(prompt_file)
+            if not instructions:
+                raise Exception(f"Failed to load {prompt_file}")
+
+            if cached_content:
+                try:
+                    # A cached context can't be combined with system_instruction/tools,
+                    # so the instructions travel with the message instead
+                    chat = client.chats.create(
+                        model=MODEL_NAME,
+                        config=types.GenerateContentConfig(cached_content=cached_content)
+                    )
+                    with tracing.span("model.chat", cached_context=True):
+                        response = chat.send_message(
+                            message=f"{instructions}\n\nThe comments are provided above. Analyze them according to these instructions."
+                        )
+                    record_usage(response, f"audience.{label}", MODEL_NAME)
+                    span.set(cached_context=True, chars=len(response.text or ""))
+                    return response.text, time.perf_counter() - started
+                except Exception as e:
+                    print(f"⚠️ Cached context call failed for {label}, loading comments via tool: {e}")
+
+            chat = client.chats.create(
+                model=MODEL_NAME,
+                config=types.GenerateContentConfig(
+                    tools=list(AUDIENCE_TOOLS.values()),
+                    system_instruction=instructions,
+                    # The tool round-trip runs here, so every model call's usage is recorded
+                    automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+                )
+            )
+            with tracing.span("model.chat", cached_context=False) as chat_span:
+                response = chat.send_message(message=message)
+                record_usage(response, f"audience.{label}", MODEL_NAME)
+                rounds = 0
+                while response.function_calls and rounds < MAX_TOOL_ROUNDS:
+                    rounds += 1
+                    response = chat.send_message(message=[_call_tool(call) for call in response.function_calls])
+                    record_usage(response, f"audience.{label}", MODEL_NAME)
+                chat_span.set(tool_rounds=rounds)
+
+            span.set(cached_context=False, chars=len(response.text or ""))
+            return response.text, time.perf_counter() - started
+
         except Exception as e:
-            print(f"❌ ERROR: Cannot load prompt {filename}: {e}")
-            return None
+            print(f"❌ ERROR during {label} agent execution: {e}")
+            span.error = type(e).__name__
+            return "", time.perf_counter() - started
+
+def _resolve_data_path(data_source_name):
+    """
+    The load_compact_comments tool opens paths relative to the working
+    directory; fall back to the agent directory for the cache digest.
+    """
+    if os.path.exists(data_source_name):
+        return os.path.abspath(data_source_name)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), data_source_name)
+
+def iter_analysis_events(data_file="linkedin_comments.json", platform="linkedin", concurrent=True, use_cache=True):
+    """
+    Runs the multi-agent analysis as a stream of (event, data) tuples, so
+    callers can push partial results as soon as each stage completes.
+
+    Events:
+      "youth_analysis" / "adult_analysis": {"text", "seconds"} as each audience agent finishes
+      "strategy_chunk": {"text"} for every streamed chunk of the strategist response
+      "strategy": {"text", "seconds"} once the strategist has finished
+      "error": {"error"}
+      "done": {"timings", "cached"} always last
+    """
+    from google.genai import types
+
+    timings = {}
+    analysis_started = time.perf_counter()
 
     # Determine Prompts based on Platform
     if platform.lower() == "instagram":
@@ -62,123 +161,232 @@ def run_analysis(data_file="linkedin_comments.json", platform="linkedin"):
          # If instagram file doesn't exist, use the linkedin one as mock data or whatever was passed
          data_source_name = data_file 
 
-    # --- Agent for 18-30 Age Group ---
+    # --- Result Cache ---
+    cache_key = None
     try:
-        instructions = load_prompt(prompt_youth)
-        if not instructions:
-            raise Exception(f"Failed to load {prompt_youth}")
-        
-        print(f"STEP 3: Loaded prompt (18-30) for {platform}.")
+        with tracing.span("cache.analysis", hit=False) as span:
+            cache_key = analysis_cache_key(_resolve_data_path(data_source_name), platform, MODEL_NAME)
+            cached = get_analysis_cache().get(cache_key) if use_cache else None
+            span.set(hit=bool(cached))
+        if cached:
+            for key in ("youth_analysis", "adult_analysis", "strategy"):
+                yield key, {"text": cached[key], "seconds": 0.0}
+            timings["total"] = time.perf_counter() - analysis_started
+            tracing.record("analysis", timings["total"], platform=platform, cached=True)
+            yield "done", {"timings": timings, "cached": True}
+            return
+    except Exception as e:
+        print(f"⚠️ Analysis cache unavailable: {e}")
 
-        chat = client.chats.create(
-            model="gemini-2.5-flash",
-            config=types.GenerateContentConfig(
-                tools=[load_linkedin_comments],
-                system_instruction=instructions
-            )
-        )
-        print("STEP 4: Chat session (18-30) created.")
+    try:
+        client = get_client(MODEL_NAME)
+    except Exception as e:
+        error_msg = f"Failed to get genai client: {e}"
+        print(f"❌ ERROR: {error_msg}")
+        tracing.record("analysis", time.perf_counter() - analysis_started, error="ClientError", platform=platform)
+        yield "error", {"error": error_msg}
+        yield "done", {"timings": timings, "cached": False}
+        return
 
-        print("STEP 5: Sending message to agent (18-30)...")
-        
-        response = chat.send_message(
-            message=f"Please load the comments from '{data_source_name}' and analyze them according to the instructions for {platform}."
-        )
+    # --- Audience Agents (18-30 and 30-50) ---
+    # key -> (label, prompt file, message)
+    audience_agents = {
+        "youth_analysis": (
+            "18-30",
+            prompt_youth,
+            f"Please load the comments from '{data_source_name}' and analyze them according to the instructions for {platform}."
+        ),
+        "adult_analysis": (
+            "30-50",
+            prompt_adult,
+            f"Please load the comments from '{data_source_name}' and analyze them for the 30-50 age group on {platform}."
+        ),
+    }
+    timing_keys = {"youth_analysis": "youth", "adult_analysis": "adult"}
+    outputs = {}
 
-        print("STEP 6: Response (18-30) received.")
-        results["youth_analysis"] = response.text
+    # Upload the comments once and let both agents reference them
+    cached_content = None
+    if CONTEXT_CACHE_ENABLED:
+        context_started = time.perf_counter()
+        with tracing.span("cache.context") as span:
+            cached_content = get_context_cache().get_or_create(client, MODEL_NAME, _resolve_data_path(data_source_name))
+            span.set(hit=cached_content is not None)
+        timings["context_cache"] = time.perf_counter() - context_started
 
-    except Exception as e:
-        print(f"❌ ERROR during 18-30 agent execution: {e}")
+    audiences_started = time.perf_counter()
 
-    # --- Agent for 30-50 Age Group ---
-    print("-" * 30)
-    try:
-        instructions_30_50 = load_prompt(prompt_adult)
-        if not instructions_30_50:
-            raise Exception(f"Failed to load {prompt_adult}")
-            
-        print(f"STEP 7: Loaded 30-50 prompt for {platform}.")
-        
-        chat_30_50 = client.chats.create(
-            model="gemini-2.5-flash", 
-            config=types.GenerateContentConfig(
-                tools=[load_linkedin_comments],
-                system_instruction=instructions_30_50
-            )
-        )
-        print("STEP 8: Chat session (30-50) created.")
-        
-        print("STEP 9: Sending message to agent (30-50)...")
-        response_30_50 = chat_30_50.send_message(
-            message=f"Please load the comments from '{data_source_name}' and analyze them for the 30-50 age group on {platform}."
-        )
-        
-        print("STEP 10: Response (30-50) received.")
-        results["adult_analysis"] = response_30_50.text
-        
-    except Exception as e:
-        print(f"❌ ERROR during 30-50 agent execution: {e}")
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=len(audience_agents)) as executor:
+            futures = {
+                tracing.submit(executor, _run_audience_agent, client, *args, cached_content=cached_content): key
+                for key, args in audience_agents.items()
+            }
+            # Push each audience analysis as soon as it arrives
+            for future in as_completed(futures):
+                key = futures[future]
+                outputs[key], timings[timing_keys[key]] = future.result()
+                yield key, {"text": outputs[key], "seconds": timings[timing_keys[key]]}
+    else:
+        for key, args in audience_agents.items():
+            outputs[key], timings[timing_keys[key]] = _run_audience_agent(client, *args, cached_content=cached_content)
+            yield key, {"text": outputs[key], "seconds": timings[timing_keys[key]]}
+
+    timings["audiences"] = time.perf_counter() - audiences_started
 
     # --- Strategist Agent ---
-    if results["youth_analysis"] and results["adult_analysis"]:
-        print("-" * 30)
+    error = None
+    strategy = ""
+    if outputs["youth_analysis"] and outputs["adult_analysis"]:
+        strategist_started = time.perf_counter()
         try:
             instructions_strategist = load_prompt("negotiate_suggestions.prompt")
             if not instructions_strategist:
                 raise Exception("Failed to load negotiate_suggestions.prompt")
 
-            print("STEP 11: Loaded Strategist prompt.")
-            
+
             chat_strategist = client.chats.create(
-                model="gemini-2.5-flash", 
+                model=MODEL_NAME, 
                 config=types.GenerateContentConfig(
                     system_instruction=instructions_strategist
                 )
             )
-            print("STEP 12: Chat session (Strategist) created.")
             
             strategist_message = f"""
             Here is the analysis from the 18-30 Age Group:
-            {results['youth_analysis']}
+            {outputs['youth_analysis']}
             
             Here is the analysis from the 30-50 Age Group:
-            {results['adult_analysis']}
+            {outputs['adult_analysis']}
             
             Please negotiate and provide strategic suggestions based on these reports.
             """
             
-            print("STEP 13: Sending message to Strategist Agent...")
-            response_strategist = chat_strategist.send_message(message=strategist_message)
+            chunks = []
+            last_chunk = None
+            for chunk in chat_strategist.send_message_stream(message=strategist_message):
+                last_chunk = chunk
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield "strategy_chunk", {"text": chunk.text}
+            strategy = "".join(chunks)
+            # The final chunk carries the usage of the whole response
+            record_usage(last_chunk, "strategist", MODEL_NAME)
             
-            print("STEP 14: STRATEGIST RESPONSE received.")
-            results["strategy"] = response_strategist.text
+            timings["strategist"] = time.perf_counter() - strategist_started
+            # Recorded after the fact: the span covers the streamed yields
+            tracing.record("agent.strategist", timings["strategist"], model=MODEL_NAME, chunks=len(chunks))
+            yield "strategy", {"text": strategy, "seconds": timings["strategist"]}
             
         except Exception as e:
             print(f"❌ ERROR during Strategist execution: {e}")
-            results["error"] = str(e) # Capture strategist error if it happens
+            error = str(e) # Capture strategist error if it happens
+            timings["strategist"] = time.perf_counter() - strategist_started
+            tracing.record("agent.strategist", timings["strategist"], error=type(e).__name__, model=MODEL_NAME)
     else:
-        msg = "Skipping Strategist: Missing analysis from one or more groups."
-        print(msg)
-        if not results["error"]:
-             results["error"] = msg
+        error = "Skipping Strategist: Missing analysis from one or more groups."
+        print(error)
+
+    if error:
+        yield "error", {"error": error}
+
+    timings["total"] = time.perf_counter() - analysis_started
+    tracing.record("analysis", timings["total"], error="AnalysisError" if error else None,
+                   platform=platform, cached=False)
+
+    # Only complete runs are cached
+    if cache_key and not error:
+        try:
+            get_analysis_cache().set(cache_key, {
+                "youth_analysis": outputs["youth_analysis"],
+                "adult_analysis": outputs["adult_analysis"],
+                "strategy": strategy
+            })
+        except Exception as e:
+            print(f"⚠️ Failed to store analysis in cache: {e}")
+
+    yield "done", {"timings": timings, "cached": False}
+
+def run_analysis(data_file="linkedin_comments.json", platform="linkedin", concurrent=True, use_cache=True):
+    """
+    Runs the multi-agent analysis.
+    platform: 'linkedin' or 'instagram'
+    concurrent: run the 18-30 and 30-50 agents in parallel (they are independent)
+    use_cache: serve/store results in the content-addressed analysis cache.
+               Pass False to force a fresh run (the new result is still stored).
+    """
+    results = {
+        "youth_analysis": "",
+        "adult_analysis": "",
+        "strategy": "",
+        "error": None,
+        "timings": {},
+        "cached": False
+    }
+
+    for event, data in iter_analysis_events(data_file, platform, concurrent, use_cache):
+        if event in ("youth_analysis", "adult_analysis", "strategy"):
+            results[event] = data["text"]
+        elif event == "error":
+            results["error"] = data["error"]
+        elif event == "done":
+            results["timings"] = data["timings"]
+            results["cached"] = data["cached"]
 
     return results
 
+def preprocess_draft_image(image_path):
+    """
+    Applies the EXIF orientation, caps the long edge at DRAFT_MAX_EDGE and
+    re-encodes as JPEG (which drops EXIF/GPS metadata).
+    Returns (jpeg_bytes, stats).
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(image_path) as img:
+        original_size = img.size
+        # JPEGs can be decoded at a reduced scale directly (much faster than full decode + resize)
+        scale = DRAFT_MAX_EDGE / max(original_size)
+        if scale < 1:
+            img.draft("RGB", (int(original_size[0] * scale) + 1, int(original_size[1] * scale) + 1))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((DRAFT_MAX_EDGE, DRAFT_MAX_EDGE), Image.LANCZOS)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        buffer = BytesIO()
+        img.save(buffer, "JPEG", quality=DRAFT_JPEG_QUALITY, optimize=True)
+        sent_size = img.size
+
+    image_bytes = buffer.getvalue()
+    original_bytes = os.path.getsize(image_path)
+    return image_bytes, {
+        "original_bytes": original_bytes,
+        "sent_bytes": len(image_bytes),
+        "bytes_saved": original_bytes - len(image_bytes),
+        "original_size": list(original_size),
+        "sent_size": list(sent_size)
+    }
+
 def analyze_draft(image_path, caption):
     """
     Analyzes a draft post (Image + Caption) using Gemini Vision.
+    The image is downscaled/re-encoded first; a repeated image + caption is
+    answered from the draft prediction cache.
     """
     results = {
         "success": False,
         "prediction": {},
-        "error": None
+        "error": None,
+        "cached": False,
+        "image": {},
+        "timings": {}
     }
-    
-    print(f"STEP 1: Analyzing Draft - Image: {image_path}, Caption: {caption}")
+    timings = results["timings"]
+    started = time.perf_counter()
     
     try:
-        client = genai.Client()
+        client = get_client(MODEL_NAME)
         
         # Load Prompt
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -187,63 +395,102 @@ def analyze_draft(image_path, caption):
         with open(prompt_path, "r") as f:
             instructions = f.read()
             
-        # Load Image
-        image = Image.open(image_path)
-        
-        print("STEP 2: Sending to Gemini Vision...")
-        
-        # Create Chat with System Instructions
-        # Note: For Vision, we often just generate_content with system_instruction in config
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[image, f"Caption: {caption}"],
-            config=types.GenerateContentConfig(
-                system_instruction=instructions
-            )
-        )
-        
-        print("STEP 3: Response received.")
-        
-        # Clean and Parse JSON
-        raw_text = response.text.replace("```json", "").replace("```", "").strip()
+        # Load and normalize the image
+        stage_started = time.perf_counter()
+        with tracing.span("draft.preprocess") as span:
+            image_bytes, results["image"] = preprocess_draft_image(image_path)
+            span.set(**results["image"])
+        timings["preprocess"] = time.perf_counter() - stage_started
         
+        cache_key = None
+        data = None
         try:
-            data = json.loads(raw_text)
-        except Exception as e_json:
-            print(f"⚠️ JSON Parse Error ({e_json}). Attempting ast.literal_eval fallback...")
-            try:
-                # Fallback for single quotes or python-style dicts
-                data = ast.literal_eval(raw_text)
-            except Exception as e2:
-                print(f"❌ Critical Parsing Error: {e2}")
-                # Return a safe error structure so frontend doesn't crash
-                data = {
-                    "summary": "AI Error: Could not parse response.",
-                    "predicted_engagement": 0,
-                    "age_group_reactions": {"youth": "Error", "adult": "Error", "senior": "Error"},
-                    "optimization_tips": ["Please retry analysis."],
-                    "hashtags": []
-                }
+            with tracing.span("cache.draft") as span:
+                cache_key = draft_cache_key(image_bytes, caption, MODEL_NAME, prompt_path)
+                data = get_draft_cache().get(cache_key)
+                span.set(hit=data is not None)
+        except Exception as e:
+            print(f"⚠️ Draft cache unavailable: {e}")
+        
+        if data:
+            results["cached"] = True
+        else:
+            data, parsed = _predict_draft(client, instructions, image_bytes, caption, timings)
+            if cache_key and parsed:
+                try:
+                    get_draft_cache().set(cache_key, data)
+                except Exception as e:
+                    print(f"⚠️ Failed to store draft prediction in cache: {e}")
         
         results["success"] = True
 
         # Dynamic Hashtag Scraping Logic
+        stage_started = time.perf_counter()
         if "hashtag_search_query" in data and data["hashtag_search_query"]:
              query = data["hashtag_search_query"]
-             print(f"STEP 4: Scraping hashtags for query: '{query}'...")
-             scraped_tags = scrape_hashtags(query)
+             with tracing.span("hashtags.scrape", query=query) as span:
+                 scraped_tags = scrape_hashtags(query, all_slugs=True)
+                 span.set(found=len(scraped_tags))
              if scraped_tags:
-                 print(f"STEP 5: Found {len(scraped_tags)} dynamic hashtags.")
                  # Prioritize scraped tags, maybe keep a few AI ones if needed, or just replace.
                  # Strategy: Use scraped tags primarily.
                  data["hashtags"] = scraped_tags
-             else:
-                 print("STEP 5: No dynamic hashtags found, keeping AI suggestions.")
+        timings["hashtags"] = time.perf_counter() - stage_started
         
         results["prediction"] = data
         
     except Exception as e:
         print(f"❌ Analysis Error: {e}")
         results["error"] = str(e)
-        
+    
+    timings["total"] = time.perf_counter() - started
+    tracing.record("draft", timings["total"], error="DraftError" if results["error"] else None,
+                   cached=results["cached"])
     return results
+
+def _predict_draft(client, instructions, image_bytes, caption, timings):
+    """
+    Sends the normalized image + caption to Gemini Vision and parses the JSON
+    prediction. Returns (data, parsed); parsed is False when the fallback
+    structure was returned.
+    """
+    from google.genai import types
+
+    stage_started = time.perf_counter()
+    
+    # Create Chat with System Instructions
+    # Note: For Vision, we often just generate_content with system_instruction in config
+    with tracing.span("agent.draft_vision", model=MODEL_NAME, image_bytes=len(image_bytes)):
+        response = client.models.generate_content(
+            model=MODEL_NAME,
+            contents=[types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"), f"Caption: {caption}"],
+            config=types.GenerateContentConfig(
+                system_instruction=instructions
+            )
+        )
+    record_usage(response, "draft_vision", MODEL_NAME)
+    timings["model"] = time.perf_counter() - stage_started
+    
+    # Clean and Parse JSON
+    raw_text = response.text.replace("```json", "").replace("```", "").strip()
+    
+    with tracing.span("parse.draft_prediction") as span:
+        try:
+            return json.loads(raw_text), True
+        except Exception as e_json:
+            print(f"⚠️ JSON Parse Error ({e_json}). Attempting ast.literal_eval fallback...")
+            span.set(fallback=True)
+        try:
+            # Fallback for single quotes or python-style dicts
+            return ast.literal_eval(raw_text), True
+        except Exception as e2:
+            print(f"❌ Critical Parsing Error: {e2}")
+            span.error = type(e2).__name__
+            # Return a safe error structure so frontend doesn't crash
+            return {
+                "summary": "AI Error: Could not parse response.",
+                "predicted_engagement": 0,
+                "age_group_reactions": {"youth": "Error", "adult": "Error", "senior": "Error"},
+                "optimization_tips": ["Please retry analysis."],
+                "hashtags": []
+            }, False
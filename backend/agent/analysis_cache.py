@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROMPTS_DIR = os.path.join(BASE_DIR, "prompts")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, "analysis_cache.sqlite3")
+DRAFT_DB_PATH = os.path.join(CACHE_DIR, "draft_cache.sqlite3")
+
+# Defaults can be overridden from .env
+DEFAULT_TTL_SECONDS = int(os.environ.get("ANALYSIS_CACHE_TTL", 24 * 60 * 60))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 128))
+
+
+def file_digest(path):
+    """
+    Returns the sha256 hex digest of a file's contents (read in chunks).
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def analysis_cache_key(data_path, platform, model, prompts_dir=PROMPTS_DIR):
+    """
+    Builds a content-addressed key for a run_analysis call.
+    Any edit to the comment dump or to a prompt file yields a new key, so
+    stale entries are never served - they just age out.
+    """
+    h = hashlib.sha256()
+    h.update(f"data:{file_digest(data_path)}\n".encode())
+    h.update(f"platform:{platform.lower()}\n".encode())
+    h.update(f"model:{model}\n".encode())
+    for name in sorted(os.listdir(prompts_dir)):
+        if name.endswith(".prompt"):
+            h.update(f"prompt:{name}:{file_digest(os.path.join(prompts_dir, name))}\n".encode())
+    return h.hexdigest()
+
+
+def draft_cache_key(image_bytes, caption, model, prompt_path):
+    """
+    Key for an analyze_draft prediction: the normalized image bytes, the
+    caption, the model and the prediction prompt.
+    """
+    h = hashlib.sha256()
+    h.update(f"image:{hashlib.sha256(image_bytes).hexdigest()}\n".encode())
+    h.update(f"caption:{caption.strip()}\n".encode())
+    h.update(f"model:{model}\n".encode())
+    h.update(f"prompt:{file_digest(prompt_path)}\n".encode())
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Persistent (SQLite) result cache with TTL expiry and LRU eviction.
+    Values are JSON-serialisable dicts.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def get(self, key):
+        """
+        Returns the cached dict for key, or None on a miss / expired entry.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                return None
+
+            conn.execute("UPDATE analysis_cache SET last_access = ? WHERE key = ?", (now, key))
+            return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl:
+            conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl,))
+        if self.max_entries:
+            # Drop least-recently-used entries beyond the size limit
+            conn.execute(
+                """
+                DELETE FROM analysis_cache WHERE key NOT IN (
+                    SELECT key FROM analysis_cache ORDER BY last_access DESC LIMIT ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM analysis_cache")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """
+    Returns the process-wide AnalysisCache, creating it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
+
+
+_draft_cache = None
+
+
+def get_draft_cache():
+    """
+    Returns the process-wide draft prediction cache (same policy as the
+    analysis cache, separate table file).
+    """
+    global _draft_cache
+    with _cache_lock:
+        if _draft_cache is None:
+            _draft_cache = AnalysisCache(DRAFT_DB_PATH)
+        return _draft_cache
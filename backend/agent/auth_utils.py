@@ -1,6 +1,6 @@
 import os
-import requests
 import urllib.parse
+import http_client
 
 def get_linkedin_auth_url():
     """
@@ -43,7 +43,7 @@ def exchange_code_for_token(authorization_code):
         "client_secret": client_secret
     }
     
-    response = requests.post(url, data=payload)
+    response = http_client.post(url, data=payload)
     
     if response.status_code == 200:
         return response.json()
@@ -57,7 +57,7 @@ def get_user_info(access_token):
     url = "https://api.linkedin.com/v2/userinfo"
     headers = {'Authorization': f'Bearer {access_token}'}
     
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
     
     if response.status_code == 200:
         return response.json()
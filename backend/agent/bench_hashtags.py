@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: hashtag extraction on saved best-hashtags.com pages
+Replays the HTML fixtures in fixtures/hashtags/ offline (no network)
+
+Usage:
+    python bench_hashtags.py                    # every fixture, 50 rounds
+    python bench_hashtags.py --repeat 200
+    python bench_hashtags.py --save marketing   # fetch a live page into the fixtures
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+import hashtag_scraper
+from hashtag_scraper import HEADERS, extract_hashtags
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hashtags")
+
+
+def legacy_extract_hashtags(html):
+    """The original implementation: full html.parser tree, list-based dedup"""
+    soup = BeautifulSoup(html, "html.parser")
+    hashtags = []
+
+    for div in soup.find_all('div', class_='col-sm-12'):
+        for word in div.get_text().split():
+            if word.startswith('#') and len(word) > 2 and word not in hashtags:
+                clean_tag = word.strip(".,!?:;\"'()[]{}")
+                if clean_tag.startswith('#'):
+                    hashtags.append(clean_tag)
+                    if len(hashtags) >= 20:
+                        break
+        if len(hashtags) >= 20:
+            break
+
+    if len(hashtags) < 5:
+        for word in soup.get_text().split():
+            if word.startswith('#') and len(word) > 2 and word not in hashtags:
+                clean_tag = word.strip(".,!?:;\"'()[]{}")
+                if clean_tag.startswith('#') and clean_tag.lower() != '#hashtags':
+                    hashtags.append(clean_tag)
+                    if len(hashtags) >= 20:
+                        break
+
+    return hashtags
+
+
+def bsoup_extract_hashtags(html):
+    """The new engine forced onto the BeautifulSoup fallback (no lxml)"""
+    saved, hashtag_scraper.lxml_html = hashtag_scraper.lxml_html, None
+    try:
+        return extract_hashtags(html)
+    finally:
+        hashtag_scraper.lxml_html = saved
+
+
+def bench(label, fn, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            fn(html)
+    elapsed = time.perf_counter() - started
+    per_page_ms = elapsed / (repeat * len(pages)) * 1000
+    print(f"  {label:<10} {elapsed:8.2f}s  {per_page_ms:8.2f} ms/page")
+    return elapsed
+
+
+def save_fixture(slug):
+    url = f"https://best-hashtags.com/hashtag/{slug}/"
+    response = requests.get(url, headers=HEADERS, timeout=10)
+    response.raise_for_status()
+    path = os.path.join(FIXTURES_DIR, f"{slug}.html")
+    with open(path, "wb") as f:
+        f.write(response.content)
+    print(f"✅ Saved {url} -> {path} ({len(response.content):,} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hashtag extraction")
+    parser.add_argument("--repeat", type=int, default=50, help="Rounds over all fixtures")
+    parser.add_argument("--save", metavar="SLUG", help="Fetch a live page and store it as a fixture")
+    args = parser.parse_args()
+
+    if args.save:
+        save_fixture(args.save)
+        return
+
+    paths = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append(f.read())
+
+    print(f"\n📄 {len(pages)} fixtures, {sum(len(p) for p in pages):,} bytes, {args.repeat} rounds")
+    for path, html in zip(paths, pages):
+        tags = extract_hashtags(html)
+        print(f"  {os.path.basename(path):<22} {len(tags):2d} tags  {' '.join(tags[:5])}")
+
+    print("\n📊 extract_hashtags")
+    legacy = bench("legacy", legacy_extract_hashtags, pages, args.repeat)
+    bsoup = bench("bs4", bsoup_extract_hashtags, pages, args.repeat)
+    print(f"\n  Speedup (bs4 fallback): {legacy / bsoup:.1f}x")
+    if hashtag_scraper.lxml_html is not None:
+        lean = bench("lxml", extract_hashtags, pages, args.repeat)
+        print(f"  Speedup (lxml): {legacy / lean:.1f}x\n")
+    else:
+        print("  (lxml not installed - skipping the lxml engine)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark: drives the Flask endpoints at fixed concurrency
+levels against the local stand-in API (standin_server.py), fully offline.
+Reports p50/p95/p99 latency and throughput per endpoint and concurrency.
+
+Usage:
+    python bench_server.py                                  # all endpoints, concurrency 1,4,16
+    python bench_server.py --endpoints analyze,image --requests 50
+    python bench_server.py --latency-ms 800 --error-rate 0.05
+    python bench_server.py --cached                         # repeat inputs: measure cache hits
+    python bench_server.py --json results.json              # also write raw numbers
+    python bench_server.py --server-url http://127.0.0.1:5000   # a server already running
+                                                            # against the stand-in
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+
+from standin_server import StandInConfig, start_standin
+
+AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ("analyze", "analyze_draft", "campaign", "image")
+
+
+def _draft_jpeg():
+    from PIL import Image
+    buffer = BytesIO()
+    Image.effect_noise((2000, 1500), 40).convert("RGB").save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def make_calls(base_url, cached):
+    """
+    One function per endpoint: call(session) -> HTTP status.
+    Unless `cached`, every call uses a fresh input so no cache can answer it.
+    """
+    draft = _draft_jpeg()
+
+    def unique():
+        return "same" if cached else uuid.uuid4().hex[:8]
+
+    def analyze(session):
+        return session.post(f"{base_url}/analyze", json={"no_cache": not cached}).status_code
+
+    def analyze_draft(session):
+        files = {"image": (f"bench_{unique()}.jpg", draft, "image/jpeg")}
+        return session.post(f"{base_url}/analyze_draft", files=files, data={"caption": f"Launch {unique()}"}).status_code
+
+    def campaign(session):
+        payload = {"strategy": f"Grow the community ({unique()})", "days": 5}
+        return session.post(f"{base_url}/generate_campaign", json=payload).status_code
+
+    def image(session):
+        return session.post(f"{base_url}/generate_image_for_post", json={"prompt": f"A bright product photo {unique()}"}).status_code
+
+    return {"analyze": analyze, "analyze_draft": analyze_draft, "campaign": campaign, "image": image}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def run_level(call, concurrency, total):
+    """Runs `total` calls with `concurrency` workers; one requests.Session per worker"""
+    local = threading.local()
+
+    def timed(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            status = call(local.session)
+        except requests.RequestException:
+            status = 0
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _ in results]
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "throughput_rps": round(total / wall, 2)
+    }
+
+
+def start_app(standin_url, work_dir):
+    """
+    Imports the Flask app pointed at the stand-in, with every cache and job
+    store in work_dir, and serves it on a free port. Returns its base URL.
+    """
+    os.environ.update({
+        "GENAI_BASE_URL": standin_url,
+        "IMAGEN_BASE_URL": standin_url,
+        "POLLINATIONS_BASE_URL": standin_url,
+        "HASHTAG_BASE_URL": standin_url,
+        "GEMINI_API_KEY": "standin",
+        "GOOGLE_API_KEY": "standin",
+        "GENAI_WARMUP": "0",
+        "JOBS_DB_PATH": os.path.join(work_dir, "jobs.sqlite3"),
+        "CONTEXT_CACHE_DB_PATH": os.path.join(work_dir, "context_cache.sqlite3")
+    })
+    os.chdir(AGENT_DIR)
+    sys.path.insert(0, AGENT_DIR)
+
+    import analysis_cache
+    import hashtag_scraper
+    import image_store
+    import server
+    from werkzeug.serving import make_server
+
+    analysis_cache._cache = analysis_cache.AnalysisCache(os.path.join(work_dir, "analysis.sqlite3"))
+    analysis_cache._draft_cache = analysis_cache.AnalysisCache(os.path.join(work_dir, "drafts.sqlite3"))
+    hashtag_scraper._cache = hashtag_scraper.HashtagCache(db_path=os.path.join(work_dir, "hashtags.sqlite3"))
+    image_store._store = image_store.ImageStore(os.path.join(work_dir, "images"))
+    server.app.config['UPLOAD_FOLDER'] = os.path.join(work_dir, "uploads")
+    os.makedirs(server.app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, name="bench-app", daemon=True).start()
+    return f"http://127.0.0.1:{httpd.server_port}"
+
+
+def print_table(results):
+    print(f"\n  {'endpoint':<14}{'conc':>5}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for row in results:
+        print(f"  {row['endpoint']:<14}{row['concurrency']:>5}{row['requests']:>6}{row['errors']:>6}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['throughput_rps']:>9.2f}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark against the stand-in API")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per endpoint and level")
+    parser.add_argument("--cached", action="store_true", help="Repeat the same inputs so caches can answer")
+    parser.add_argument("--server-url", help="Benchmark a server that is already running (skips the in-process app)")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Stand-in model latency")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Stand-in time per output token")
+    parser.add_argument("--image-latency-ms", type=float, default=1500.0, help="Stand-in image latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stand-in error rate")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    work_dir = tempfile.mkdtemp(prefix="bench_server_")
+    standin = None
+    try:
+        if args.server_url:
+            base_url = args.server_url.rstrip("/")
+        else:
+            config = StandInConfig(
+                latency_ms=args.latency_ms, token_ms=args.token_ms,
+                image_latency_ms=args.image_latency_ms, error_rate=args.error_rate
+            )
+            standin, standin_url = start_standin(config)
+            base_url = start_app(standin_url, work_dir)
+            print(f"✅ Stand-in API on {standin_url}, app on {base_url}")
+
+        calls = make_calls(base_url, args.cached)
+        results = []
+        for endpoint in endpoints:
+            for concurrency in levels:
+                print(f"📊 {endpoint} x{concurrency} ({args.requests} requests)...")
+                row = run_level(calls[endpoint], concurrency, args.requests)
+                row["endpoint"] = endpoint
+                results.append(row)
+
+        print_table(results)
+        if standin is not None:
+            print(f"  Stand-in calls: {json.dumps(standin.RequestHandlerClass.stats)}\n")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"args": vars(args), "results": results}, f, indent=2)
+            print(f"✅ Results written to {args.json}")
+    finally:
+        if standin is not None:
+            standin.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
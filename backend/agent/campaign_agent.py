@@ -1,5 +1,6 @@
-from google import genai
-from google.genai import types
+from genai_clients import get_client, DEFAULT_MODEL
+import tracing
+from usage import record_usage
 import os
 import json
 
@@ -9,8 +10,10 @@ def generate_campaign_schedule(strategy_context, days=5, visual_description=""):
     """
     Generates a social media campaign schedule based on the strategy.
     """
+    from google.genai import types
+
     try:
-        client = genai.Client()
+        client = get_client(DEFAULT_MODEL)
         
         # Load Prompt
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -20,7 +23,7 @@ def generate_campaign_schedule(strategy_context, days=5, visual_description=""):
             instructions = f.read()
             
         chat = client.chats.create(
-            model="gemini-2.5-flash",
+            model=DEFAULT_MODEL,
             config=types.GenerateContentConfig(
                 system_instruction=instructions
             )
@@ -47,20 +50,25 @@ def generate_campaign_schedule(strategy_context, days=5, visual_description=""):
         {days} Days
         """
         
-        response = chat.send_message(message=message)
+        with tracing.span("agent.campaign", model=DEFAULT_MODEL, days=days):
+            response = chat.send_message(message=message)
+        record_usage(response, "campaign", DEFAULT_MODEL)
         
         # Clean up response (in case of markdown blocks)
         raw_text = response.text.replace("```json", "").replace("```", "").strip()
         
-        try:
-            campaign_data = json.loads(raw_text)
-        except Exception as e_json:
-            print(f"Campaign JSON Error: {e_json}. Attempting fallback...")
+        with tracing.span("parse.campaign") as span:
             try:
-                campaign_data = ast.literal_eval(raw_text)
-            except Exception as e2:
-                print(f"Campaign Critical Parse Error: {e2}")
-                return {"success": False, "error": f"Failed to parse campaign: {e2}"}
+                campaign_data = json.loads(raw_text)
+            except Exception as e_json:
+                print(f"Campaign JSON Error: {e_json}. Attempting fallback...")
+                span.set(fallback=True)
+                try:
+                    campaign_data = ast.literal_eval(raw_text)
+                except Exception as e2:
+                    print(f"Campaign Critical Parse Error: {e2}")
+                    span.error = type(e2).__name__
+                    return {"success": False, "error": f"Failed to parse campaign: {e2}"}
 
         return {"success": True, "campaign": campaign_data}
         
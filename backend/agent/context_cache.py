@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from analysis_cache import file_digest
+from tools.load_json import load_compact_comments
+from usage import record_usage
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+DEFAULT_DB_PATH = os.environ.get("CONTEXT_CACHE_DB_PATH", os.path.join(CACHE_DIR, "context_cache.sqlite3"))
+
+# Lifetime (seconds) of the server-side cached comment context
+DEFAULT_TTL_SECONDS = int(os.environ.get("CONTEXT_CACHE_TTL", 60 * 60))
+# Opt in with CONTEXT_CACHE=1. A cached context can't carry system_instruction,
+# so cached runs send each agent's prompt inside its message instead, which can
+# change /analyze output; by default the comments go through the tool call.
+CONTEXT_CACHE_ENABLED = os.environ.get("CONTEXT_CACHE", "0") == "1"
+# Bump when the cached payload format changes
+PAYLOAD_VERSION = "1"
+# Re-create the cache slightly before the server expires it
+EXPIRY_MARGIN_SECONDS = 30
+# Don't retry a corpus the API refused to cache (e.g. below the minimum size) for this long
+FAILURE_RETRY_SECONDS = 5 * 60
+# Another worker's upload claim is considered abandoned after this long
+UPLOAD_CLAIM_SECONDS = 120
+# How long a worker waits for another worker's upload before using the tool call.
+# Kept short: the wait holds the per-key lock on the request path.
+UPLOAD_WAIT_SECONDS = float(os.environ.get("CONTEXT_CACHE_UPLOAD_WAIT", 1.5))
+UPLOAD_POLL_SECONDS = 0.25
+
+
+def context_cache_key(data_path, model):
+    """
+    Content-addressed key for the cached comment corpus: the same data file
+    and model always map to the same cached context.
+    """
+    h = hashlib.sha256()
+    h.update(f"data:{file_digest(data_path)}\n".encode())
+    h.update(f"model:{model}\n".encode())
+    h.update(f"payload:{PAYLOAD_VERSION}\n".encode())
+    return h.hexdigest()
+
+
+class CommentContextCache:
+    """
+    Uploads the (compacted) comment corpus once as a Gemini cached context
+    and hands out its name, so every audience agent - and every analysis of
+    the same data file - references one copy instead of pulling the
+    comments into its own context window.
+
+    Cache names live in SQLite, shared by every worker process on the host:
+    one worker uploads a corpus while the others wait for it, and a name
+    another worker stored is checked with caches.get before it is used.
+    Entries live as long as the server-side cache (ttl); a changed data
+    file produces a new key and the old cached context is deleted.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, db_path=DEFAULT_DB_PATH):
+        self.ttl = ttl
+        self.db_path = db_path
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+        self._entries = {}  # key -> (cache name or None after a failure, expires_at), seen by this process
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS context_caches (
+                    key TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    name TEXT,
+                    data_path TEXT,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _claim(self, key):
+        """
+        Looks up key in the shared table and, if nobody holds a usable entry,
+        claims the upload for this process. Returns (state, name, expires_at)
+        with state "ready", "failed", "uploading" (another worker) or "claimed".
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT state, name, expires_at FROM context_caches WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    state, name, expires_at = row
+                    if state == "ready" and expires_at - EXPIRY_MARGIN_SECONDS > now:
+                        return row
+                    if state in ("failed", "uploading") and expires_at > now:
+                        return row
+                conn.execute(
+                    "INSERT OR REPLACE INTO context_caches (key, state, name, data_path, expires_at) VALUES (?, 'uploading', NULL, NULL, ?)",
+                    (key, now + UPLOAD_CLAIM_SECONDS)
+                )
+                return ("claimed", None, None)
+            finally:
+                conn.execute("COMMIT")
+
+    def _publish(self, key, state, name, data_path, expires_at):
+        """
+        Stores the outcome of this process's upload. Returns the names of
+        other cached contexts of the same data file (now stale).
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stale = []
+                if name:
+                    stale = conn.execute(
+                        "SELECT key, name FROM context_caches WHERE data_path = ? AND key != ? AND name IS NOT NULL",
+                        (data_path, key)
+                    ).fetchall()
+                    conn.executemany("DELETE FROM context_caches WHERE key = ?", [(k,) for k, _ in stale])
+                conn.execute(
+                    "INSERT OR REPLACE INTO context_caches (key, state, name, data_path, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, state, name, data_path, expires_at)
+                )
+            finally:
+                conn.execute("COMMIT")
+        with self._lock:
+            for stale_key, _ in stale:
+                self._entries.pop(stale_key, None)
+        return [stale_name for _, stale_name in stale]
+
+    def _forget(self, key):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM context_caches WHERE key = ?", (key,))
+
+    def _is_live(self, client, name):
+        # Another worker's name may have been deleted or expired server-side
+        try:
+            client.caches.get(name=name)
+            return True
+        except Exception as e:
+            print(f"⚠️ Shared cached context {name} is gone: {e}")
+            return False
+
+    def _hit(self, key, name, expires_at):
+        with self._lock:
+            self.stats["hits"] += 1
+            self._entries[key] = (name, expires_at)
+        return name
+
+    def get_or_create(self, client, model, data_path):
+        """
+        Returns the cached content name for data_path, creating it on a miss.
+        Returns None if the context can't be cached (the caller falls back
+        to the tool call).
+        """
+        from google.genai import types
+
+        try:
+            key = context_cache_key(data_path, model)
+        except OSError as e:
+            print(f"⚠️ Context cache unavailable: {e}")
+            return None
+
+        # Both audience agents ask at once; only one of them uploads
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry and entry[0] is None and entry[1] > time.time():
+                return None
+            if entry and entry[1] - EXPIRY_MARGIN_SECONDS > time.time():
+                return self._hit(key, *entry)
+
+            # Wait for another worker's upload, adopting its result
+            deadline = time.time() + UPLOAD_WAIT_SECONDS
+            while True:
+                try:
+                    state, name, expires_at = self._claim(key)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Context cache unavailable: {e}")
+                    return None
+                if state == "ready":
+                    if self._is_live(client, name):
+                        return self._hit(key, name, expires_at)
+                    self._forget(key)
+                    continue
+                if state == "failed":
+                    with self._lock:
+                        self._entries[key] = (None, expires_at)
+                    return None
+                if state == "claimed":
+                    break
+                if time.time() >= deadline:
+                    print("⚠️ Cached comment context still uploading in another worker, using the tool call")
+                    return None
+                time.sleep(UPLOAD_POLL_SECONDS)
+
+            try:
+                payload = load_compact_comments(data_path)
+                cached = client.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        display_name=f"comments-{key[:12]}",
+                        contents=[types.Content(role="user", parts=[types.Part(
+                            text="LinkedIn comments to analyze (JSON):\n" + json.dumps(payload, ensure_ascii=False)
+                        )])],
+                        ttl=f"{self.ttl}s"
+                    )
+                )
+            except Exception as e:
+                print(f"⚠️ Failed to create cached comment context: {e}")
+                retry_at = time.time() + FAILURE_RETRY_SECONDS
+                self._publish(key, "failed", None, data_path, retry_at)
+                with self._lock:
+                    self.stats["errors"] += 1
+                    self._entries[key] = (None, retry_at)
+                return None
+
+            record_usage(cached, "context_cache", model)
+            print(f"✅ Cached comment context {cached.name} ({key[:12]})")
+            expires_at = time.time() + self.ttl
+            stale = self._publish(key, "ready", cached.name, data_path, expires_at)
+            with self._lock:
+                self.stats["misses"] += 1
+                self._entries[key] = (cached.name, expires_at)
+
+        for name in stale:
+            try:
+                client.caches.delete(name=name)
+            except Exception as e:
+                print(f"⚠️ Failed to delete stale cached context {name}: {e}")
+        return cached.name
+
+
+_context_cache = None
+_context_cache_lock = threading.Lock()
+
+
+def get_context_cache():
+    """
+    Returns the process-wide CommentContextCache, creating it on first use.
+    """
+    global _context_cache
+    with _context_cache_lock:
+        if _context_cache is None:
+            _context_cache = CommentContextCache()
+        return _context_cache
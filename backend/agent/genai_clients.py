@@ -0,0 +1,107 @@
+import os
+import threading
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Request timeout (ms) for every model, overridable per model with e.g.
+# GENAI_MODEL_TIMEOUTS="gemini-2.5-flash=60000,gemini-2.5-pro=180000"
+DEFAULT_TIMEOUT_MS = int(os.environ.get("GENAI_TIMEOUT_MS", 120000))
+
+# Point the SDK at another endpoint (e.g. the local stand-in server used by
+# bench_server.py); unset means the public Gemini API
+BASE_URL = os.environ.get("GENAI_BASE_URL")
+
+# Keep idle HTTP connections open between Flask requests
+KEEPALIVE_CONNECTIONS = int(os.environ.get("GENAI_KEEPALIVE_CONNECTIONS", 20))
+KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("GENAI_KEEPALIVE_EXPIRY", 300))
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _parse_model_timeouts(value):
+    timeouts = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            model, ms = item.split("=", 1)
+            timeouts[model.strip()] = int(ms)
+    return timeouts
+
+
+MODEL_TIMEOUTS = _parse_model_timeouts(os.environ.get("GENAI_MODEL_TIMEOUTS"))
+
+
+def get_timeout_ms(model):
+    return MODEL_TIMEOUTS.get(model, DEFAULT_TIMEOUT_MS)
+
+
+def _create_client(timeout_ms):
+    # The SDK takes most of the server's import time; load it with the first client
+    import httpx
+    from google import genai
+    from google.genai import types
+
+    limits = httpx.Limits(
+        max_keepalive_connections=KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+    )
+    return genai.Client(
+        http_options=types.HttpOptions(
+            base_url=BASE_URL,
+            timeout=timeout_ms,
+            client_args={"limits": limits}
+        )
+    )
+
+
+def get_client(model=DEFAULT_MODEL):
+    """
+    Returns the shared genai.Client for a model.
+    Clients are created once per process (per distinct timeout) and reused
+    across requests, so credential discovery and the HTTP connection pool
+    are paid for only once. Safe to call from multiple threads.
+    """
+    timeout_ms = get_timeout_ms(model)
+    client = _clients.get(timeout_ms)
+    if client is not None:
+        return client
+
+    with _lock:
+        if timeout_ms not in _clients:
+            _clients[timeout_ms] = _create_client(timeout_ms)
+        return _clients[timeout_ms]
+
+
+def warm_up(models=(DEFAULT_MODEL,), background=True):
+    """
+    Creates the clients and opens a connection to the API for each model,
+    so the first user request doesn't pay the cold-connection latency.
+    Failures are logged, never raised.
+    """
+    def _warm():
+        for model in models:
+            try:
+                get_client(model).models.get(model=model)
+                print(f"✅ genai client warmed up for {model}")
+            except Exception as e:
+                print(f"⚠️ genai warm-up failed for {model}: {e}")
+
+    if background:
+        thread = threading.Thread(target=_warm, name="genai-warm-up", daemon=True)
+        thread.start()
+        return thread
+    _warm()
+    return None
+
+
+def close_clients():
+    """
+    Closes every pooled client (used on shutdown and in tests).
+    """
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _clients.clear()
@@ -0,0 +1,43 @@
+"""
+Gunicorn settings for production serving:
+
+    cd backend/agent
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_CONCURRENCY worker processes x WEB_THREADS threads each. Shared state
+(LinkedIn token, jobs, caches) lives in SQLite under state/ and cache/, so
+every worker sees the same data.
+"""
+
+import os
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+# Requests mostly wait on Gemini/Imagen, so threads are cheap concurrency
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 8))
+
+# Analysis and image generation can take minutes; streams stay open meanwhile
+timeout = int(os.environ.get("WEB_TIMEOUT", 300))
+# Time a worker gets after SIGTERM to finish in-flight requests and jobs
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 120))
+keepalive = 5
+
+# Recycle workers now and then (0 = never)
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+# Each worker imports the app itself: thread pools, SQLite connections and
+# HTTP connection pools must not be shared across fork
+preload_app = False
+
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def worker_exit(server, worker):
+    # Let background jobs finish and close pooled clients (see server.shutdown_app)
+    app_module = sys.modules.get("server")
+    if app_module is not None:
+        app_module.shutdown_app()
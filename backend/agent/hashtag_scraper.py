@@ -1,87 +1,359 @@
-import requests
-from bs4 import BeautifulSoup
 import urllib.parse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-def scrape_hashtags(query):
+import http_client
+import tracing
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # falls back to BeautifulSoup's html.parser
+    lxml_html = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, "cache", "hashtag_cache.sqlite3")
+
+# Fresh for HASHTAG_CACHE_TTL; then served stale (and refreshed in the
+# background) until HASHTAG_STALE_TTL. Unknown slugs (404) are remembered
+# for HASHTAG_NEGATIVE_TTL. All in seconds.
+DEFAULT_TTL_SECONDS = int(os.environ.get("HASHTAG_CACHE_TTL", 6 * 60 * 60))
+DEFAULT_STALE_TTL_SECONDS = int(os.environ.get("HASHTAG_STALE_TTL", 7 * 24 * 60 * 60))
+DEFAULT_NEGATIVE_TTL_SECONDS = int(os.environ.get("HASHTAG_NEGATIVE_TTL", 24 * 60 * 60))
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get("HASHTAG_CACHE_MEMORY_ENTRIES", 256))
+
+# Multi-slug mode: slugs scraped per query, and concurrent requests per host
+# (connections are pooled by http_client)
+MAX_SLUGS = int(os.environ.get("HASHTAG_MAX_SLUGS", 5))
+HOST_CONCURRENCY = int(os.environ.get("HASHTAG_HOST_CONCURRENCY", 4))
+
+BASE_URL = os.environ.get("HASHTAG_BASE_URL", "https://best-hashtags.com")
+
+MAX_HASHTAGS = 20
+MIN_CONTAINER_HASHTAGS = 5
+# Whitespace-delimited words starting with "#" (trailing punctuation dropped)
+HASHTAG_PATTERN = re.compile(r"(?<!\S)#\w{2,}")
+CONTAINER_CLASS_PATTERN = re.compile(r"(^|\s)col-sm-12(\s|$)")
+CONTAINER_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' col-sm-12 ')]"
+PAGE_TEXT_XPATH = "//text()[not(ancestor::script or ancestor::style)]"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+class HashtagNotFound(Exception):
+    """best-hashtags.com has no page for the slug (HTTP 404)."""
+
+
+def normalize_slug(query):
     """
-    Scrapes hashtags for a given query from best-hashtags.com.
-    Returns a list of unique hashtags.
+    Turns a search query into the slug used by best-hashtags.com (and as the cache key).
+    Returns "" if there is nothing to search for.
     """
-    if not query:
-        return []
+    # Sanitize query: take the first comma-separated part, then the first space-separated word
+    # best-hashtags.com generally only supports single-word slugs
+    if ',' in query:
+        query = query.split(',')[0]
 
-    try:
-        # Sanitize query: take the first comma-separated part, then the first space-separated word
-        # best-hashtags.com generally only supports single-word slugs
-        if ',' in query:
-            query = query.split(',')[0]
-        
-        query = query.strip().split()[0]
-        
-        # Encode the query (e.g. "social media" -> "social+media" - actually checking above, we know it fails often with +, so single word is safer)
-        encoded_query = urllib.parse.quote_plus(query.strip())
-        url = f"https://best-hashtags.com/hashtag/{encoded_query}/"
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, "html.parser")
-        
-        hashtags = []
-        
-        # Strategy 1: Look for the specific copy-paste blocks usually found on this site
-        # They often have a class like 'tag-box' or just lists inside text areas
-        # Inspecting the typical structure of best-hashtags.com:
-        # It usually lists hashtags in paragraph tags or specific div containers.
-        # Let's try to find text content that looks like a list of hashtags.
-        
-        # Based on previous reading: "Top 10 marketing hashtags" -> list of links
-        # The content was: #marketing - 43% + #business - 8% ...
-        
-        # Let's extract from the text content of the page where we see "#"
-        # A more robust way given the HTML structure is usually looking for specific elements.
-        # But since I don't have the full HTML, I'll use a regex-like approach on the text specific sections 
-        # or look for the 'p1', 'p2' classes usually used there if I recall correctly, 
-        # OR just find all words starting with # in the main content area.
-        
-        # Let's try to target the easy-to-copy lists often present.
-        # Example structure: <div class="col-md-12"> <p class="1"> #marketing #business ... </p> </div>
-        
-        # Fallback generic extraction:
-        content_divs = soup.find_all('div', class_='col-sm-12') # Common container
-        
-        for div in content_divs:
-            text = div.get_text()
-            words = text.split()
-            for word in words:
-                if word.startswith('#') and len(word) > 2 and word not in hashtags:
-                     # Clean punctuation
-                    clean_tag = word.strip(".,!?:;\"'()[]{}")
-                    if clean_tag.startswith('#'):
-                        hashtags.append(clean_tag)
-                        if len(hashtags) >= 20: # Limit to top 20
-                            break
-            if len(hashtags) >= 20:
+    words = query.strip().split()
+    if not words:
+        return ""
+    return words[0].lstrip("#").lower()
+
+
+def normalize_slugs(query, max_slugs=MAX_SLUGS):
+    """
+    One slug per comma-separated term ("food, sandwiches, snacks" -> 3 slugs),
+    de-duplicated and capped at max_slugs.
+    """
+    slugs = []
+    for term in query.split(','):
+        slug = normalize_slug(term)
+        if slug and slug not in slugs:
+            slugs.append(slug)
+            if len(slugs) >= max_slugs:
                 break
-                
-        # If specific container didn't yield enough, generic search on page:
-        if len(hashtags) < 5:
-             all_text = soup.get_text()
-             words = all_text.split()
-             for word in words:
-                 if word.startswith('#') and len(word) > 2 and word not in hashtags:
-                     clean_tag = word.strip(".,!?:;\"'()[]{}")
-                     if clean_tag.startswith('#') and clean_tag.lower() != '#hashtags':
-                         hashtags.append(clean_tag)
-                         if len(hashtags) >= 20:
-                             break
-
-        return hashtags
+    return slugs
+
+
+def _container_texts_lxml(html):
+    doc = lxml_html.fromstring(html)
+    containers = [" ".join(div.itertext()) for div in doc.xpath(CONTAINER_XPATH)]
+    return containers, lambda: " ".join(doc.xpath(PAGE_TEXT_XPATH))
+
+
+def _container_texts_bs4(html):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # Only the tag containers are turned into a tree
+    strainer = SoupStrainer("div", class_=CONTAINER_CLASS_PATTERN)
+    soup = BeautifulSoup(html, "html.parser", parse_only=strainer)
+    containers = [div.get_text(" ") for div in soup.find_all("div", class_="col-sm-12")]
+    return containers, lambda: BeautifulSoup(html, "html.parser").get_text(" ")
+
+
+def _collect_hashtags(texts, hashtags):
+    for text in texts:
+        for tag in HASHTAG_PATTERN.findall(text):
+            if tag.lower() != "#hashtags":
+                hashtags[tag] = None  # dict keeps first-seen order, no duplicates
+                if len(hashtags) >= MAX_HASHTAGS:
+                    return
+
+
+def extract_hashtags(html):
+    """
+    Extracts up to 20 unique hashtags from a best-hashtags.com page.
+    Tags come from the "col-sm-12" containers; the whole page is only
+    scanned if those yield fewer than 5.
+    """
+    if not html:
+        return []
+
+    if lxml_html is not None:
+        containers, page_text = _container_texts_lxml(html)
+    else:
+        containers, page_text = _container_texts_bs4(html)
+
+    hashtags = {}
+    _collect_hashtags(containers, hashtags)
+
+    # If specific container didn't yield enough, generic search on page:
+    if len(hashtags) < MIN_CONTAINER_HASHTAGS:
+        _collect_hashtags([page_text()], hashtags)
+
+    return list(hashtags)
+
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def _host_semaphore(host):
+    with _host_semaphores_lock:
+        return _host_semaphores.setdefault(host, threading.BoundedSemaphore(HOST_CONCURRENCY))
+
+
+def fetch_hashtags(slug):
+    """
+    Fetches and parses the hashtag page for a slug.
+    Raises HashtagNotFound on a 404, other request errors as-is.
+    """
+    # Encode the query (e.g. "social media" -> "social+media" - actually checking above, we know it fails often with +, so single word is safer)
+    encoded_query = urllib.parse.quote_plus(slug)
+    url = f"{BASE_URL}/hashtag/{encoded_query}/"
+
+    with _host_semaphore(urllib.parse.urlsplit(url).netloc):
+        response = http_client.get(url, headers=HEADERS, timeout=10)
+    if response.status_code == 404:
+        raise HashtagNotFound(slug)
+    response.raise_for_status()
 
+    return extract_hashtags(response.content)
+
+
+class HashtagCache:
+    """
+    Slug -> hashtags cache: an in-process LRU in front of a SQLite store.
+    Stale entries are returned immediately while a background thread
+    refreshes them; 404s are cached as empty results.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl=DEFAULT_TTL_SECONDS,
+                 stale_ttl=DEFAULT_STALE_TTL_SECONDS, negative_ttl=DEFAULT_NEGATIVE_TTL_SECONDS,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES, fetch=fetch_hashtags):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.negative_ttl = negative_ttl
+        self.memory_entries = memory_entries
+        self.fetch = fetch
+        self._memory = OrderedDict()  # slug -> (tags, not_found, fetched_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS hashtag_cache (
+                    slug TEXT PRIMARY KEY,
+                    tags TEXT NOT NULL,
+                    not_found INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _remember(self, slug, entry):
+        with self._lock:
+            self._memory[slug] = entry
+            self._memory.move_to_end(slug)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, slug):
+        with self._lock:
+            entry = self._memory.get(slug)
+            if entry is not None:
+                self._memory.move_to_end(slug)
+                return entry
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT tags, not_found, fetched_at FROM hashtag_cache WHERE slug = ?", (slug,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = (json.loads(row[0]), bool(row[1]), row[2])
+        self._remember(slug, entry)
+        return entry
+
+    def _store(self, slug, tags, not_found):
+        entry = (tags, not_found, time.time())
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO hashtag_cache (slug, tags, not_found, fetched_at) VALUES (?, ?, ?, ?)",
+                (slug, json.dumps(tags), int(not_found), entry[2])
+            )
+            conn.execute(
+                "DELETE FROM hashtag_cache WHERE (not_found = 0 AND fetched_at < ?) OR (not_found = 1 AND fetched_at < ?)",
+                (entry[2] - self.stale_ttl, entry[2] - self.negative_ttl)
+            )
+        self._remember(slug, entry)
+
+    def _fetch_and_store(self, slug):
+        """
+        Fetches a slug and caches the result. Transient errors are not cached.
+        """
+        try:
+            tags = self.fetch(slug)
+        except HashtagNotFound:
+            print(f"⚠️ No hashtag page for '{slug}', caching the miss.")
+            self._store(slug, [], True)
+            return []
+        self._store(slug, tags, False)
+        return tags
+
+    def _refresh_in_background(self, slug):
+        with self._lock:
+            if slug in self._refreshing:
+                return
+            self._refreshing.add(slug)
+
+        def _refresh():
+            try:
+                self._fetch_and_store(slug)
+            except Exception as e:
+                print(f"⚠️ Background hashtag refresh failed for '{slug}': {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(slug)
+
+        threading.Thread(target=_refresh, name=f"hashtag-refresh-{slug}", daemon=True).start()
+
+    def get(self, slug):
+        """
+        Returns the hashtags for a normalized slug, fetching only on a miss
+        (or once an entry is too old to serve stale).
+        """
+        entry = None
+        try:
+            entry = self._lookup(slug)
+        except Exception as e:
+            print(f"⚠️ Hashtag cache unavailable: {e}")
+
+        if entry is not None:
+            tags, not_found, fetched_at = entry
+            age = time.time() - fetched_at
+            if not_found:
+                if age < self.negative_ttl:
+                    return []
+            elif age < self.ttl:
+                return tags
+            elif age < self.stale_ttl:
+                self._refresh_in_background(slug)
+                return tags
+
+        try:
+            return self._fetch_and_store(slug)
+        except sqlite3.Error as e:
+            print(f"⚠️ Failed to store hashtags in cache: {e}")
+            return self.fetch(slug)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_hashtag_cache():
+    """
+    Returns the process-wide HashtagCache, creating it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HashtagCache()
+        return _cache
+
+
+def merge_hashtags(rankings, limit=MAX_HASHTAGS):
+    """
+    Merges per-slug hashtag lists into one ranking. A tag scores more the
+    more lists it appears in and the higher it ranks in each; ties keep
+    first-seen order.
+    """
+    scores = {}
+    spelling = {}
+    for tags in rankings:
+        for position, tag in enumerate(tags):
+            key = tag.lower()
+            spelling.setdefault(key, tag)
+            scores[key] = scores.get(key, 0.0) + 1.0 - position / (len(tags) + 1)
+
+    ranked = sorted(scores, key=lambda key: -scores[key])  # stable: first-seen order on ties
+    return [spelling[key] for key in ranked[:limit]]
+
+
+def _cached_hashtags(slug):
+    try:
+        with tracing.span("hashtags.slug", slug=slug):
+            return get_hashtag_cache().get(slug)
+    except HashtagNotFound:
+        return []
     except Exception as e:
-        print(f"Error scraping hashtags for '{query}': {e}")
+        print(f"Error scraping hashtags for '{slug}': {e}")
         return []
+
+
+def scrape_hashtags(query, all_slugs=False):
+    """
+    Scrapes hashtags for a given query from best-hashtags.com.
+    Returns a list of unique hashtags. Results are cached per slug.
+
+    By default only the first term of the query is scraped. With
+    all_slugs=True every comma-separated term is scraped concurrently
+    and the results are merged (see merge_hashtags).
+    """
+    if not query:
+        return []
+
+    slugs = normalize_slugs(query, max_slugs=MAX_SLUGS if all_slugs else 1)
+    if not slugs:
+        return []
+    if len(slugs) == 1:
+        return _cached_hashtags(slugs[0])
+
+    with ThreadPoolExecutor(max_workers=len(slugs), thread_name_prefix="hashtags") as executor:
+        futures = [tracing.submit(executor, _cached_hashtags, slug) for slug in slugs]
+        rankings = [future.result() for future in futures]
+    return merge_hashtags(rankings)
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+import urllib.parse
+
+import tracing
+
+LatencyHistogram = tracing.LatencyHistogram
+LATENCY_BUCKETS = tracing.LATENCY_BUCKETS
+
+# Defaults for every outbound call (seconds); pass timeout= to override
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+DEFAULT_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+DEFAULT_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+# Retries apply to idempotent methods only (GET, HEAD, PUT, DELETE, ...),
+# never to POST, with exponential backoff plus random jitter
+DEFAULT_RETRIES = int(os.environ.get("HTTP_RETRIES", 3))
+BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+BACKOFF_JITTER = float(os.environ.get("HTTP_BACKOFF_JITTER", 0.5))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Keep-alive connections kept per host
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+
+_sessions = {}
+_histograms = {}
+_lock = threading.Lock()
+
+
+def _create_session(retries):
+    # requests/urllib3 are loaded with the first session, not at server start
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(host):
+    """
+    Returns the pooled keep-alive session for a host ("api.linkedin.com").
+    Sessions are created once per process and are safe to share between threads.
+    """
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+
+    with _lock:
+        if host not in _sessions:
+            _sessions[host] = _create_session(DEFAULT_RETRIES)
+        return _sessions[host]
+
+
+def _histogram(host):
+    histogram = _histograms.get(host)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(host, LatencyHistogram())
+    return histogram
+
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Sends a request through the host's pooled session (drop-in for
+    requests.request) and records its latency, retries included.
+    """
+    host = urllib.parse.urlsplit(url).netloc
+    with tracing.span("http", method=method, host=host) as span:
+        started = time.perf_counter()
+        try:
+            response = get_session(host).request(method, url, timeout=timeout, **kwargs)
+        except Exception:
+            _histogram(host).observe(time.perf_counter() - started, error=True)
+            raise
+        _histogram(host).observe(time.perf_counter() - started, error=response.status_code >= 500)
+        span.set(status=response.status_code)
+        return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def latency_stats():
+    """
+    Returns {host: histogram snapshot} for every host called so far.
+    """
+    with _lock:
+        histograms = dict(_histograms)
+    return {host: histogram.snapshot() for host, histogram in histograms.items()}
+
+
+tracing.register_histograms("http_client", "host", latency_stats, "Outbound HTTP latency per host, retries included")
+
+
+def close_sessions():
+    """
+    Closes every pooled session (used on shutdown and in tests).
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,149 @@
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.utils import safe_join
+
+# Widths a derivative can be resized to; requests are rounded up to the next one
+# so the number of cached variants per image stays small
+WIDTHS = (160, 320, 640, 1280)
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", "image/avif", {"quality": 60, "speed": 8}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True}),
+    "png": ("PNG", "image/png", {"optimize": True})
+}
+SOURCE_FORMATS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp", ".avif": "avif"}
+
+# Derivatives live in this subdirectory of the uploads folder, outside the
+# image store's eviction budget; they are removed with their original
+DERIVED_DIR = "derived"
+
+# Derivatives are rendered off the request thread; a request waits at most
+# DERIVATIVE_WAIT seconds and otherwise gets the original (the derivative
+# is ready for the next request)
+DERIVATIVE_WORKERS = int(os.environ.get("DERIVATIVE_WORKERS", 2))
+DERIVATIVE_WAIT_SECONDS = float(os.environ.get("DERIVATIVE_WAIT", 2))
+
+_executor = ThreadPoolExecutor(max_workers=DERIVATIVE_WORKERS, thread_name_prefix="derivatives")
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def _supported(fmt):
+    from PIL import features
+    return fmt in ("jpeg", "png") or features.check(fmt)
+
+
+def choose_variant(filename, width=None, fmt=None, accept=""):
+    """
+    Picks (width, format) for a request, or None to serve the original.
+    width is rounded up to one of WIDTHS; without an explicit format the
+    best one the client Accepts is used (AVIF, then WebP).
+    """
+    source_fmt = SOURCE_FORMATS.get(os.path.splitext(filename)[1].lower())
+    if source_fmt is None:
+        return None
+
+    if width:
+        width = next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+    if fmt not in FORMATS:
+        fmt = None
+        for candidate in ("avif", "webp"):
+            if f"image/{candidate}" in accept and _supported(candidate):
+                fmt = candidate
+                break
+    elif not _supported(fmt):
+        fmt = None
+    fmt = fmt or source_fmt
+
+    if not width and fmt == source_fmt:
+        return None
+    return width, fmt
+
+
+def derivative_name(filename, width, fmt):
+    """
+    generated_<key>.png -> generated_<key>__w320.webp (full width: __full)
+    """
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}__{'w' + str(width) if width else 'full'}.{fmt}"
+
+
+def derived_dir(root):
+    """
+    Directory the derivatives of files in root are cached in.
+    """
+    return os.path.join(root, DERIVED_DIR)
+
+
+def remove_derivatives(root, filename):
+    """
+    Deletes every cached derivative of filename (e.g. when it is evicted).
+    """
+    stem = glob.escape(os.path.splitext(filename)[0])
+    for path in glob.glob(os.path.join(derived_dir(root), f"{stem}__*")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _render(source_path, target_path, width, fmt):
+    from PIL import Image, ImageOps
+
+    pil_format, _, options = FORMATS[fmt]
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if width and img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = f"{target_path}.{threading.get_ident()}.tmp"
+        img.save(tmp_path, pil_format, **options)
+        os.replace(tmp_path, target_path)
+
+
+def get_derivative(root, filename, width, fmt, immutable=False, wait=DERIVATIVE_WAIT_SECONDS):
+    """
+    Returns the derivative's filename (in derived_dir(root)), rendering it
+    in the worker pool on first request. Returns None if it isn't ready within `wait`
+    seconds or can't be rendered - the caller then serves the original.
+    Derivatives of mutable files are re-rendered when the original changes.
+    """
+    source_path = safe_join(root, filename)
+    name = derivative_name(filename, width, fmt)
+    target_path = safe_join(derived_dir(root), name)
+    if source_path is None or target_path is None or not os.path.isfile(source_path):
+        return None
+
+    try:
+        if os.path.exists(target_path) and (immutable or os.path.getmtime(target_path) >= os.path.getmtime(source_path)):
+            return name
+    except OSError:
+        pass
+
+    with _lock:
+        future = _in_flight.get(target_path)
+        if future is None:
+            future = _executor.submit(_render, source_path, target_path, width, fmt)
+            _in_flight[target_path] = future
+            future.add_done_callback(lambda _: _forget(target_path))
+
+    try:
+        future.result(timeout=wait)
+        return name
+    except TimeoutError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Failed to render {name}: {e}")
+        return None
+
+
+def _forget(target_path):
+    with _lock:
+        _in_flight.pop(target_path, None)
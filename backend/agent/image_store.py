@@ -0,0 +1,192 @@
+import glob
+import hashlib
+import os
+import threading
+import time
+
+from image_derivatives import remove_derivatives
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.join(BASE_DIR, "uploads")
+
+# Total size of generated images kept on disk before the least recently
+# used ones are deleted (uploaded drafts are never evicted)
+DEFAULT_MAX_BYTES = int(os.environ.get("IMAGE_STORE_MAX_BYTES", 500 * 1024 * 1024))
+
+FILE_PREFIX = "generated_"
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+    "image/gif": ".gif"
+}
+IMAGE_EXTENSIONS = set(EXTENSIONS.values())
+
+# Serving a generated image marks it as recently used at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+
+def _is_image(path):
+    # Skips anything else matching the prefix, e.g. a half-written temp file
+    return os.path.splitext(path)[1] in IMAGE_EXTENSIONS
+
+
+def image_key(prompt, model):
+    """
+    Content-addressed key: the same prompt and model always map to the same file.
+    """
+    return hashlib.sha256(f"{model}\n{prompt.strip()}".encode("utf-8")).hexdigest()
+
+
+class ImageStore:
+    """
+    Stores generated images as generated_<key>.<ext> in the uploads folder,
+    keyed by image_key(prompt, model). A repeated prompt returns the stored
+    file without calling the image API. Files are written as the raw bytes
+    the API returned and evicted LRU once the store exceeds max_bytes.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, prompt, model):
+        """
+        Returns the stored filename for prompt/model, or None.
+        """
+        pattern = os.path.join(self.root, f"{FILE_PREFIX}{image_key(prompt, model)}.*")
+        matches = [path for path in glob.glob(pattern) if _is_image(path)]
+        if not matches:
+            return None
+        try:
+            os.utime(matches[0])  # mark as recently used
+        except OSError:
+            return None
+        return os.path.basename(matches[0])
+
+    def put(self, prompt, model, data, mime_type="image/png"):
+        """
+        Writes the image bytes and returns the stored filename.
+        """
+        filename = f"{FILE_PREFIX}{image_key(prompt, model)}{EXTENSIONS.get(mime_type, '.png')}"
+        path = os.path.join(self.root, filename)
+        # Hidden temp name, so concurrent get()/evict() globs never see it
+        tmp_path = os.path.join(self.root, f".{filename}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict(keep=filename)
+        return filename
+
+    def touch(self, filename):
+        """
+        Marks a served generated image as recently used, so LRU eviction
+        follows what is being served and not just what was looked up.
+        Throttled to one mtime update per TOUCH_INTERVAL_SECONDS.
+        """
+        if os.path.basename(filename) != filename or not filename.startswith(FILE_PREFIX):
+            return
+        path = os.path.join(self.root, filename)
+        try:
+            if time.time() - os.path.getmtime(path) >= TOUCH_INTERVAL_SECONDS:
+                os.utime(path)
+        except OSError:
+            pass
+
+    def get_or_create(self, prompt, model, generate):
+        """
+        Returns (filename, cached). On a miss generate(prompt) -> (bytes, mime_type)
+        or None is called once, even if the same prompt arrives concurrently.
+        Returns (None, False) if generation failed.
+        """
+        key = image_key(prompt, model)
+        with self._key_lock(key):
+            filename = self.get(prompt, model)
+            if filename:
+                return filename, True
+
+            result = generate(prompt)
+            if not result:
+                return None, False
+            data, mime_type = result
+            return self.put(prompt, model, data, mime_type), False
+
+    def get_or_create_many(self, prompt, model, count, generate_many):
+        """
+        Returns [(filename, cached), ...] for `count` variants of one prompt.
+        Variant 0 is the same file get_or_create() uses; the others are
+        stored as model#1, model#2, ... Missing variants are generated
+        together with generate_many(prompt, n) -> [(bytes, mime_type), ...],
+        called again while it returns fewer than asked (API batch limit).
+        Entries are (None, False) where generation came up short.
+        """
+        variants = [model] + [f"{model}#{i}" for i in range(1, count)]
+        with self._key_lock(image_key(prompt, model)):
+            results = [(self.get(prompt, variant), True) for variant in variants]
+            missing = [i for i, (filename, _) in enumerate(results) if not filename]
+            while missing:
+                images = generate_many(prompt, len(missing))
+                if not images:
+                    break
+                for i, (data, mime_type) in zip(missing, images):
+                    results[i] = (self.put(prompt, variants[i], data, mime_type), False)
+                missing = missing[len(images):]
+            for i in missing:
+                results[i] = (None, False)
+        return results
+
+    def evict(self, keep=None):
+        """
+        Deletes the least recently used generated images until the store
+        fits in max_bytes, along with their resized/re-encoded derivatives.
+        Derivatives live in their own directory and don't count towards
+        max_bytes.
+        """
+        if not self.max_bytes:
+            return
+
+        with self._lock:
+            files = []
+            for path in glob.glob(os.path.join(self.root, f"{FILE_PREFIX}*")):
+                if not _is_image(path):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if os.path.basename(path) == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
+                remove_derivatives(self.root, os.path.basename(path))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_image_store():
+    """
+    Returns the process-wide ImageStore, creating it on first use.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
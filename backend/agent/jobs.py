@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(BASE_DIR, "state")
+DEFAULT_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(STATE_DIR, "jobs.sqlite3"))
+
+# Worker threads per job kind, e.g. JOB_LIMITS="analyze=2,campaign=2,image=4".
+# Each kind gets its own pool so an image burst can't starve analysis.
+DEFAULT_LIMITS = {"analyze": 2, "campaign": 2, "image": 4}
+# Max queued + running jobs per kind before new submissions are rejected
+DEFAULT_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 50))
+# Finished jobs are kept this long (seconds) for polling
+DEFAULT_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION", 24 * 60 * 60))
+
+
+class QueueFullError(Exception):
+    """Raised when a job kind already has too many pending jobs."""
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _parse_limits(value):
+    limits = dict(DEFAULT_LIMITS)
+    for item in (value or "").split(","):
+        if "=" in item:
+            kind, workers = item.split("=", 1)
+            limits[kind.strip()] = int(workers)
+    return limits
+
+
+class JobManager:
+    """
+    Runs long requests on bounded background executors (one per job kind)
+    and records their status/results in a SQLite job table.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, limits=None,
+                 max_pending=DEFAULT_MAX_PENDING, retention=DEFAULT_RETENTION_SECONDS):
+        self.db_path = db_path
+        self.limits = limits or _parse_limits(os.environ.get("JOB_LIMITS"))
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executors = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner_pid INTEGER
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner_pid" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+
+            # Jobs left over from a process that is gone will never finish.
+            # Other live workers sharing the database keep theirs; our own
+            # pid can only appear here from an earlier process that reused it.
+            owners = conn.execute(
+                "SELECT DISTINCT owner_pid FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            for (pid,) in owners:
+                if pid is None or pid == os.getpid() or not _pid_alive(pid):
+                    self._fail_unfinished(conn, pid, "Interrupted by server restart")
+
+    def _fail_unfinished(self, conn, pid, error):
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+            "WHERE status IN ('queued', 'running') AND owner_pid IS ?",
+            (error, time.time(), pid)
+        )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _executor(self, kind):
+        if kind not in self._executors:
+            self._executors[kind] = ThreadPoolExecutor(
+                max_workers=self.limits.get(kind, 1),
+                thread_name_prefix=f"job-{kind}"
+            )
+        return self._executors[kind]
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queues fn(*args, **kwargs) and returns the job id immediately.
+        fn's return value must be JSON-serialisable.
+        Raises QueueFullError if the kind already has max_pending jobs.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._lock:
+            if self._pending.get(kind, 0) >= self.max_pending:
+                raise QueueFullError(f"Too many pending '{kind}' jobs, try again later")
+            self._pending[kind] = self._pending.get(kind, 0) + 1
+            executor = self._executor(kind)
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, status, created_at, owner_pid) VALUES (?, ?, 'queued', ?, ?)",
+                    (job_id, kind, now, os.getpid())
+                )
+                if self.retention:
+                    conn.execute(
+                        "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                        (now - self.retention,)
+                    )
+            # The job keeps the submitting request's ID in its spans
+            tracing.submit(executor, self._run, job_id, kind, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending[kind] -= 1
+            raise
+        return job_id
+
+    def _run(self, job_id, kind, fn, args, kwargs):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                    (time.time(), job_id)
+                )
+            with tracing.span(f"job.{kind}", job_id=job_id) as span:
+                try:
+                    result = fn(*args, **kwargs)
+                    status, result_json, error = "succeeded", json.dumps(result), None
+                except Exception as e:
+                    print(f"❌ Job {job_id} ({kind}) failed: {e}")
+                    span.error = type(e).__name__
+                    status, result_json, error = "failed", None, str(e)
+
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (status, result_json, error, time.time(), job_id)
+                )
+        finally:
+            with self._lock:
+                self._pending[kind] -= 1
+
+    def ping(self):
+        """Raises if the job database can't be read (used by the readiness probe)."""
+        with self._connect() as conn:
+            conn.execute("SELECT 1 FROM jobs LIMIT 1").fetchall()
+
+    def get(self, job_id):
+        """
+        Returns the job as a dict, or None if it doesn't exist.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, result, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job_id, kind, status, result, error, created_at, started_at, finished_at = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at
+        }
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """
+        Stops the executors. With wait, running jobs are allowed to finish
+        and whatever this process leaves unfinished (e.g. queued jobs dropped
+        by cancel_pending) is marked failed so pollers don't wait forever.
+        """
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+        if wait:
+            with self._connect() as conn:
+                self._fail_unfinished(conn, os.getpid(), "Interrupted by server shutdown")
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """
+    Returns the process-wide JobManager, creating it on first use.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
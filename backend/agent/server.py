@@ -1,12 +1,25 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from agent_core import run_analysis, analyze_draft
+from agent_core import run_analysis, iter_analysis_events, analyze_draft
 from campaign_agent import generate_campaign_schedule
 from tools.linkedin_tool import post_to_linkedin
-from tools.image_gen import generate_image
+from tools.image_gen import generate_image_bytes, generate_images_bytes, IMAGEN_MODEL
+from genai_clients import warm_up, close_clients
+from jobs import get_job_manager, QueueFullError
+from image_store import get_image_store, FILE_PREFIX
+from image_derivatives import FORMATS, choose_variant, derived_dir, get_derivative
+import tracing
+from usage import get_request_usage, start_request_usage
+from state_store import get_state_store
+import http_client
 from dotenv import load_dotenv
 import os
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from werkzeug.utils import secure_filename
+from flask import send_from_directory
 
 load_dotenv() # Load env vars from .env
 
@@ -18,6 +31,32 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 CORS(app)  # Enable CORS for all routes
 
+# Open the Gemini connection pool at startup so the first request is warm.
+# Set GENAI_WARMUP=0 to skip (e.g. offline tests).
+if os.environ.get("GENAI_WARMUP", "1") != "0":
+    warm_up()
+
+@app.before_request
+def start_trace():
+    # Reuse the caller's X-Request-ID so traces join up across services
+    g.request_id = tracing.start_request(request.headers.get('X-Request-ID'))
+    start_request_usage(request.endpoint)
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def finish_trace(response):
+    response.headers['X-Request-ID'] = g.request_id
+    # Streamed responses are timed until their headers are sent
+    tracing.record(f"request.{request.endpoint or 'unknown'}", time.perf_counter() - g.request_started,
+                   error=str(response.status_code) if response.status_code >= 500 else None,
+                   method=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint: latency histograms and Gemini token counters."""
+    return Response(tracing.render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/analyze_draft', methods=['POST'])
 def analyze_draft_route():
     if 'image' not in request.files:
@@ -36,10 +75,61 @@ def analyze_draft_route():
         
         # Analyze
         result = analyze_draft(filepath, caption)
+        if _wants_usage(request.form):
+            result = _with_usage(result)
         
         # Optional: Clean up file after analysis? For now keep it.
         return jsonify(result)
 
+def _wants_async(data=None):
+    """
+    True if the client asked for a background job (?async=1 or {"async": true}).
+    """
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return bool((data or {}).get('async', False))
+
+def _wants_usage(data=None):
+    """
+    True if the client asked for the token usage block (?usage=1 or {"usage": true}).
+    """
+    if request.args.get('usage', '').lower() in ('1', 'true', 'yes'):
+        return True
+    value = (data or {}).get('usage', False)
+    return value.lower() in ('1', 'true', 'yes') if isinstance(value, str) else bool(value)
+
+def _with_usage(payload):
+    """Adds the current request's Gemini token usage and estimated cost."""
+    return {**payload, "usage": get_request_usage().to_dict()}
+
+def _respond(kind, fn, *args, run_async=False, include_usage=False):
+    """
+    Runs fn(*args) -> (payload, status) inline, or as a background job that
+    returns a job id immediately (poll GET /jobs/<id> for the result).
+    With include_usage the payload gets a "usage" block (token counts).
+    """
+    if not run_async:
+        payload, status = fn(*args)
+        return jsonify(_with_usage(payload) if include_usage else payload), status
+    
+    try:
+        job_id = get_job_manager().submit(kind, _job_result, fn, include_usage, *args)
+    except QueueFullError as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+    
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}"
+    }), 202
+
+def _job_result(fn, include_usage, *args):
+    payload, status = fn(*args)
+    return {"status_code": status, "response": _with_usage(payload) if include_usage else payload}
+
+def _generate_campaign(strategy, days, visual_description):
+    return generate_campaign_schedule(strategy, days, visual_description), 200
+
 @app.route('/generate_campaign', methods=['POST'])
 def generate_campaign():
     data = request.json
@@ -50,18 +140,18 @@ def generate_campaign():
     if not strategy:
         return jsonify({"success": False, "error": "No strategy provided"}), 400
         
-    result = generate_campaign_schedule(strategy, days, visual_description)
-    return jsonify(result)
+    return _respond('campaign', _generate_campaign, strategy, days, visual_description,
+                    run_async=_wants_async(data), include_usage=_wants_usage(data))
 
 @app.route('/post_update', methods=['POST'])
 def post_update():
     data = request.json
     text = data.get('text')
     
-    # Use global state for token/urn
-    # In production, receive this from frontend (localStorage)
-    access_token = APP_STATE["linkedin_access_token"]
-    urn = APP_STATE["linkedin_urn"]
+    # Token/urn stored by /auth/callback (shared across workers)
+    linkedin = get_state_store().get(LINKEDIN_STATE_KEY, {})
+    access_token = linkedin.get("access_token")
+    urn = linkedin.get("urn")
     
     if not access_token:
          return jsonify({"success": False, "error": "Not connected to LinkedIn"}), 401
@@ -71,6 +161,28 @@ def post_update():
 
 
 
+def _upload_url(filename):
+    return f"http://127.0.0.1:5000/uploads/{filename}"
+
+def _generate_image_for_post(prompt):
+    try:
+        # Same prompt + model -> same file, no API call
+        filename, cached = get_image_store().get_or_create(prompt, IMAGEN_MODEL, generate_image_bytes)
+        
+        if filename:
+            # Return URL (served by the /uploads route below)
+            return {
+                "success": True, 
+                "image_url": _upload_url(filename),
+                "cached": cached
+            }, 200
+        else:
+            return {"success": False, "error": "Image generation failed"}, 500
+
+    except Exception as e:
+        print(f"Gen Error: {e}")
+        return {"success": False, "error": str(e)}, 500
+
 @app.route('/generate_image_for_post', methods=['POST'])
 def generate_image_route():
     data = request.json
@@ -79,62 +191,184 @@ def generate_image_route():
     if not prompt:
         return jsonify({"success": False, "error": "No prompt provided"}), 400
         
-    try:
-        # Generate PIL Image
-        img = generate_image(prompt)
-        
-        if img:
-            # Save to uploads
-            import uuid
-            filename = f"generated_{uuid.uuid4().hex}.png"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            img.save(filepath)
+    return _respond('image', _generate_image_for_post, prompt, run_async=_wants_async(data))
+
+# Prompt groups generated in parallel by /generate_campaign_images
+IMAGE_BATCH_CONCURRENCY = int(os.environ.get("IMAGE_BATCH_CONCURRENCY", 4))
+
+def _iter_campaign_images(posts):
+    """
+    Generates the image for every campaign day and yields (post index, result)
+    per day as soon as it is ready. Days sharing an image prompt are generated
+    together in one sampleCount request; distinct prompts run in parallel
+    (at most IMAGE_BATCH_CONCURRENCY at a time).
+    """
+    groups = {}  # prompt -> [(post index, day), ...]
+    for index, post in enumerate(posts):
+        day = post.get('day', index + 1)
+        prompt = (post.get('image_prompt') or '').strip()
+        if not prompt:
+            yield index, {"day": day, "success": False, "error": "No image_prompt"}
+            continue
+        groups.setdefault(prompt, []).append((index, day))
+    
+    if not groups:
+        return
+    
+    store = get_image_store()
+    with ThreadPoolExecutor(max_workers=min(IMAGE_BATCH_CONCURRENCY, len(groups))) as executor:
+        futures = {
+            tracing.submit(executor, store.get_or_create_many, prompt, IMAGEN_MODEL, len(days), generate_images_bytes): prompt
+            for prompt, days in groups.items()
+        }
+        for future in as_completed(futures):
+            prompt = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Gen Error: {e}")
+                results = [(None, False)] * len(groups[prompt])
             
-            # Return URL (assuming static file serving needs setup or just direct use)
-            # For this simple flask setup, we need a route to serve uploads or just return local path for now?
-            # Actually, standard flask doesn't serve 'uploads' by default unless configured.
-            # We will add a route to serve these files or use a data URI if small. 
-            # Let's return a relative URL and add a static route.
-            return jsonify({
-                "success": True, 
-                "image_url": f"http://127.0.0.1:5000/uploads/{filename}"
-            })
-        else:
-            return jsonify({"success": False, "error": "Image generation failed"}), 500
+            for (index, day), (filename, cached) in zip(groups[prompt], results):
+                if filename:
+                    yield index, {"day": day, "prompt": prompt, "success": True,
+                                  "image_url": _upload_url(filename), "cached": cached}
+                else:
+                    yield index, {"day": day, "prompt": prompt, "success": False,
+                                  "error": "Image generation failed"}
 
-    except Exception as e:
-        print(f"Gen Error: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+def _generate_campaign_images(posts):
+    started = time.perf_counter()
+    # Back in post order (two posts may share a day)
+    images = [image for _, image in sorted(_iter_campaign_images(posts), key=lambda item: item[0])]
+    return {
+        "success": any(image["success"] for image in images),
+        "images": images,
+        "seconds": time.perf_counter() - started
+    }, 200
+
+@app.route('/generate_campaign_images', methods=['POST'])
+def generate_campaign_images():
+    """
+    Generates every day's image for a campaign (the list returned by
+    /generate_campaign, as {"campaign": [...]}).
+    With ?stream=1 (or Accept: text/event-stream) each day is pushed as an
+    "image" event as soon as it is ready, then "done"; otherwise all results
+    are returned together (or as a background job with async).
+    """
+    data = request.json or {}
+    posts = data.get('campaign')
+    
+    if not isinstance(posts, list) or not posts:
+        return jsonify({"success": False, "error": "No campaign provided"}), 400
+    
+    wants_stream = (request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+                    or 'text/event-stream' in request.headers.get('Accept', ''))
+    if not wants_stream:
+        return _respond('image', _generate_campaign_images, posts, run_async=_wants_async(data))
+    
+    def generate():
+        started = time.perf_counter()
+        succeeded = 0
+        try:
+            for _, image in _iter_campaign_images(posts):
+                succeeded += image["success"]
+                yield _sse("image", image)
+        except Exception as e:
+            print(f"Server Error: {e}")
+            yield _sse("error", {"error": str(e)})
+        yield _sse("done", {"total": len(posts), "succeeded": succeeded,
+                            "seconds": time.perf_counter() - started})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering (nginx)
+        }
+    )
+
+# Generated images are content-addressed (never change), so browsers may keep them
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+UPLOAD_MAX_AGE = int(os.environ.get("UPLOAD_MAX_AGE", 60 * 60))
 
 @app.route('/uploads/<filename>')
 def serve_upload(filename):
-    from flask import send_from_directory
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """
+    Streams a stored file with an ETag (conditional requests get a 304)
+    and a Cache-Control header.
+    ?w=320 serves a resized thumbnail and ?format=webp|avif|jpeg|png a
+    re-encoded copy; without ?format the best format in the Accept header
+    is used. Derivatives are cached in the uploads/derived folder.
+    """
+    immutable = filename.startswith(FILE_PREFIX)
+    directory, served, mimetype = app.config['UPLOAD_FOLDER'], filename, None
+    if immutable:
+        # Keeps frequently served images at the young end of the LRU
+        get_image_store().touch(filename)
+    
+    variant = choose_variant(
+        filename,
+        width=request.args.get('w', type=int),
+        fmt=request.args.get('format', '').lower() or None,
+        accept=request.headers.get('Accept', '')
+    )
+    if variant:
+        derived = get_derivative(app.config['UPLOAD_FOLDER'], filename, *variant, immutable=immutable)
+        if derived:
+            directory, served, mimetype = derived_dir(directory), derived, FORMATS[variant[1]][1]
+    
+    response = send_from_directory(
+        directory, served,
+        mimetype=mimetype,
+        etag=not immutable,
+        max_age=IMMUTABLE_MAX_AGE if immutable else UPLOAD_MAX_AGE
+    )
+    response.cache_control.public = True
+    if 'format' not in request.args:
+        response.vary.add('Accept')
+    if immutable:
+        # The content hash is in the name; the file's mtime is only LRU bookkeeping
+        response.set_etag(served[len(FILE_PREFIX):])
+        response.cache_control.immutable = True
+        response.make_conditional(request)
+    return response
 
 @app.route('/', methods=['GET'])
 def health_check():
     return jsonify({"status": "running", "message": "Backend Agent Server is up and running. Use POST /analyze to analyze data."})
 
-@app.route('/analyze', methods=['GET', 'POST'])
-def analyze():
+def _parse_analyze_request():
+    """
+    Reads url / no_cache from the query string (GET) or JSON body (POST)
+    and detects the platform. Returns (url, platform, no_cache).
+    """
     # Handle both GET (browser/query param) and POST (API/JSON)
     if request.method == 'GET':
         url = request.args.get('url')
+        no_cache = request.args.get('no_cache', '').lower() in ('1', 'true', 'yes')
     else:
         data = request.json or {}
         url = data.get('url')
+        no_cache = bool(data.get('no_cache', False))
     
     # Default to "demo" (local file) if no URL provided
     if not url:
         url = "demo"
     
-    print(f"Received request to analyze: {url} (Method: {request.method})")
-    
     # Detect platform
     platform = "linkedin"
     if url and "instagram" in url.lower():
         platform = "instagram"
     
+    return url, platform, no_cache
+
+def _sse(event, data):
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _analyze(platform, no_cache):
     # In a real production app, we would scrape the URL (LinkedIn/Instagram) here.
     # For this Hackathon implementation, we use the local 'linkedin_comments.json'
     # as our data source to demonstrate the Multi-Agent capabilities.
@@ -143,33 +377,82 @@ def analyze():
         # Run the agent logic
         # We assume linkedin_comments.json is in the same directory
         # In the future, 'url' could determine which file or scraper to use.
-        results = run_analysis("linkedin_comments.json", platform=platform)
+        # Pass no_cache=true to bypass the analysis cache and force a fresh run.
+        results = run_analysis("linkedin_comments.json", platform=platform, use_cache=not no_cache)
         
         if results.get("error"):
-            return jsonify({"success": False, "error": results["error"]}), 500
+            return {"success": False, "error": results["error"]}, 500
             
-        return jsonify({
+        return {
             "success": True,
             "data": {
                 "summary": "Analysis of LinkedIn comments for the campaign.",
                 "youth_insight": results["youth_analysis"],
                 "adult_insight": results["adult_analysis"],
                 "strategy": results["strategy"]
-            }
-        })
+            },
+            "timings": results.get("timings", {}),
+            "cached": results.get("cached", False)
+        }, 200
         
     except Exception as e:
         print(f"Server Error: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        return {"success": False, "error": str(e)}, 500
+
+@app.route('/analyze', methods=['GET', 'POST'])
+def analyze():
+    url, platform, no_cache = _parse_analyze_request()
+    data = request.json if request.method == 'POST' else None
+    
+    return _respond('analyze', _analyze, platform, no_cache,
+                    run_async=_wants_async(data), include_usage=_wants_usage(data))
+
+@app.route('/analyze/stream', methods=['GET', 'POST'])
+def analyze_stream():
+    """
+    Streaming variant of /analyze (text/event-stream).
+    Emits each audience analysis as soon as it arrives, the strategist
+    response chunk by chunk, and a final "done" event with timings
+    (and token usage with ?usage=1).
+    """
+    url, platform, no_cache = _parse_analyze_request()
+    include_usage = _wants_usage(request.json if request.method == 'POST' else None)
+    
+    def generate():
+        try:
+            for event, data in iter_analysis_events("linkedin_comments.json", platform=platform, use_cache=not no_cache):
+                if event == "done" and include_usage:
+                    data = _with_usage(data)
+                yield _sse(event, data)
+        except Exception as e:
+            print(f"Server Error: {e}")
+            yield _sse("error", {"error": str(e)})
+            yield _sse("done", {"timings": {}, "cached": False})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering (nginx)
+        }
+    )
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Status of a background job. Once finished, "result" holds the endpoint's
+    normal JSON response and its HTTP status code.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, "job": job})
 
 from auth_utils import get_linkedin_auth_url, exchange_code_for_token, get_user_info
 
-# --- Global Storage (For Demo Purposes) ---
-# In production, use a database or session
-APP_STATE = {
-    "linkedin_access_token": None,
-    "linkedin_urn": None
-}
+# LinkedIn connection ({"access_token", "urn"}), shared by every worker process
+LINKEDIN_STATE_KEY = "linkedin"
 
 @app.route('/auth/linkedin', methods=['GET'])
 def auth_linkedin():
@@ -194,9 +477,8 @@ def auth_callback():
         user_info = get_user_info(access_token)
         urn = f"urn:li:person:{user_info.get('sub')}"
         
-        # 3. Store in Memory
-        APP_STATE["linkedin_access_token"] = access_token
-        APP_STATE["linkedin_urn"] = urn
+        # 3. Store it where every worker can see it
+        get_state_store().set(LINKEDIN_STATE_KEY, {"access_token": access_token, "urn": urn})
         
         # 4. Redirect back to frontend (Dashboard)
         # Assuming frontend is on standard port, or just close window
@@ -209,12 +491,53 @@ def auth_callback():
 
 @app.route('/status', methods=['GET'])
 def get_status():
+    linkedin = get_state_store().get(LINKEDIN_STATE_KEY, {})
     return jsonify({
-        "linkedin_connected": APP_STATE["linkedin_access_token"] is not None,
-        "linkedin_urn": APP_STATE["linkedin_urn"]
+        "linkedin_connected": linkedin.get("access_token") is not None,
+        "linkedin_urn": linkedin.get("urn")
     })
 
+_shutting_down = threading.Event()
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness probe (unlike the / liveness check): 503 while shutting down
+    or if the shared state or job databases can't be reached.
+    """
+    checks = {}
+    for name, check in (("state_store", get_state_store().ping), ("jobs", get_job_manager().ping)):
+        try:
+            check()
+            checks[name] = "ok"
+        except Exception as e:
+            checks[name] = f"error: {e}"
+    if _shutting_down.is_set():
+        checks["shutdown"] = "in progress"
+    
+    is_ready = all(value == "ok" for value in checks.values())
+    return jsonify({"ready": is_ready, "checks": checks, "pid": os.getpid()}), 200 if is_ready else 503
+
+def shutdown_app(wait=True):
+    """
+    Graceful shutdown: fail readiness, let running jobs finish, then close
+    the Gemini clients, pooled HTTP sessions and the span log. Called by the
+    gunicorn worker_exit hook (see gunicorn.conf.py) and on exit of the dev server.
+    """
+    if _shutting_down.is_set():
+        return
+    _shutting_down.set()
+    print(f"⚠️ Worker {os.getpid()} shutting down...")
+    get_job_manager().shutdown(wait=wait)
+    close_clients()
+    http_client.close_sessions()
+    tracing.close_log()
+
 
 if __name__ == '__main__':
+    # Development server only; for production use gunicorn -c gunicorn.conf.py wsgi:app
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    try:
+        app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG') == '1')
+    finally:
+        shutdown_app()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini, Imagen, Pollinations and best-hashtags.com
+endpoints the agent calls, with configurable latency, error rate and token
+counts. Lets the whole server run (and be benchmarked) offline.
+
+Usage:
+    python standin_server.py --port 8765 --latency-ms 400 --token-ms 2 --error-rate 0.02
+
+Then start the agent server against it:
+    GENAI_BASE_URL=http://127.0.0.1:8765 IMAGEN_BASE_URL=http://127.0.0.1:8765 \\
+    POLLINATIONS_BASE_URL=http://127.0.0.1:8765 HASHTAG_BASE_URL=http://127.0.0.1:8765 \\
+    GEMINI_API_KEY=standin python server.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+FILLER_WORDS = (
+    "audience engagement strategy content growth brand community authentic "
+    "professional insight trend launch creative story value reach"
+).split()
+
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 300.0      # time to first byte of every model call
+    token_ms: float = 0.0          # extra time per output token (streamed between chunks)
+    jitter_ms: float = 50.0        # uniform +/- jitter on latency_ms
+    error_rate: float = 0.0        # fraction of model calls answered with error_status
+    error_status: int = 503
+    output_tokens: int = 400       # tokens in free-text answers
+    prompt_tokens: int = 0         # 0 = estimate from the request body (chars / 4)
+    stream_chunks: int = 8
+    image_latency_ms: float = 1500.0
+    image_size: int = 512
+
+
+def _png(seed, size):
+    from PIL import Image
+    color = tuple(hashlib.sha256(seed.encode()).digest()[:3])
+    buffer = BytesIO()
+    Image.new("RGB", (size, size), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _text_of(body):
+    """All text parts of a generateContent request (system instruction + contents)"""
+    texts = []
+    for content in [body.get("systemInstruction") or {}] + body.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                texts.append(part["text"])
+    return "\n".join(texts)
+
+
+def _canned_answer(body, output_tokens):
+    """
+    Picks a response shaped like what the calling prompt expects:
+    a campaign list, a draft prediction, or free text.
+    """
+    text = _text_of(body)
+    if '"image_prompt"' in text:
+        match = re.search(r"(\d+)\s+Days", text)
+        days = int(match.group(1)) if match else 5
+        return json.dumps([
+            {
+                "day": day,
+                "topic": f"Day {day} topic",
+                "content": " ".join(random.choices(FILLER_WORDS, k=40)),
+                "image_prompt": f"A bright product photo for day {day}"
+            }
+            for day in range(1, days + 1)
+        ])
+    if '"hashtag_search_query"' in text:
+        return json.dumps({
+            "summary": "A bright product shot.",
+            "predicted_engagement": {"score": 7, "justification": "Bright colors stand out."},
+            "age_group_reactions": {"youth": "Likes it.", "adult": "Finds it useful.", "senior": "Neutral."},
+            "optimization_tips": ["Add a call to action.", "Post in the morning.", "Crop tighter."],
+            "hashtags": ["#launch", "#product", "#brand"],
+            "hashtag_search_query": "marketing",
+            "tone_and_emotion": [{"label": "Inspirational", "score": 80}],
+            "virality_score": {"level": "Medium", "badge_text": "Trending", "justification": "Clear, bold visual"},
+            "visual_description": "A product on a bright background."
+        })
+    return " ".join(random.choices(FILLER_WORDS, k=output_tokens))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = StandInConfig()
+    stats = {}
+    stats_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _count(self, route):
+        with self.stats_lock:
+            self.stats[route] = self.stats.get(route, 0) + 1
+
+    def _sleep(self, ms):
+        jitter = random.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        time.sleep(max(0.0, ms + jitter) / 1000)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _send(self, status, payload, content_type="application/json"):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _fail(self):
+        """Simulated API error, at error_rate"""
+        if random.random() >= self.config.error_rate:
+            return False
+        self._count("error")
+        self._send(self.config.error_status, {"error": {
+            "code": self.config.error_status, "message": "Stand-in simulated error", "status": "UNAVAILABLE"
+        }})
+        return True
+
+    def _usage(self, body, output_tokens):
+        prompt_tokens = self.config.prompt_tokens or len(json.dumps(body)) // 4
+        usage = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens
+        }
+        if body.get("cachedContent"):
+            usage["cachedContentTokenCount"] = prompt_tokens
+        return usage
+
+    def _model_parts(self, body):
+        """A function call on the first turn of a tool-enabled chat, text otherwise"""
+        declarations = [
+            declaration
+            for tool in body.get("tools", [])
+            for declaration in tool.get("functionDeclarations", [])
+        ]
+        answered = any("functionResponse" in part for content in body.get("contents", []) for part in content.get("parts", []))
+        if declarations and not answered:
+            declaration = declarations[0]
+            schema = declaration.get("parameters") or declaration.get("parameters_json_schema") or declaration.get("parametersJsonSchema") or {}
+            args = {name: "linkedin_comments.json" for name in list(schema.get("properties", {}))[:1]}
+            return [{"functionCall": {"name": declaration["name"], "args": args}}], 20
+        text = _canned_answer(body, self.config.output_tokens)
+        return [{"text": text}], max(1, len(text) // 4)
+
+    def _candidate(self, parts):
+        return {"content": {"role": "model", "parts": parts}, "finishReason": "STOP", "index": 0}
+
+    def do_GET(self):
+        if self.path.startswith("/v1beta/models/"):
+            self._count("models.get")
+            model = self.path.split("/v1beta/")[1].split("?")[0]
+            return self._send(200, {"name": model, "displayName": model})
+        if self.path.startswith("/v1beta/cachedContents/"):
+            self._count("caches.get")
+            return self._send(200, {"name": self.path.split("/v1beta/")[1].split("?")[0]})
+        if self.path.startswith("/prompt/"):
+            self._count("pollinations")
+            self._sleep(self.config.image_latency_ms)
+            return self._send(200, _png(self.path, self.config.image_size), "image/png")
+        if self.path.startswith("/hashtag/"):
+            self._count("hashtags")
+            slug = self.path.strip("/").split("/")[-1]
+            tags = " ".join(f"#{slug}{suffix}" for suffix in ["", "tips", "daily", "life", "love", "goals"] + list(FILLER_WORDS))
+            return self._send(200, f'<html><body><div class="col-sm-12"><p1>{tags}</p1></div></body></html>'.encode(), "text/html")
+        self._send(404, {"error": {"code": 404, "message": f"No stand-in route for {self.path}"}})
+
+    def do_DELETE(self):
+        self._count("caches.delete")
+        self._send(200, {})
+
+    def do_POST(self):
+        body = self._body()
+        path = self.path.split("?")[0]
+
+        if path == "/v1beta/cachedContents":
+            self._count("caches.create")
+            return self._send(200, {
+                "name": f"cachedContents/{uuid.uuid4().hex[:12]}",
+                "model": body.get("model"),
+                "usageMetadata": {"totalTokenCount": len(json.dumps(body)) // 4}
+            })
+
+        if path.endswith(":predict"):
+            self._count("imagen")
+            self._sleep(self.config.image_latency_ms)
+            if self._fail():
+                return
+            prompt = body["instances"][0]["prompt"]
+            count = body.get("parameters", {}).get("sampleCount", 1)
+            return self._send(200, {"predictions": [
+                {"bytesBase64Encoded": base64.b64encode(_png(f"{prompt}#{i}", self.config.image_size)).decode(), "mimeType": "image/png"}
+                for i in range(count)
+            ]})
+
+        if path.endswith(":generateContent"):
+            self._count("generateContent")
+            parts, output_tokens = self._model_parts(body)
+            self._sleep(self.config.latency_ms + self.config.token_ms * output_tokens)
+            if self._fail():
+                return
+            return self._send(200, {
+                "candidates": [self._candidate(parts)],
+                "usageMetadata": self._usage(body, output_tokens),
+                "modelVersion": path.split("/models/")[1].split(":")[0]
+            })
+
+        if path.endswith(":streamGenerateContent"):
+            self._count("streamGenerateContent")
+            parts, output_tokens = self._model_parts(body)
+            self._sleep(self.config.latency_ms)
+            if self._fail():
+                return
+            self._stream(body, parts, output_tokens)
+            return
+
+        self._send(404, {"error": {"code": 404, "message": f"No stand-in route for {self.path}"}})
+
+    def _stream(self, body, parts, output_tokens):
+        text = parts[0].get("text", "")
+        chunks = max(1, self.config.stream_chunks)
+        size = max(1, -(-len(text) // chunks))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, max(len(text), 1), size):
+            if i:
+                time.sleep(self.config.token_ms * output_tokens / chunks / 1000)
+            chunk = {"candidates": [self._candidate([{"text": text[i:i + size]}])]}
+            if i + size >= len(text):
+                chunk["usageMetadata"] = self._usage(body, output_tokens)
+            self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+            self.wfile.flush()
+        self.close_connection = True
+
+
+def start_standin(config=None, host="127.0.0.1", port=0):
+    """
+    Starts the stand-in server in a daemon thread.
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    handler = type("ConfiguredStandInHandler", (StandInHandler,), {
+        "config": config or StandInConfig(),
+        "stats": {},
+        "stats_lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="standin-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini/Imagen APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Time to first byte of a model call")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Extra time per output token")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--output-tokens", type=int, default=400, help="Tokens in free-text answers")
+    parser.add_argument("--prompt-tokens", type=int, default=0, help="Reported prompt tokens (0 = estimate)")
+    parser.add_argument("--image-latency-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        latency_ms=args.latency_ms, token_ms=args.token_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_status=args.error_status,
+        output_tokens=args.output_tokens, prompt_tokens=args.prompt_tokens,
+        image_latency_ms=args.image_latency_ms
+    )
+    server, base_url = start_standin(config, args.host, args.port)
+    print(f"✅ Stand-in API listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
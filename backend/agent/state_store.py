@@ -0,0 +1,71 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(BASE_DIR, "state")
+DEFAULT_DB_PATH = os.environ.get("STATE_DB_PATH", os.path.join(STATE_DIR, "app_state.sqlite3"))
+
+
+class StateStore:
+    """
+    Small JSON key/value store in SQLite, shared by every worker process
+    on the host (e.g. the LinkedIn token set by /auth/callback).
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            # WAL lets readers in other workers proceed while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS app_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def get(self, key, default=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM app_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO app_state (key, value, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM app_state WHERE key = ?", (key,))
+
+    def ping(self):
+        """Raises if the database can't be read (used by the readiness probe)."""
+        with self._connect() as conn:
+            conn.execute("SELECT 1 FROM app_state LIMIT 1").fetchall()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """
+    Returns the process-wide StateStore, creating it on first use.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore()
+        return _store
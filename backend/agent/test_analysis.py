@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("GENAI_WARMUP", "0")
+
+import agent_core
+import analysis_cache
+
+
+class StubChat:
+    """One chat of StubClient: audience agents by message, the strategist streamed"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def send_message(self, message):
+        self.client.messages.append(message)
+        # The 30-50 agent's message names its age group
+        agent = "adult" if "30-50" in message else "youth"
+        self.client.calls.append((agent, time.perf_counter(), "start"))
+        behaviour = self.client.behaviours[agent]
+        time.sleep(self.client.delay)
+        self.client.calls.append((agent, time.perf_counter(), "end"))
+        if isinstance(behaviour, Exception):
+            raise behaviour
+        return SimpleNamespace(text=behaviour, function_calls=None, usage_metadata=None)
+
+    def send_message_stream(self, message):
+        behaviour = self.client.behaviours["strategist"]
+        if isinstance(behaviour, Exception):
+            raise behaviour
+        for word in behaviour.split(" "):
+            yield SimpleNamespace(text=word + " ", usage_metadata=None)
+
+
+class StubClient:
+    """Stands in for genai.Client: canned audience texts, failures as exceptions"""
+
+    def __init__(self, delay=0.0, **behaviours):
+        self.delay = delay
+        self.behaviours = {"youth": "Youth report", "adult": "Adult report", "strategist": "Post at noon"}
+        self.behaviours.update(behaviours)
+        self.calls = []
+        self.configs = []
+        self.messages = []
+        self.chats = SimpleNamespace(create=self.create_chat)
+
+    def create_chat(self, model, config):
+        self.configs.append(config)
+        return StubChat(self)
+
+
+class StubAnalysis:
+    """
+    Points agent_core at a StubClient with a throwaway analysis cache.
+    The cached comment context stays off unless a cached content name is given.
+    """
+
+    def __init__(self, client, cached_content=None):
+        self.client = client
+        self.cached_content = cached_content
+
+    def __enter__(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (agent_core.get_client, agent_core.CONTEXT_CACHE_ENABLED, agent_core.get_context_cache, analysis_cache._cache)
+        agent_core.get_client = lambda model: self.client
+        agent_core.CONTEXT_CACHE_ENABLED = self.cached_content is not None
+        agent_core.get_context_cache = lambda: SimpleNamespace(get_or_create=lambda client, model, path: self.cached_content)
+        analysis_cache._cache = analysis_cache.AnalysisCache(os.path.join(self.tmp_dir, "analysis.sqlite3"))
+        return self.client
+
+    def __exit__(self, *exc):
+        agent_core.get_client, agent_core.CONTEXT_CACHE_ENABLED, agent_core.get_context_cache, analysis_cache._cache = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+
+def _parse_sse(body):
+    """Splits an event-stream body into [(event, data)], checking the framing"""
+    assert body.endswith("\n\n")
+    events = []
+    for message in body[:-2].split("\n\n"):
+        event_line, data_line = message.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def _stream(client_app, **body):
+    response = client_app.post('/analyze/stream', json={"no_cache": True, **body})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    return _parse_sse(response.get_data(as_text=True))
+
+
+def test_analyze_stream_events():
+    """/analyze/stream: two audience events, strategy chunks, strategy, then done with timings"""
+    import server
+
+    with StubAnalysis(StubClient()):
+        events = _stream(server.app.test_client())
+
+    names = [event for event, _ in events]
+    assert sorted(names[:2]) == ["adult_analysis", "youth_analysis"]
+    assert names[2:-2] == ["strategy_chunk"] * 3
+    assert names[-2:] == ["strategy", "done"]
+
+    data = dict(events)
+    assert data["youth_analysis"]["text"] == "Youth report" and data["adult_analysis"]["text"] == "Adult report"
+    assert "".join(chunk["text"] for event, chunk in events if event == "strategy_chunk") == "Post at noon "
+    assert data["strategy"]["text"] == "Post at noon "
+    assert data["done"]["cached"] is False
+    assert {"youth", "adult", "audiences", "strategist", "total"} <= set(data["done"]["timings"])
+    print("  ✓ SSE event order and framing")
+
+
+def test_analyze_stream_errors():
+    """A failing audience agent or strategist ends the stream with error then done"""
+    import server
+
+    with StubAnalysis(StubClient(adult=Exception("503 UNAVAILABLE"))):
+        events = _stream(server.app.test_client())
+    names = [event for event, _ in events]
+    assert sorted(names[:2]) == ["adult_analysis", "youth_analysis"]
+    assert names[2:] == ["error", "done"]
+    assert dict(events)["adult_analysis"]["text"] == ""
+    assert "Missing analysis" in dict(events)["error"]["error"]
+
+    with StubAnalysis(StubClient(strategist=Exception("429 RESOURCE_EXHAUSTED"))):
+        events = _stream(server.app.test_client())
+    names = [event for event, _ in events]
+    assert names[2:] == ["error", "done"]
+    assert dict(events)["error"]["error"] == "429 RESOURCE_EXHAUSTED"
+    assert "strategist" in dict(events)["done"]["timings"]
+
+    # An exception escaping the pipeline still closes the stream properly
+    def broken_events(*args, **kwargs):
+        yield "youth_analysis", {"text": "Youth report", "seconds": 0.0}
+        raise RuntimeError("pipeline crashed")
+
+    saved = server.iter_analysis_events
+    try:
+        server.iter_analysis_events = broken_events
+        events = _stream(server.app.test_client())
+    finally:
+        server.iter_analysis_events = saved
+    assert events == [
+        ("youth_analysis", {"text": "Youth report", "seconds": 0.0}),
+        ("error", {"error": "pipeline crashed"}),
+        ("done", {"timings": {}, "cached": False})
+    ]
+    print("  ✓ SSE error events")
+
+
+def test_run_analysis_concurrent():
+    """The two audience agents overlap and the result matches the sequential path"""
+    with StubAnalysis(StubClient(delay=0.2)) as client:
+        concurrent = agent_core.run_analysis(concurrent=True, use_cache=False)
+        spans = {}
+        for agent, at, edge in client.calls:
+            spans.setdefault(agent, {})[edge] = at
+        assert spans["youth"]["start"] < spans["adult"]["end"] and spans["adult"]["start"] < spans["youth"]["end"]
+
+    with StubAnalysis(StubClient(delay=0.2)) as client:
+        sequential = agent_core.run_analysis(concurrent=False, use_cache=False)
+        assert [agent for agent, _, edge in client.calls if edge == "start"] == ["youth", "adult"]
+        assert sequential["timings"]["audiences"] >= 0.4
+    # Overlapping agents take about one agent's time, not two
+    assert concurrent["timings"]["audiences"] < sequential["timings"]["audiences"]
+
+    assert set(concurrent) == set(sequential)
+    for key in ("youth_analysis", "adult_analysis", "strategy", "cached"):
+        assert concurrent[key] == sequential[key]
+    assert concurrent["youth_analysis"] == "Youth report" and concurrent["strategy"] == "Post at noon "
+    for timings in (concurrent["timings"], sequential["timings"]):
+        assert {"youth", "adult", "audiences", "strategist", "total"} <= set(timings)
+        assert all(seconds >= 0 for seconds in timings.values())
+    print("  ✓ Concurrent audience agents")
+
+
+def test_run_analysis_agent_failure():
+    """One failing audience agent leaves the other's result intact"""
+    with StubAnalysis(StubClient(delay=0.05, youth=Exception("500 INTERNAL"))):
+        results = agent_core.run_analysis(concurrent=True, use_cache=False)
+    assert results["youth_analysis"] == ""
+    assert results["adult_analysis"] == "Adult report"
+    assert results["strategy"] == "" and "Missing analysis" in results["error"]
+    assert results["timings"]["youth"] >= 0.05 and results["timings"]["adult"] >= 0.05
+    print("  ✓ Agent failures are isolated")
+
+
+def test_cached_context_prompt_placement():
+    """Tool calls keep the prompt in system_instruction; CONTEXT_CACHE=1 moves it into the message"""
+    import context_cache
+
+    assert context_cache.CONTEXT_CACHE_ENABLED == (os.environ.get("CONTEXT_CACHE") == "1")
+    prompts = {agent_core.load_prompt("analyze_campaign.prompt"), agent_core.load_prompt("analyze_campaign_30_50.prompt")}
+
+    with StubAnalysis(StubClient()) as client:
+        agent_core.run_analysis(use_cache=False)
+    audience = client.configs[:2]
+    assert {config.system_instruction for config in audience} == prompts
+    assert all(config.tools and config.cached_content is None for config in audience)
+    assert all(message.startswith("Please load the comments") for message in client.messages)
+
+    with StubAnalysis(StubClient(), cached_content="cachedContents/comments") as client:
+        results = agent_core.run_analysis(use_cache=False)
+    audience = client.configs[:2]
+    assert all(config.cached_content == "cachedContents/comments" for config in audience)
+    assert all(config.system_instruction is None and not config.tools for config in audience)
+    assert {message.split("\n\nThe comments are provided above.")[0] for message in client.messages} == prompts
+    assert results["youth_analysis"] == "Youth report" and "context_cache" in results["timings"]
+    print("  ✓ Prompt placement with and without the cached comment context")
+
+
+if __name__ == "__main__":
+    test_analyze_stream_events()
+    test_analyze_stream_errors()
+    test_run_analysis_concurrent()
+    test_run_analysis_agent_failure()
+    test_cached_context_prompt_placement()
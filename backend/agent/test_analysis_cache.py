@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import time
+
+from analysis_cache import AnalysisCache, analysis_cache_key
+
+
+def _make_fixture_dir():
+    tmp_dir = tempfile.mkdtemp()
+    prompts_dir = os.path.join(tmp_dir, "prompts")
+    os.makedirs(prompts_dir)
+    with open(os.path.join(prompts_dir, "analyze_campaign.prompt"), "w") as f:
+        f.write("Analyze the comments.")
+    data_path = os.path.join(tmp_dir, "comments.json")
+    with open(data_path, "w") as f:
+        f.write('[{"commentary": "Great post"}]')
+    return tmp_dir, prompts_dir, data_path
+
+
+def test_cache_key_invalidation():
+    """Editing the data file or a prompt must produce a new key"""
+    tmp_dir, prompts_dir, data_path = _make_fixture_dir()
+    try:
+        key = analysis_cache_key(data_path, "linkedin", "gemini-2.5-flash", prompts_dir)
+        assert key == analysis_cache_key(data_path, "linkedin", "gemini-2.5-flash", prompts_dir)
+        assert key != analysis_cache_key(data_path, "instagram", "gemini-2.5-flash", prompts_dir)
+        assert key != analysis_cache_key(data_path, "linkedin", "gemini-2.5-pro", prompts_dir)
+
+        with open(os.path.join(prompts_dir, "analyze_campaign.prompt"), "a") as f:
+            f.write(" Be concise.")
+        prompt_key = analysis_cache_key(data_path, "linkedin", "gemini-2.5-flash", prompts_dir)
+        assert prompt_key != key
+
+        with open(data_path, "w") as f:
+            f.write('[{"commentary": "Great post!"}]')
+        assert analysis_cache_key(data_path, "linkedin", "gemini-2.5-flash", prompts_dir) != prompt_key
+        print("  ✓ Cache key changes with data, prompts, platform and model")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_cache_ttl_and_lru():
+    """Entries expire after the TTL and the least recently used entry is evicted"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        cache = AnalysisCache(os.path.join(tmp_dir, "cache.sqlite3"), ttl=3600, max_entries=2)
+        cache.set("a", {"strategy": "A"})
+        cache.set("b", {"strategy": "B"})
+        time.sleep(0.01)
+        assert cache.get("a") == {"strategy": "A"}  # "a" is now most recently used
+        cache.set("c", {"strategy": "C"})
+        assert cache.get("b") is None
+        assert cache.get("a") == {"strategy": "A"}
+        assert cache.get("c") == {"strategy": "C"}
+
+        expiring = AnalysisCache(os.path.join(tmp_dir, "expiring.sqlite3"), ttl=0.01)
+        expiring.set("a", {"strategy": "A"})
+        time.sleep(0.05)
+        assert expiring.get("a") is None
+        print("  ✓ TTL expiry and LRU eviction")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_cache_key_invalidation()
+    test_cache_ttl_and_lru()
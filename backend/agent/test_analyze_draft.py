@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+from PIL import Image
+
+import agent_core
+import analysis_cache
+import genai_clients
+from agent_core import DRAFT_MAX_EDGE, analyze_draft, preprocess_draft_image
+
+
+def _phone_photo(path):
+    """A 4000x3000 JPEG with EXIF orientation 6 (rotated 90°) and a GPS tag"""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x8825] = {1: "N"}
+    Image.effect_noise((4000, 3000), 40).convert("RGB").save(path, quality=95, exif=exif)
+
+
+def test_preprocess_draft_image():
+    """Drafts are rotated upright, capped at DRAFT_MAX_EDGE and stripped of EXIF"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "draft.jpg")
+        _phone_photo(path)
+        image_bytes, stats = preprocess_draft_image(path)
+
+        assert stats["original_size"] == [4000, 3000]
+        assert stats["sent_size"] == [DRAFT_MAX_EDGE * 3 // 4, DRAFT_MAX_EDGE]
+        assert stats["bytes_saved"] == stats["original_bytes"] - len(image_bytes) > 0
+
+        with open(os.path.join(tmp_dir, "sent.jpg"), "wb") as f:
+            f.write(image_bytes)
+        with Image.open(os.path.join(tmp_dir, "sent.jpg")) as sent:
+            assert sent.format == "JPEG"
+            assert not sent.getexif()
+        print("  ✓ Draft image preprocessing")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_draft_prediction_cache():
+    """The same draft + caption is answered from the cache"""
+    tmp_dir = tempfile.mkdtemp()
+    saved = (genai_clients._create_client, analysis_cache._draft_cache, agent_core.scrape_hashtags)
+    calls = []
+
+    def generate_content(model, contents, config):
+        calls.append(len(contents[0].inline_data.data))
+        return SimpleNamespace(text='{"summary": "Looks great", "hashtags": ["#launch"]}')
+
+    try:
+        genai_clients.close_clients()
+        genai_clients._create_client = lambda timeout_ms: SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+        analysis_cache._draft_cache = analysis_cache.AnalysisCache(os.path.join(tmp_dir, "drafts.sqlite3"))
+        agent_core.scrape_hashtags = lambda query, all_slugs=False: []
+
+        path = os.path.join(tmp_dir, "draft.jpg")
+        _phone_photo(path)
+        first = analyze_draft(path, "Launch day!")
+        second = analyze_draft(path, "Launch day! ")
+        third = analyze_draft(path, "Another caption")
+
+        assert first["success"] and not first["cached"]
+        assert second["cached"] and second["prediction"] == first["prediction"]
+        assert not third["cached"]
+        assert len(calls) == 2
+        assert set(first["timings"]) == {"preprocess", "model", "hashtags", "total"}
+        assert "model" not in second["timings"]
+        print("  ✓ Draft prediction cache")
+    finally:
+        genai_clients.close_clients()
+        genai_clients._create_client, analysis_cache._draft_cache, agent_core.scrape_hashtags = saved
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_preprocess_draft_image()
+    test_draft_prediction_cache()
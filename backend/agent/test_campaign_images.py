@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+
+import image_store
+from image_store import ImageStore
+from tools import image_gen
+
+
+def test_hedged_image_generation():
+    """A slow Imagen call is hedged with Pollinations; a failed one falls back"""
+    saved = (image_gen._imagen_images, image_gen._pollinations_images, image_gen.HEDGE_AFTER_SECONDS)
+    calls = []
+
+    def imagen(prompt, count):
+        calls.append("imagen")
+        time.sleep(0.5 if prompt == "slow" else 0.01)
+        return [] if prompt == "broken" else [(b"imagen", "image/png")] * count
+
+    def pollinations(prompt, count):
+        calls.append("pollinations")
+        return [(b"pollinations", "image/jpeg")] * count
+
+    try:
+        image_gen._imagen_images, image_gen._pollinations_images = imagen, pollinations
+        image_gen.HEDGE_AFTER_SECONDS = 0.1
+
+        assert image_gen.generate_images_bytes("fast", 2) == [(b"imagen", "image/png")] * 2
+        assert calls == ["imagen"]
+
+        started = time.perf_counter()
+        assert image_gen.generate_image_bytes("slow") == (b"pollinations", "image/jpeg")
+        assert time.perf_counter() - started < 0.4
+        assert image_gen.generate_image_bytes("broken") == (b"pollinations", "image/jpeg")
+        print("  ✓ Hedged and fallback image generation")
+    finally:
+        image_gen._imagen_images, image_gen._pollinations_images, image_gen.HEDGE_AFTER_SECONDS = saved
+
+
+def test_batched_variants():
+    """Days sharing a prompt are generated in sampleCount batches and stored as variants"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        batches = []
+
+        def generate_many(prompt, count):
+            batches.append(count)
+            return [(f"{prompt}-{len(batches)}-{i}".encode(), "image/png") for i in range(min(count, 4))]
+
+        store = ImageStore(tmp_dir)
+        results = store.get_or_create_many("a cat", "imagen", 6, generate_many)
+        assert batches == [6, 2]
+        assert len({filename for filename, _ in results}) == 6
+        assert not any(cached for _, cached in results)
+
+        # Variant 0 is shared with single-image requests
+        assert store.get_or_create("a cat", "imagen", lambda prompt: None) == (results[0][0], True)
+        assert store.get_or_create_many("a cat", "imagen", 2, generate_many) == [(f, True) for f, _ in results[:2]]
+        assert batches == [6, 2]
+        print("  ✓ Batched prompt variants")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_campaign_images_keep_post_order():
+    """Results come back in post order, even when several posts share a day"""
+    import server
+
+    tmp_dir = tempfile.mkdtemp()
+    saved = (image_store._store, server.generate_images_bytes)
+
+    def generate_many(prompt, count):
+        time.sleep(0.1 if prompt == "slow sunrise" else 0)  # finishes last
+        return [(f"{prompt}-{i}".encode(), "image/png") for i in range(count)]
+
+    try:
+        image_store._store = ImageStore(tmp_dir)
+        server.generate_images_bytes = generate_many
+        posts = [
+            {"day": 1, "image_prompt": "slow sunrise"},
+            {"day": 1, "image_prompt": "a cat"},
+            {"day": 2, "image_prompt": ""},
+            {"day": 1, "image_prompt": "slow sunrise"}
+        ]
+        result, status = server._generate_campaign_images(posts)
+        assert status == 200 and result["success"]
+        images = result["images"]
+        assert [image.get("prompt") for image in images] == ["slow sunrise", "a cat", None, "slow sunrise"]
+        assert [image["day"] for image in images] == [1, 1, 2, 1]
+        assert images[0]["image_url"] != images[3]["image_url"]
+        print("  ✓ Campaign images keep post order")
+    finally:
+        image_store._store, server.generate_images_bytes = saved
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_hedged_image_generation()
+    test_batched_variants()
+    test_campaign_images_keep_post_order()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+
+from tools.compact_comments import compact_comments, estimate_tokens
+from tools.load_json import load_compact_comments, load_linkedin_comments
+
+
+def _record(text, headline="Engineer", reactions=0):
+    return {
+        "id": "urn:li:comment:1",
+        "linkedinUrl": "https://www.linkedin.com/feed/update/1",
+        "commentary": text,
+        "createdAt": "2025-01-01T00:00:00Z",
+        "engagement": {"reactions": [{"type": "LIKE", "count": reactions}] if reactions else []},
+        "actor": {"type": "profile", "name": "Someone", "position": headline}
+    }
+
+
+def test_compact_comments():
+    """Records are projected, near-duplicates merged and large threads sampled"""
+    records = [
+        _record("Congrats team! 🎉", reactions=3),
+        _record("congrats team"),
+        _record("This is a game changer for our workflow")
+    ]
+    compacted = compact_comments(iter(records))
+    assert compacted["total_comments"] == 3
+    assert compacted["unique_comments"] == 2
+    assert not compacted["sampled"]
+    assert compacted["comments"][0] == {"text": "Congrats team! 🎉", "headline": "Engineer", "reactions": 3, "count": 2}
+
+    many = [_record(f"Comment number {i} about the launch") for i in range(500)]
+    sampled = compact_comments(many, token_budget=1000)
+    assert sampled["sampled"] and sampled["total_comments"] == 500
+    assert estimate_tokens(sampled["comments"]) <= 1000
+    assert sampled["comments"][0]["text"] == "Comment number 0 about the launch"
+    print("  ✓ Comment compaction, dedup and sampling")
+
+
+def test_emoji_only_comments():
+    """Emoji-only comments are kept (and deduplicated); only empty ones are dropped"""
+    records = [_record("🔥🔥🔥"), _record("💯"), _record("no cap 🔥"), _record(" 🔥🔥🔥 "), _record("   ")]
+    compacted = compact_comments(records)
+    assert compacted["total_comments"] == 5
+    assert compacted["unique_comments"] == 3
+    assert [c["text"] for c in compacted["comments"]] == ["🔥🔥🔥", "💯", "no cap 🔥"]
+    assert compacted["comments"][0]["count"] == 2
+    print("  ✓ Emoji-only comments survive compaction")
+
+
+def test_load_tools():
+    """load_linkedin_comments keeps returning the raw list; load_compact_comments compacts it"""
+    records = [_record("Congrats team! 🎉"), _record("congrats team"), _record("Great launch")]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "comments.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        assert load_linkedin_comments(path) == records
+        compacted = load_compact_comments(path)
+    assert compacted["total_comments"] == 3 and compacted["unique_comments"] == 2
+    print("  ✓ Raw and compacted comment loaders")
+
+
+if __name__ == "__main__":
+    test_compact_comments()
+    test_emoji_only_comments()
+    test_load_tools()
@@ -0,0 +1,158 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import context_cache
+from context_cache import CommentContextCache
+
+
+class StubCaches:
+    """Stands in for client.caches, counting uploads and deletions"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+        self.deleted = []
+        self.checked = []
+
+    def create(self, model, config):
+        if self.fail:
+            raise Exception("400 Cached content is too small")
+        time.sleep(0.05)  # let concurrent callers pile up on the lock
+        name = f"cachedContents/{len(self.created)}"
+        self.created.append((name, config.contents[0].parts[0].text))
+        return SimpleNamespace(name=name)
+
+    def get(self, name):
+        self.checked.append(name)
+        if name in self.deleted:
+            raise Exception(f"404 {name} not found")
+        return SimpleNamespace(name=name)
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+
+def _write_comments(path, texts):
+    with open(path, "w") as f:
+        json.dump([{"commentary": text, "actor": {"position": "Engineer"}} for text in texts], f)
+
+
+def test_context_cache_hits_and_misses():
+    """Both agents share one upload; new data or expiry triggers a new one"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        data_path = os.path.join(tmp_dir, "comments.json")
+        _write_comments(data_path, ["Great post", "Love this"])
+        client = SimpleNamespace(caches=StubCaches())
+        cache = CommentContextCache(ttl=3600, db_path=os.path.join(tmp_dir, "context.sqlite3"))
+
+        # Two audience agents asking at the same time -> one miss, one hit
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            names = list(executor.map(lambda _: cache.get_or_create(client, "gemini-2.5-flash", data_path), range(2)))
+        assert names == ["cachedContents/0", "cachedContents/0"]
+        assert cache.stats == {"hits": 1, "misses": 1, "errors": 0}
+        assert "Love this" in client.caches.created[0][1]
+
+        # A second analysis of the same file reuses it
+        assert cache.get_or_create(client, "gemini-2.5-flash", data_path) == "cachedContents/0"
+        assert cache.stats["hits"] == 2
+
+        # Edited data -> new cached context, old one deleted
+        _write_comments(data_path, ["Great post", "Love this", "Not for me"])
+        assert cache.get_or_create(client, "gemini-2.5-flash", data_path) == "cachedContents/1"
+        assert client.caches.deleted == ["cachedContents/0"]
+        assert cache.stats["misses"] == 2
+
+        # Expired context is re-created
+        short = CommentContextCache(ttl=context_cache.EXPIRY_MARGIN_SECONDS, db_path=os.path.join(tmp_dir, "short.sqlite3"))
+        short.get_or_create(client, "gemini-2.5-flash", data_path)
+        short.get_or_create(client, "gemini-2.5-flash", data_path)
+        assert short.stats == {"hits": 0, "misses": 2, "errors": 0}
+        print("  ✓ Context cache hit/miss accounting")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_context_cache_failure_falls_back():
+    """A refused upload returns None (tool fallback) and isn't retried right away"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        data_path = os.path.join(tmp_dir, "comments.json")
+        _write_comments(data_path, ["Great post"])
+        client = SimpleNamespace(caches=StubCaches(fail=True))
+        db_path = os.path.join(tmp_dir, "context.sqlite3")
+        cache = CommentContextCache(db_path=db_path)
+
+        assert cache.get_or_create(client, "gemini-2.5-flash", data_path) is None
+        assert cache.get_or_create(client, "gemini-2.5-flash", data_path) is None
+        assert cache.stats == {"hits": 0, "misses": 0, "errors": 1}
+        # Other workers don't retry the refused upload either
+        assert CommentContextCache(db_path=db_path).get_or_create(client, "gemini-2.5-flash", data_path) is None
+        assert len(client.caches.created) == 0 and client.caches.fail
+        print("  ✓ Context cache failure falls back to the tool call")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_context_cache_shared_between_workers():
+    """Workers sharing the SQLite registry upload a corpus once and re-validate each other's names"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        data_path = os.path.join(tmp_dir, "comments.json")
+        _write_comments(data_path, ["Great post", "Love this"])
+        db_path = os.path.join(tmp_dir, "context.sqlite3")
+        client = SimpleNamespace(caches=StubCaches())
+        workers = [CommentContextCache(ttl=3600, db_path=db_path) for _ in range(3)]
+
+        # Concurrent first requests in three workers -> one upload, the others wait for it
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            names = list(executor.map(lambda cache: cache.get_or_create(client, "gemini-2.5-flash", data_path), workers))
+        assert names == ["cachedContents/0"] * 3
+        assert len(client.caches.created) == 1
+        assert sum(cache.stats["misses"] for cache in workers) == 1
+        assert sum(cache.stats["hits"] for cache in workers) == 2
+        assert client.caches.checked == ["cachedContents/0"] * 2
+
+        # A name that is gone server-side is replaced, not handed out
+        client.caches.deleted.append("cachedContents/0")
+        late = CommentContextCache(ttl=3600, db_path=db_path)
+        assert late.get_or_create(client, "gemini-2.5-flash", data_path) == "cachedContents/1"
+        assert late.stats == {"hits": 0, "misses": 1, "errors": 0}
+        print("  ✓ Context cache shared across worker processes")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_context_cache_wait_is_short():
+    """A request waits only briefly for another worker's upload, then uses the tool call"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        data_path = os.path.join(tmp_dir, "comments.json")
+        _write_comments(data_path, ["Great post"])
+        db_path = os.path.join(tmp_dir, "context.sqlite3")
+        client = SimpleNamespace(caches=StubCaches())
+
+        # Another worker holds the upload claim and never finishes
+        uploader = CommentContextCache(db_path=db_path)
+        assert uploader._claim(context_cache.context_cache_key(data_path, "gemini-2.5-flash"))[0] == "claimed"
+
+        started = time.monotonic()
+        assert CommentContextCache(db_path=db_path).get_or_create(client, "gemini-2.5-flash", data_path) is None
+        waited = time.monotonic() - started
+        assert context_cache.UPLOAD_WAIT_SECONDS <= waited < context_cache.UPLOAD_WAIT_SECONDS + 1
+        assert context_cache.UPLOAD_WAIT_SECONDS <= 2 and client.caches.created == []
+        print(f"  ✓ Gave up on another worker's upload after {waited:.2f}s")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_context_cache_hits_and_misses()
+    test_context_cache_failure_falls_back()
+    test_context_cache_shared_between_workers()
+    test_context_cache_wait_is_short()
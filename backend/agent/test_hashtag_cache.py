@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import time
+
+from hashtag_scraper import HashtagCache, HashtagNotFound
+
+
+class StubFetcher:
+    """Stands in for fetch_hashtags, counting calls per slug"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, slug):
+        self.calls.append(slug)
+        if slug == "unknownslug":
+            raise HashtagNotFound(slug)
+        return [f"#{slug}", f"#{slug}{len(self.calls)}"]
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_hashtag_cache_ttl_and_stale():
+    """Fresh hits skip the fetch; stale hits are served while refreshing in the background"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        fetch = StubFetcher()
+        db_path = os.path.join(tmp_dir, "hashtags.sqlite3")
+        cache = HashtagCache(db_path, ttl=0.2, stale_ttl=3600, fetch=fetch)
+
+        assert cache.get("marketing") == ["#marketing", "#marketing1"]
+        assert cache.get("marketing") == ["#marketing", "#marketing1"]
+        assert fetch.calls == ["marketing"]
+
+        # A new process starts from the SQLite store
+        assert HashtagCache(db_path, ttl=3600, fetch=fetch).get("marketing") == ["#marketing", "#marketing1"]
+        assert fetch.calls == ["marketing"]
+
+        time.sleep(0.25)
+        assert cache.get("marketing") == ["#marketing", "#marketing1"]  # stale, served immediately
+        assert _wait_for(lambda: not cache._refreshing)
+        assert cache.get("marketing") == ["#marketing", "#marketing2"]
+        assert fetch.calls == ["marketing", "marketing"]
+        print("  ✓ Hashtag cache TTL and stale-while-revalidate")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_hashtag_cache_negative():
+    """404s are cached as empty results until the negative TTL expires"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        fetch = StubFetcher()
+        cache = HashtagCache(os.path.join(tmp_dir, "hashtags.sqlite3"), negative_ttl=0.2, fetch=fetch)
+
+        assert cache.get("unknownslug") == []
+        assert cache.get("unknownslug") == []
+        assert fetch.calls == ["unknownslug"]
+
+        time.sleep(0.25)
+        assert cache.get("unknownslug") == []
+        assert fetch.calls == ["unknownslug", "unknownslug"]
+        print("  ✓ Hashtag cache negative caching")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_hashtag_cache_ttl_and_stale()
+    test_hashtag_cache_negative()
@@ -0,0 +1,67 @@
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+import hashtag_scraper
+from hashtag_scraper import HashtagCache, extract_hashtags, merge_hashtags, normalize_slugs, scrape_hashtags
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hashtags")
+
+
+def test_extract_hashtags():
+    """Container tags win, page text is the fallback, both parsers agree"""
+    html = (
+        '<html><head><style>.a{color: #ffffff}</style></head><body>'
+        '<div class="row col-sm-12"><p>#marketing</p><p>#business.</p> #ai, url/#frag #business</div>'
+        '<div class="col-sm-12">#hashtags #sales #growth</div></body></html>'
+    )
+    assert extract_hashtags(html) == ["#marketing", "#business", "#ai", "#sales", "#growth"]
+    assert extract_hashtags("<style>p {color: #ffffff}</style><p>#one #two</p>") == ["#one", "#two"]
+    assert extract_hashtags("") == []
+
+    saved = hashtag_scraper.lxml_html
+    try:
+        for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+            with open(path, "rb") as f:
+                page = f.read()
+            fast = extract_hashtags(page)
+            hashtag_scraper.lxml_html = None
+            assert extract_hashtags(page) == fast
+            hashtag_scraper.lxml_html = saved
+            assert 0 < len(fast) <= hashtag_scraper.MAX_HASHTAGS
+    finally:
+        hashtag_scraper.lxml_html = saved
+    print("  ✓ Hashtag extraction")
+
+
+def test_multi_slug_fan_out():
+    """Every term is scraped concurrently and the rankings are merged"""
+    assert normalize_slugs("Food, sandwiches snacks, #food, , chips") == ["food", "sandwiches", "chips"]
+    assert merge_hashtags([["#food", "#yum", "#lunch"], ["#sandwich", "#Food"], ["#chips"]]) == \
+        ["#food", "#sandwich", "#chips", "#yum", "#lunch"]
+
+    def slow_fetch(slug):
+        time.sleep(0.3)
+        return [f"#{slug}", "#foodie"]
+
+    tmp_dir = tempfile.mkdtemp()
+    saved = hashtag_scraper._cache
+    try:
+        hashtag_scraper._cache = HashtagCache(os.path.join(tmp_dir, "hashtags.sqlite3"), fetch=slow_fetch)
+        started = time.perf_counter()
+        tags = scrape_hashtags("food, sandwiches, snacks", all_slugs=True)
+        elapsed = time.perf_counter() - started
+        assert tags == ["#foodie", "#food", "#sandwiches", "#snacks"]
+        assert elapsed < 0.6, elapsed  # close to one fetch, not three
+        assert scrape_hashtags("food, sandwiches, snacks") == ["#food", "#foodie"]
+    finally:
+        hashtag_scraper._cache = saved
+        shutil.rmtree(tmp_dir)
+    print("  ✓ Multi-slug fan-out and merged ranking")
+
+
+if __name__ == "__main__":
+    test_extract_hashtags()
+    test_multi_slug_fan_out()
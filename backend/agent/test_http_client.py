@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Fails the first request to each path with a 503, then succeeds"""
+
+    seen = set()
+    calls = []
+
+    def _reply(self):
+        FlakyHandler.calls.append((self.command, self.path))
+        status = 200 if self.path in FlakyHandler.seen else 503
+        FlakyHandler.seen.add(self.path)
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_client_pooling_and_retry():
+    """Idempotent calls retry, POSTs don't, sessions are pooled per host and latency is recorded"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"127.0.0.1:{server.server_port}"
+    try:
+        assert http_client.get_session(host) is http_client.get_session(host)
+
+        response = http_client.get(f"http://{host}/hashtags")
+        assert response.status_code == 200
+        assert FlakyHandler.calls == [("GET", "/hashtags"), ("GET", "/hashtags")]
+
+        assert http_client.post(f"http://{host}/token").status_code == 503
+        assert FlakyHandler.calls[2:] == [("POST", "/token")]
+
+        stats = http_client.latency_stats()[host]
+        assert stats["count"] == 2 and stats["errors"] == 1
+        assert stats["buckets"]["60.0"] == 2
+        print("  ✓ Pooled sessions, idempotent retry and latency histograms")
+    finally:
+        server.shutdown()
+        http_client.close_sessions()
+
+
+def test_single_module_copies():
+    """With the repo root on sys.path the scraper still shares http_client and tracing"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(base_dir)))
+    result = subprocess.run(
+        [sys.executable, "-c", "import tracing, http_client, hashtag_scraper; "
+         "print(http_client.tracing is tracing, hashtag_scraper.http_client is http_client, hashtag_scraper.tracing is tracing)"],
+        cwd=base_dir, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.stdout.split() == ["True", "True", "True"], result.stderr[-2000:]
+    print("  ✓ One copy of http_client and tracing per process")
+
+
+if __name__ == "__main__":
+    test_http_client_pooling_and_retry()
+    test_single_module_copies()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from image_derivatives import choose_variant, derivative_name, derived_dir, get_derivative
+from image_store import ImageStore
+
+
+def test_choose_variant():
+    """Width rounds up to a cached size; format follows ?format, then Accept"""
+    assert choose_variant("a.png") is None
+    assert choose_variant("a.png", width=300) == (320, "png")
+    assert choose_variant("a.png", width=5000) == (1280, "png")
+    assert choose_variant("a.png", accept="image/webp,*/*") == (None, "webp")
+    assert choose_variant("a.png", width=100, fmt="jpeg", accept="image/webp") == (160, "jpeg")
+    assert choose_variant("a.jpg", fmt="jpeg") is None
+    assert choose_variant("notes.txt", width=100) is None
+    print("  ✓ Variant negotiation")
+
+
+def test_get_derivative():
+    """Derivatives are rendered once, cached in the derived folder and refreshed when the original changes"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        Image.new("RGBA", (1000, 500), (255, 0, 0, 128)).save(os.path.join(tmp_dir, "draft.png"))
+
+        name = get_derivative(tmp_dir, "draft.png", 160, "jpeg")
+        assert name == derivative_name("draft.png", 160, "jpeg") == "draft__w160.jpeg"
+        path = os.path.join(derived_dir(tmp_dir), name)
+        assert not os.path.exists(os.path.join(tmp_dir, name))
+        with Image.open(path) as img:
+            assert img.format == "JPEG" and img.size == (160, 80)
+
+        rendered_at = os.path.getmtime(path)
+        assert get_derivative(tmp_dir, "draft.png", 160, "jpeg") == name
+        assert os.path.getmtime(path) == rendered_at
+
+        time.sleep(0.01)
+        Image.new("RGB", (400, 400)).save(os.path.join(tmp_dir, "draft.png"))
+        get_derivative(tmp_dir, "draft.png", 160, "jpeg")
+        with Image.open(path) as img:
+            assert img.size == (160, 160)
+
+        assert get_derivative(tmp_dir, "missing.png", 160, "jpeg") is None
+        assert get_derivative(tmp_dir, "../draft.png", 160, "jpeg") is None
+        print("  ✓ Derivative rendering and caching")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_derivatives_follow_eviction():
+    """Derivatives don't count towards the store budget and go away with their original"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        def png(color):
+            buffer = BytesIO()
+            Image.new("RGB", (600, 300), color).save(buffer, "PNG")
+            return buffer.getvalue()
+
+        first = png((255, 0, 0))
+        store = ImageStore(tmp_dir, max_bytes=len(first) * 2 + 100)
+        old = store.put("a cat", "imagen", first)
+        thumbnails = [get_derivative(tmp_dir, old, width, "webp", immutable=True) for width in (160, 320)]
+        assert all(thumbnails)
+
+        # The thumbnails don't count towards the budget...
+        store.max_bytes = len(first) + 10
+        store.evict()
+        assert os.path.exists(os.path.join(tmp_dir, old))
+        assert len(os.listdir(derived_dir(tmp_dir))) == 2
+
+        # ...which fits two originals
+        store.max_bytes = len(first) * 2 + 100
+        time.sleep(0.01)
+        kept = store.put("a dog", "imagen", png((0, 255, 0)))
+        assert sorted(os.listdir(tmp_dir)) == sorted(["derived", old, kept])
+
+        # Evicting the cat removes its thumbnails too
+        time.sleep(0.01)
+        newest = store.put("a fox", "imagen", png((0, 0, 255)))
+        assert not os.path.exists(os.path.join(tmp_dir, old))
+        assert os.listdir(derived_dir(tmp_dir)) == []
+        assert store.get("a dog", "imagen") == kept and store.get("a fox", "imagen") == newest
+        print("  ✓ Derivatives are outside the eviction budget and evicted with their original")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_choose_variant()
+    test_get_derivative()
+    test_derivatives_follow_eviction()
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import image_store
+from image_store import ImageStore, image_key
+
+
+def test_image_store_dedup_and_eviction():
+    """Repeated prompts hit the store once; old images are evicted past max_bytes"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        calls = []
+
+        def generate(prompt):
+            calls.append(prompt)
+            time.sleep(0.05)
+            return b"x" * 10, "image/png"
+
+        store = ImageStore(tmp_dir, max_bytes=25)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: store.get_or_create("a cat", "imagen", generate), range(4)))
+        assert calls == ["a cat"]
+        assert len({filename for filename, _ in results}) == 1
+        assert sorted(cached for _, cached in results) == [False, True, True, True]
+        assert store.get_or_create("a cat", "other-model", generate)[1] is False
+
+        # Draft uploads are never evicted
+        with open(os.path.join(tmp_dir, "draft.jpg"), "wb") as f:
+            f.write(b"y" * 100)
+        time.sleep(0.01)
+        store.get("a cat", "imagen")  # most recently used
+        store.get_or_create("a dog", "imagen", generate)
+        remaining = sorted(os.listdir(tmp_dir))
+        assert len(remaining) == 3 and "draft.jpg" in remaining
+        assert store.get("a cat", "imagen") and store.get("a dog", "imagen")
+        assert store.get("a cat", "other-model") is None
+
+        assert store.get_or_create("nothing", "imagen", lambda prompt: None) == (None, False)
+        print("  ✓ Image store dedup, single-flight and LRU eviction")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_image_store_ignores_temp_files():
+    """In-flight temp files are neither evicted nor returned by get()"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        store = ImageStore(tmp_dir, max_bytes=15)
+        key = image_key("a cat", "imagen")
+        temp_path = os.path.join(tmp_dir, f"generated_{key}.png.1234.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(b"t" * 100)
+        assert store.get("a cat", "imagen") is None
+
+        store.put("a dog", "imagen", b"x" * 10)
+        store.put("a fox", "imagen", b"x" * 10)
+        assert os.path.exists(temp_path)
+        # put() writes through a hidden temp name and leaves nothing behind
+        assert sorted(os.listdir(tmp_dir)) == sorted([os.path.basename(temp_path), store.get("a fox", "imagen")])
+        print("  ✓ Image store skips temp files")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_serving_marks_images_used():
+    """Serving /uploads/generated_* bumps the LRU mtime, at most once per interval"""
+    import server
+
+    tmp_dir = tempfile.mkdtemp()
+    saved = (image_store._store, server.app.config['UPLOAD_FOLDER'])
+    try:
+        image_store._store = ImageStore(tmp_dir)
+        server.app.config['UPLOAD_FOLDER'] = tmp_dir
+        filename = image_store._store.put("a cat", "imagen", b"x" * 10)
+        path = os.path.join(tmp_dir, filename)
+        long_ago = time.time() - image_store.TOUCH_INTERVAL_SECONDS - 60
+        os.utime(path, (long_ago, long_ago))
+
+        assert server.app.test_client().get(f'/uploads/{filename}').status_code == 200
+        touched = os.path.getmtime(path)
+        assert touched > long_ago + 60
+
+        # Within the interval the file isn't touched again
+        recent = time.time() - 5
+        os.utime(path, (recent, recent))
+        server.app.test_client().get(f'/uploads/{filename}')
+        assert os.path.getmtime(path) == recent
+        print("  ✓ Served images are marked as recently used")
+    finally:
+        image_store._store, server.app.config['UPLOAD_FOLDER'] = saved
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_image_store_dedup_and_eviction()
+    test_image_store_ignores_temp_files()
+    test_serving_marks_images_used()
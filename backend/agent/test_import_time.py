@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cold import budget for server.py (milliseconds, as measured by -X importtime)
+IMPORT_BUDGET_MS = float(os.environ.get("SERVER_IMPORT_BUDGET_MS", 1000))
+
+# Loaded on first use only, never while the server starts
+DEFERRED_MODULES = ("google.genai", "google.generativeai", "PIL", "bs4", "lxml", "requests")
+
+
+def _import_times(module):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+    Returns {module name: cumulative microseconds}.
+    """
+    env = dict(os.environ, GENAI_WARMUP="0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_server_import_time():
+    """server.py starts without loading the model SDKs, PIL or the scraper stack"""
+    times = _import_times("server")
+
+    loaded = [name for name in times if name.startswith(DEFERRED_MODULES)]
+    assert not loaded, f"imported at startup: {sorted(loaded)[:10]}"
+
+    server_ms = times["server"] / 1000
+    assert server_ms < IMPORT_BUDGET_MS, f"import server took {server_ms:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)"
+    print(f"  ✓ import server: {server_ms:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)")
+
+
+if __name__ == "__main__":
+    test_server_import_time()
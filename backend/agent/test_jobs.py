@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("GENAI_WARMUP", "0")
+
+import jobs
+from jobs import JobManager, QueueFullError
+
+
+def _wait_for(manager, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {manager.get(job_id)['status']}")
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+def test_job_lifecycle():
+    """Jobs go queued -> running -> succeeded/failed, with timestamps and results"""
+    tmp_dir = tempfile.mkdtemp()
+    manager = JobManager(os.path.join(tmp_dir, "jobs.sqlite3"), limits={"analyze": 1})
+    release = threading.Event()
+    try:
+        first = manager.submit("analyze", lambda: release.wait(5) and {"text": "done"})
+        _wait_for(manager, first, ("running",))
+        second = manager.submit("analyze", lambda: {"text": "second"})
+        assert manager.get(second)["status"] == "queued"
+        assert manager.get(second)["started_at"] is None
+
+        release.set()
+        job = _wait_for(manager, first, ("succeeded",))
+        assert job["result"] == {"text": "done"} and job["error"] is None
+        assert job["created_at"] <= job["started_at"] <= job["finished_at"]
+        assert _wait_for(manager, second, ("succeeded",))["result"] == {"text": "second"}
+
+        failed = _wait_for(manager, manager.submit("analyze", _fail), ("succeeded", "failed"))
+        assert failed["status"] == "failed" and failed["error"] == "boom" and failed["result"] is None
+        assert manager.get("no-such-job") is None
+        print("  ✓ Job status transitions")
+    finally:
+        release.set()
+        manager.shutdown()
+        shutil.rmtree(tmp_dir)
+
+
+def test_job_limits_and_queue_full():
+    """Each kind has its own pool and pending limit"""
+    tmp_dir = tempfile.mkdtemp()
+    manager = JobManager(os.path.join(tmp_dir, "jobs.sqlite3"), limits={"analyze": 1, "image": 2}, max_pending=2)
+    release = threading.Event()
+    try:
+        blocked = manager.submit("analyze", lambda: release.wait(5) and "analysis")
+        _wait_for(manager, blocked, ("running",))
+        queued = manager.submit("analyze", lambda: "analysis")
+        try:
+            manager.submit("analyze", lambda: "analysis")
+            assert False, "expected QueueFullError"
+        except QueueFullError:
+            pass
+
+        # A stuck analysis neither blocks nor uses up the image pool
+        images = [manager.submit("image", lambda: "image") for _ in range(2)]
+        for job_id in images:
+            assert _wait_for(manager, job_id, ("succeeded",))["result"] == "image"
+        assert manager.get(blocked)["status"] == "running"
+        assert manager.get(queued)["status"] == "queued"
+
+        release.set()
+        _wait_for(manager, queued, ("succeeded",))
+        # Finished jobs free their slots
+        assert _wait_for(manager, manager.submit("analyze", lambda: "again"), ("succeeded",))["result"] == "again"
+        print("  ✓ Per-kind JOB_LIMITS and QueueFullError")
+    finally:
+        release.set()
+        manager.shutdown()
+        shutil.rmtree(tmp_dir)
+
+
+def test_job_retention():
+    """Finished jobs older than the retention window are removed on the next submit"""
+    tmp_dir = tempfile.mkdtemp()
+    manager = JobManager(os.path.join(tmp_dir, "jobs.sqlite3"), retention=60)
+    try:
+        now = time.time()
+        with manager._connect() as conn:
+            for job_id, finished_at in (("old", now - 120), ("recent", now - 10)):
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, status, created_at, finished_at) "
+                    "VALUES (?, 'image', 'succeeded', ?, ?)",
+                    (job_id, finished_at, finished_at)
+                )
+
+        _wait_for(manager, manager.submit("image", lambda: "image"), ("succeeded",))
+        assert manager.get("old") is None
+        assert manager.get("recent")["status"] == "succeeded"
+        print("  ✓ Job retention cleanup")
+    finally:
+        manager.shutdown()
+        shutil.rmtree(tmp_dir)
+
+
+def test_jobs_endpoint():
+    """async=1 returns 202 + job id, GET /jobs/<id> reports it, a full queue is a 503"""
+    import server
+
+    tmp_dir = tempfile.mkdtemp()
+    saved = (jobs._manager, server.generate_campaign_schedule)
+    release = threading.Event()
+    try:
+        jobs._manager = JobManager(os.path.join(tmp_dir, "jobs.sqlite3"), limits={"campaign": 1}, max_pending=1)
+        server.generate_campaign_schedule = lambda strategy, days, visual: release.wait(5) and {"days": days}
+        client = server.app.test_client()
+
+        response = client.post('/generate_campaign', json={"strategy": "Launch", "days": 3, "async": True})
+        assert response.status_code == 202
+        job_id = response.get_json()["job_id"]
+        assert response.get_json()["status_url"] == f"/jobs/{job_id}"
+
+        # The only slot is taken
+        response = client.post('/generate_campaign?async=1', json={"strategy": "Launch"})
+        assert response.status_code == 503 and not response.get_json()["success"]
+
+        release.set()
+        _wait_for(jobs._manager, job_id, ("succeeded",))
+        job = client.get(f'/jobs/{job_id}').get_json()["job"]
+        assert job["kind"] == "campaign" and job["status"] == "succeeded"
+        assert job["result"] == {"status_code": 200, "response": {"days": 3}}
+
+        response = client.get('/jobs/does-not-exist')
+        assert response.status_code == 404 and response.get_json() == {"success": False, "error": "Job not found"}
+        print("  ✓ /jobs/<id> and 503 on a full queue")
+    finally:
+        release.set()
+        jobs._manager.shutdown()
+        jobs._manager, server.generate_campaign_schedule = saved
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_job_lifecycle()
+    test_job_limits_and_queue_full()
+    test_job_retention()
+    test_jobs_endpoint()
@@ -0,0 +1,67 @@
+from google import genai
+from google.genai import errors, types
+
+from standin_server import StandInConfig, start_standin
+from tools import image_gen
+
+
+def _client(base_url):
+    return genai.Client(api_key="standin", http_options=types.HttpOptions(base_url=base_url))
+
+
+def test_standin_generate_content():
+    """The SDK talks to the stand-in: text, tool calls, streaming and usage metadata"""
+    server, base_url = start_standin(StandInConfig(latency_ms=0, jitter_ms=0, output_tokens=12))
+    try:
+        client = _client(base_url)
+        response = client.models.generate_content(model="gemini-2.5-flash", contents="Hello")
+        assert len(response.text.split()) == 12
+        assert response.usage_metadata.candidates_token_count > 0
+        assert response.usage_metadata.total_token_count > response.usage_metadata.candidates_token_count
+
+        def load_comments(file_path: str) -> dict:
+            """Loads comments"""
+            return {"comments": []}
+
+        chat = client.chats.create(model="gemini-2.5-flash", config=types.GenerateContentConfig(
+            tools=[load_comments],
+            automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+        ))
+        call = chat.send_message("Analyze").function_calls[0]
+        assert call.name == "load_comments" and call.args == {"file_path": "linkedin_comments.json"}
+
+        chunks = list(client.models.generate_content_stream(model="gemini-2.5-flash", contents="Hello"))
+        assert len("".join(chunk.text for chunk in chunks).split()) == 12
+        assert chunks[-1].usage_metadata.total_token_count > 0
+        print("  ✓ Stand-in generate_content, chat and streaming")
+    finally:
+        server.shutdown()
+
+
+def test_standin_imagen_and_errors():
+    """Imagen :predict returns sampleCount images; error_rate=1 fails every model call"""
+    server, base_url = start_standin(StandInConfig(latency_ms=0, jitter_ms=0, image_latency_ms=0, image_size=8))
+    saved = image_gen.IMAGEN_BASE_URL
+    try:
+        image_gen.IMAGEN_BASE_URL = base_url
+        images = image_gen._imagen_images("a cat", 3)
+        assert len(images) == 3 and len(set(images)) == 3
+        assert images[0][0].startswith(b"\x89PNG")
+
+        server.RequestHandlerClass.config.error_rate = 1.0
+        try:
+            client = _client(base_url)
+            client.models.generate_content(model="gemini-2.5-flash", contents="Hello")
+            assert False, "expected a server error"
+        except errors.ServerError as e:
+            assert e.code == 503
+        assert server.RequestHandlerClass.stats["error"] == 1
+        print("  ✓ Stand-in Imagen and simulated errors")
+    finally:
+        image_gen.IMAGEN_BASE_URL = saved
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_standin_generate_content()
+    test_standin_imagen_and_errors()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from jobs import JobManager
+from state_store import StateStore
+
+
+def test_state_store_shared():
+    """Values written by one store instance (worker) are seen by another"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "state.sqlite3")
+        worker_a, worker_b = StateStore(path), StateStore(path)
+        assert worker_b.get("linkedin", {}) == {}
+
+        worker_a.set("linkedin", {"access_token": "token", "urn": "urn:li:person:1"})
+        assert worker_b.get("linkedin") == {"access_token": "token", "urn": "urn:li:person:1"}
+
+        worker_b.delete("linkedin")
+        assert worker_a.get("linkedin") is None
+        worker_a.ping()
+        print("  ✓ Shared state store")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_jobs_survive_other_workers_starting():
+    """A starting worker only fails the unfinished jobs of dead processes"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "jobs.sqlite3")
+        live = JobManager(path)
+
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            with live._connect() as conn:
+                for job_id, pid in (("dead", dead.pid), ("other", other.pid), ("legacy", None)):
+                    conn.execute(
+                        "INSERT INTO jobs (id, kind, status, created_at, owner_pid) VALUES (?, 'image', 'running', ?, ?)",
+                        (job_id, time.time(), pid)
+                    )
+
+            JobManager(path)  # another worker booting
+            assert live.get("dead")["status"] == "failed"
+            assert live.get("legacy")["status"] == "failed"
+            assert live.get("other")["status"] == "running"
+        finally:
+            other.kill()
+            other.wait()
+
+        job_id = live.submit("image", lambda: {"ok": True})
+        live.shutdown(wait=True)
+        assert live.get(job_id)["status"] == "succeeded"
+        print("  ✓ Multi-worker job ownership")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_state_store_shared()
+    test_jobs_survive_other_workers_starting()
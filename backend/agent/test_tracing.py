@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+def _child():
+    with tracing.span("test.child"):
+        return tracing.get_request_id()
+
+
+def test_spans_and_request_ids():
+    """Spans nest, carry the request ID into worker threads and record failures"""
+    tmp_dir = tempfile.mkdtemp()
+    saved = tracing.TRACE_LOG
+    try:
+        tracing.TRACE_LOG = os.path.join(tmp_dir, "spans.jsonl")
+        request_id = tracing.start_request()
+
+        with tracing.span("test.parent") as parent:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                assert tracing.submit(executor, _child).result() == request_id
+            try:
+                with tracing.span("test.failing"):
+                    raise ValueError("boom")
+            except ValueError:
+                pass
+        tracing.close_log()
+
+        with open(tracing.TRACE_LOG) as f:
+            spans = {entry["span"]: entry for entry in map(json.loads, f)}
+        assert spans["test.parent"]["parent_id"] is None
+        assert spans["test.child"]["parent_id"] == parent.span_id
+        assert spans["test.failing"]["parent_id"] == parent.span_id
+        assert spans["test.failing"]["error"] == "ValueError"
+        assert {entry["request_id"] for entry in spans.values()} == {request_id}
+        assert tracing.span_stats()["test.failing"]["errors"] >= 1
+        print("  ✓ Spans, request IDs and the JSON span log")
+    finally:
+        tracing.close_log()
+        tracing.TRACE_LOG = saved
+        shutil.rmtree(tmp_dir)
+
+
+def test_render_metrics():
+    """/metrics output is valid Prometheus text with cumulative buckets"""
+    tracing.record("test.metrics", 0.2)
+    tracing.record("test.metrics", 3.0, error="Timeout")
+    text = tracing.render_metrics()
+
+    assert "# TYPE adsage_span_seconds histogram" in text
+    assert 'adsage_span_seconds_bucket{span="test.metrics",le="0.25"} 1' in text
+    assert 'adsage_span_seconds_bucket{span="test.metrics",le="+Inf"} 2' in text
+    assert 'adsage_span_errors_total{span="test.metrics"} 1' in text
+    print("  ✓ Prometheus metrics")
+
+
+if __name__ == "__main__":
+    test_spans_and_request_ids()
+    test_render_metrics()
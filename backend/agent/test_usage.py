@@ -0,0 +1,93 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from google import genai
+from google.genai import types
+
+import agent_core
+import tracing
+import usage
+from context_cache import CommentContextCache
+from standin_server import StandInConfig, start_standin
+from usage import estimate_cost, get_request_usage, record_usage, start_request_usage
+
+
+def _response(prompt, output, cached=None):
+    return SimpleNamespace(usage_metadata=SimpleNamespace(
+        prompt_token_count=prompt,
+        cached_content_token_count=cached,
+        candidates_token_count=output,
+        thoughts_token_count=None,
+        total_token_count=prompt + output
+    ))
+
+
+def test_request_usage():
+    """Usage is summed per request and agent, across worker threads"""
+    # Restored in the finally, so the request usage does not leak into later tests
+    token = usage._current.set(None)
+    try:
+        start_request_usage("test_endpoint")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                tracing.submit(executor, record_usage, _response(1000, 200, cached=800), "audience.18-30", "gemini-2.5-flash"),
+                tracing.submit(executor, record_usage, _response(1000, 300), "audience.30-50", "gemini-2.5-flash")
+            ]
+            [future.result() for future in futures]
+        assert record_usage(SimpleNamespace(text="no usage"), "strategist", "gemini-2.5-flash") is None
+        record_usage(_response(500, 100), "audience.30-50", "gemini-2.5-flash")
+
+        summary = get_request_usage().to_dict()
+        assert summary["calls"] == 3
+        assert summary["prompt_tokens"] == 2500 and summary["cached_tokens"] == 800
+        assert summary["output_tokens"] == 600 and summary["total_tokens"] == 3100
+        assert summary["agents"]["audience.30-50"]["calls"] == 2
+        assert summary["estimated_cost_usd"] == round(estimate_cost("gemini-2.5-flash", summary), 6) > 0
+
+        # Cached tokens are cheaper than fresh ones
+        assert estimate_cost("gemini-2.5-flash", {"prompt_tokens": 1000, "cached_tokens": 1000}) < \
+            estimate_cost("gemini-2.5-flash", {"prompt_tokens": 1000})
+        assert estimate_cost("unknown-model", {"prompt_tokens": 1000}) == 0.0
+
+        assert usage.usage_stats()[("test_endpoint", "audience.30-50", "gemini-2.5-flash")]["output_tokens"] >= 400
+        metrics = tracing.render_metrics()
+        assert 'adsage_genai_tokens_total{endpoint="test_endpoint",agent="audience.18-30",model="gemini-2.5-flash",type="cached"}' in metrics
+        print("  ✓ Per-request token usage and cost")
+    finally:
+        usage._current.reset(token)
+
+
+def test_tool_round_trip_usage():
+    """Every call of the audience tool round-trip and the cache upload is accounted"""
+    server, base_url = start_standin(StandInConfig(latency_ms=0, jitter_ms=0, output_tokens=12))
+    saved_cwd = os.getcwd()
+    token = usage._current.set(None)
+    try:
+        # The stand-in asks the tool for "linkedin_comments.json", relative to the agent directory
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        client = genai.Client(api_key="standin", http_options=types.HttpOptions(base_url=base_url))
+        start_request_usage("test_tools")
+
+        text, _ = agent_core._run_audience_agent(client, "18-30", "analyze_campaign.prompt", "Analyze the comments")
+        assert text
+        assert server.RequestHandlerClass.stats["generateContent"] == 2
+        agent = get_request_usage().to_dict()["agents"]["audience.18-30"]
+        assert agent["calls"] == 2 and agent["prompt_tokens"] > 0
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            CommentContextCache(ttl=60, db_path=os.path.join(tmp_dir, "context.sqlite3")).get_or_create(
+                client, "gemini-2.5-flash", "linkedin_comments.json")
+        uploaded = get_request_usage().to_dict()["agents"]["context_cache"]
+        assert uploaded["calls"] == 1 and uploaded["prompt_tokens"] == uploaded["total_tokens"] > 0
+        print("  ✓ Tool round-trip and cache upload usage")
+    finally:
+        usage._current.reset(token)
+        os.chdir(saved_cwd)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_request_usage()
+    test_tool_round_trip_usage()
@@ -0,0 +1,86 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, List
+
+# Prompt-token budget for the comment payload handed to the audience agents.
+# Above it, the unique comments are evenly sampled down to fit.
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("COMMENT_TOKEN_BUDGET", 8000))
+MAX_HEADLINE_CHARS = 120
+CHARS_PER_TOKEN = 4
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def estimate_tokens(value) -> int:
+    """
+    Rough token count (~4 characters per token) of a JSON-serialisable value.
+    """
+    return len(json.dumps(value, ensure_ascii=False)) // CHARS_PER_TOKEN + 1
+
+
+def project_comment(record: Dict) -> Dict:
+    """
+    Keeps only what the audience prompts use: the comment text, the author's
+    headline and the reaction count. Drops URLs, URNs, ids and timestamps.
+    """
+    text = record.get("commentary") or record.get("text") or ""
+    actor = record.get("actor") or {}
+    headline = (actor.get("position") or record.get("author_headline") or "").strip()
+
+    comment = {"text": text.strip()}
+    if headline:
+        comment["headline"] = headline[:MAX_HEADLINE_CHARS]
+
+    reactions = sum(r.get("count", 0) for r in (record.get("engagement") or {}).get("reactions", []))
+    if reactions:
+        comment["reactions"] = reactions
+    return comment
+
+
+def _dedup_key(text: str) -> str:
+    # Case, punctuation, emoji and whitespace differences don't make a comment unique.
+    # Emoji-only comments ("🔥🔥🔥") have no words left, so they are keyed by their raw text.
+    return _NON_WORD.sub(" ", text.lower()).strip() or text.strip()
+
+
+def compact_comments(records: Iterable[Dict], token_budget: int = DEFAULT_TOKEN_BUDGET) -> Dict:
+    """
+    Projects, de-duplicates and (above token_budget) samples comment records.
+    Consumes records lazily, so it can be fed straight from iter_linkedin_comments.
+
+    Returns a dict with the original totals, so agents can still report
+    total_comments, and the compacted "comments" list. Near-identical
+    comments are merged into one entry with a "count".
+    """
+    total = 0
+    unique: Dict[str, Dict] = {}
+
+    for record in records:
+        total += 1
+        comment = project_comment(record)
+        key = _dedup_key(comment["text"])
+        if not key:
+            continue
+        if key in unique:
+            unique[key]["count"] = unique[key].get("count", 1) + 1
+        else:
+            unique[key] = comment
+
+    comments: List[Dict] = list(unique.values())
+    sampled = False
+
+    if token_budget and comments and estimate_tokens(comments) > token_budget:
+        # Evenly spaced sample (keeps the thread's order and spread)
+        per_comment = estimate_tokens(comments) / len(comments)
+        keep = max(1, int(token_budget / per_comment))
+        step = len(comments) / keep
+        comments = [comments[int(i * step)] for i in range(keep)]
+        sampled = True
+
+    return {
+        "total_comments": total,
+        "unique_comments": len(unique),
+        "sampled": sampled,
+        "comments": comments
+    }
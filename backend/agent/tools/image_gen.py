@@ -1,70 +1,136 @@
-
 import os
-import google.generativeai as genai
+import base64
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 from dotenv import load_dotenv
+import http_client
+import tracing
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+# Hardcoded URL for the discovered working model
+IMAGEN_MODEL = "imagen-4.0-fast-generate-001"
+# Overridable so benchmarks can run against the local stand-in server
+IMAGEN_BASE_URL = os.getenv("IMAGEN_BASE_URL", "https://generativelanguage.googleapis.com")
+POLLINATIONS_BASE_URL = os.getenv("POLLINATIONS_BASE_URL", "https://image.pollinations.ai")
+IMAGE_TIMEOUT = (http_client.DEFAULT_CONNECT_TIMEOUT, 120)
+# Imagen returns at most this many images per request (sampleCount)
+MAX_SAMPLE_COUNT = 4
+# If Imagen hasn't answered after this many seconds, Pollinations is asked
+# in parallel and whichever returns images first wins
+HEDGE_AFTER_SECONDS = float(os.getenv("IMAGE_HEDGE_AFTER", 10))
 
-def generate_image(prompt):
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="image-gen")
+
+@tracing.traced("image.imagen")
+def _imagen_images(prompt, count):
     """
-    Generates an image using the 'Nano Banana' (Pollinations) model.
+    One Imagen request for up to MAX_SAMPLE_COUNT images of the same prompt.
+    Returns a list of (image_bytes, mime_type); empty on failure.
     """
     try:
-        print(f"🎨 Generating image for prompt: {prompt}")
-        
         # Using Imagen 4.0 Fast via Direct API (since SDK had issues)
-        import requests
-        import base64
-        from io import BytesIO
-        from PIL import Image
-        import os
-
-        # Hardcoded URL for the discovered working model
         api_key = os.getenv("GEMINI_API_KEY")
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/imagen-4.0-fast-generate-001:predict?key={api_key}"
-        
+        url = f"{IMAGEN_BASE_URL}/v1beta/models/{IMAGEN_MODEL}:predict?key={api_key}"
+
         headers = { "Content-Type": "application/json" }
         data = {
             "instances": [
                 { "prompt": prompt }
             ],
             "parameters": {
-                "sampleCount": 1,
+                "sampleCount": min(count, MAX_SAMPLE_COUNT),
                 "aspectRatio": "1:1"
             }
         }
-        
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code == 200:
-            result = response.json()
-            predictions = result.get('predictions', [])
-            if predictions and 'bytesBase64Encoded' in predictions[0]:
-                image_data = base64.b64decode(predictions[0]['bytesBase64Encoded'])
-                return Image.open(BytesIO(image_data))
-            elif predictions and 'mimeType' in predictions[0]:
-                 # Some versions return just the bytes? Or key name differs
-                 print(f"⚠️ Unexpected keys: {predictions[0].keys()}")
-                 return None
-        else:
-             print(f"❌ Imagen API Error: {response.text}")
-
-        # Fallback if Google API fails (for demo continuity)
-        print("⚠️ Falling back to Pollinations...")
-        encoded_prompt = requests.utils.quote(prompt)
-        url_poly = f"https://image.pollinations.ai/prompt/{encoded_prompt}?nologo=true"
-        response_poly = requests.get(url_poly)
-        if response_poly.status_code == 200:
-             return Image.open(BytesIO(response_poly.content))
-             
-        return None
+
+        response = http_client.post(url, headers=headers, json=data, timeout=IMAGE_TIMEOUT)
+
+        if response.status_code != 200:
+            print(f"❌ Imagen API Error: {response.text}")
+            return []
+
+        images = []
+        for prediction in response.json().get('predictions', []):
+            if 'bytesBase64Encoded' in prediction:
+                images.append((base64.b64decode(prediction['bytesBase64Encoded']), prediction.get('mimeType', 'image/png')))
+            else:
+                # Some versions return just the bytes? Or key name differs
+                print(f"⚠️ Unexpected keys: {prediction.keys()}")
+        return images
 
     except Exception as e:
-        print(f"❌ Image Generation Error: {e}")
+        print(f"❌ Imagen Error: {e}")
+        return []
+
+@tracing.traced("image.pollinations")
+def _pollinations_images(prompt, count):
+    """
+    Pollinations fallback: one request per image (seeded so they differ).
+    Returns a list of (image_bytes, mime_type); empty on failure.
+    """
+    images = []
+    encoded_prompt = urllib.parse.quote(prompt)
+    for seed in range(count):
+        try:
+            url_poly = f"{POLLINATIONS_BASE_URL}/prompt/{encoded_prompt}?nologo=true"
+            if seed:
+                url_poly += f"&seed={seed}"
+            response_poly = http_client.get(url_poly, timeout=IMAGE_TIMEOUT)
+            if response_poly.status_code == 200:
+                mime_type = response_poly.headers.get('Content-Type', 'image/jpeg').split(';')[0]
+                images.append((response_poly.content, mime_type))
+        except Exception as e:
+            print(f"❌ Pollinations Error: {e}")
+    return images
+
+def generate_images_bytes(prompt, count=1):
+    """
+    Generates up to `count` images (max MAX_SAMPLE_COUNT) for one prompt.
+    Imagen is tried first; Pollinations is hedged in after HEDGE_AFTER_SECONDS
+    or used straight away if Imagen fails.
+    Returns a list of (image_bytes, mime_type) exactly as served by the API.
+    """
+    count = max(1, min(count, MAX_SAMPLE_COUNT))
+
+    with tracing.span("image.generate", count=count) as span:
+        primary = tracing.submit(_executor, _imagen_images, prompt, count)
+        try:
+            images = primary.result(timeout=HEDGE_AFTER_SECONDS)
+            if images:
+                return images
+            # Fallback if Google API fails (for demo continuity)
+            print("⚠️ Falling back to Pollinations...")
+            span.set(fallback=True)
+            return _pollinations_images(prompt, count)
+        except TimeoutError:
+            print(f"⚠️ Imagen slower than {HEDGE_AFTER_SECONDS:g}s, hedging with Pollinations...")
+            span.set(hedged=True)
+
+        hedge = tracing.submit(_executor, _pollinations_images, prompt, count)
+        for future in as_completed([primary, hedge]):
+            images = future.result()
+            if images:
+                return images
+        return []
+
+def generate_image_bytes(prompt):
+    """
+    Generates one image. Returns (image_bytes, mime_type), or None.
+    """
+    images = generate_images_bytes(prompt, 1)
+    return images[0] if images else None
+
+def generate_image(prompt):
+    """
+    Generates an image using the 'Nano Banana' (Pollinations) model.
+    Returns a PIL Image (see generate_image_bytes for the raw bytes).
+    """
+    result = generate_image_bytes(prompt)
+    if not result:
         return None
+
+    from io import BytesIO
+    from PIL import Image
+    return Image.open(BytesIO(result[0]))
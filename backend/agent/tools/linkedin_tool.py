@@ -1,4 +1,4 @@
-import requests
+import http_client
 
 def post_to_linkedin(text, access_token, urn, visibility='PUBLIC'):
     """
@@ -32,7 +32,7 @@ def post_to_linkedin(text, access_token, urn, visibility='PUBLIC'):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=post_data)
+        response = http_client.post(url, headers=headers, json=post_data)
         
         if response.status_code in [200, 201]:
             return {"success": True, "data": response.json()}
@@ -1,9 +1,61 @@
-from typing import List, Dict
-import json
+from typing import Dict, Iterator, List
+import ijson
+import tracing
+try:
+    from tools.compact_comments import compact_comments
+except ImportError:
+    from compact_comments import compact_comments
+
+def iter_linkedin_comments(path: str) -> Iterator[Dict]:
+    """
+    Streams comment records from a LinkedIn/Instagram export without loading
+    the whole file. Supports a bare list of comments, {"comments": [...]}
+    and the scraper's {"posts": [{"postUrl", "comments": [text, ...]}]} format
+    (normalized to one dict per comment).
+    """
+    with open(path, "rb") as f:
+        events = ijson.parse(f, use_float=True)
+        for prefix, event, value in events:
+            if prefix == "" and event == "start_array":
+                yield from ijson.items(events, "item", use_float=True)
+                return
+
+            if prefix == "" and event == "map_key" and value == "posts":
+                for post_idx, post in enumerate(ijson.items(events, "posts.item", use_float=True), 1):
+                    post_url = post.get("postUrl", f"post_{post_idx}")
+                    for comment_idx, text in enumerate(post.get("comments", []), 1):
+                        yield {
+                            "id": f"p{post_idx}_c{comment_idx}",
+                            "commentary": text,
+                            "postUrl": post_url
+                        }
+                return
+
+            if prefix == "" and event == "map_key" and value == "comments":
+                yield from ijson.items(events, "comments.item", use_float=True)
+                return
+
+    raise ValueError(f"Unsupported comments format in {path}")
 
 def load_linkedin_comments(path: str) -> List[Dict]:
     """
     Loads LinkedIn comments JSON file.
+    Returns every comment record as a list (the scraper's posts format is
+    flattened to one dict per comment).
+    """
+    with tracing.span("tool.load_linkedin_comments") as span:
+        comments = list(iter_linkedin_comments(path))
+        span.set(total_comments=len(comments))
+        return comments
+
+def load_compact_comments(path: str) -> Dict:
+    """
+    Loads LinkedIn comments JSON file, compacted for the audience agents.
+    Returns the comment text and author headline for each unique comment
+    (near-duplicates are merged with a "count"), plus "total_comments" for
+    the whole file. Large threads are sampled to stay within the token budget.
     """
-    with open(path, "r") as f:
-        return json.load(f)
+    with tracing.span("tool.load_compact_comments") as span:
+        result = compact_comments(iter_linkedin_comments(path))
+        span.set(total_comments=result["total_comments"], sent=len(result["comments"]))
+        return result
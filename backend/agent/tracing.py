@@ -0,0 +1,268 @@
+import atexit
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Spans also cover parse/cache steps that take milliseconds
+SPAN_BUCKETS = (0.001, 0.005, 0.01, 0.025) + LATENCY_BUCKETS
+
+# Every finished span as one JSON line: a file path, or "-" for stdout.
+# Unset = histograms only.
+TRACE_LOG = os.environ.get("TRACE_LOG")
+
+METRICS_PREFIX = "adsage"
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_histograms = {}
+_metric_sources = {}
+_counter_sources = {}
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+_log_file = None
+
+
+class LatencyHistogram:
+    """
+    Cumulative latency histogram (Prometheus-style "le" buckets).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            if error:
+                self.errors += 1
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.counts[i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+                "count": self.count,
+                "sum": self.sum,
+                "errors": self.errors
+            }
+
+
+class Span:
+    """
+    One timed stage of a request. Attributes set with span.set(...) end up
+    in the JSON span log; only name, duration and error reach /metrics.
+    """
+    __slots__ = ("name", "attrs", "span_id", "parent_id", "request_id", "error")
+
+    def __init__(self, name, attrs, parent):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.request_id = _request_id.get()
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def start_request(request_id=None):
+    """
+    Tags everything that runs in the current context (and in threads started
+    with submit()) with a request ID. Returns the ID.
+    """
+    request_id = request_id or uuid.uuid4().hex[:16]
+    _request_id.set(request_id)
+    _current_span.set(None)
+    return request_id
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times the enclosed block as a child of the current span:
+
+        with tracing.span("agent.youth", model=MODEL_NAME) as s:
+            ...
+            s.set(chars=len(text))
+
+    An exception marks the span as failed and is re-raised.
+    """
+    parent = _current_span.get()
+    current = Span(name, attrs, parent)
+    _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        # Restored by value (not token) so spans stay safe inside generators
+        _current_span.set(parent)
+        _finish(current, time.perf_counter() - started)
+
+
+def traced(name):
+    """
+    Decorator form of span() for a whole function.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, seconds, error=None, **attrs):
+    """
+    Records an already-measured stage (e.g. one spanning generator yields).
+    """
+    current = Span(name, attrs, _current_span.get())
+    current.error = error
+    _finish(current, seconds)
+
+
+def submit(executor, fn, *args, **kwargs):
+    """
+    executor.submit() that carries the request ID and current span into the
+    worker thread (thread pools don't copy contextvars by themselves).
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _histogram(name):
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(name, LatencyHistogram(SPAN_BUCKETS))
+    return histogram
+
+
+def _finish(current, seconds):
+    _histogram(current.name).observe(seconds, error=current.error is not None)
+    if TRACE_LOG:
+        _write({
+            "ts": round(time.time(), 3),
+            "request_id": current.request_id,
+            "span": current.name,
+            "span_id": current.span_id,
+            "parent_id": current.parent_id,
+            "duration_ms": round(seconds * 1000, 2),
+            "error": current.error,
+            **current.attrs
+        })
+
+
+def _write(entry):
+    global _log_file
+    line = json.dumps(entry, default=str) + "\n"
+    with _log_lock:
+        if _log_file is None:
+            _log_file = sys.stdout if TRACE_LOG == "-" else open(TRACE_LOG, "a")
+        _log_file.write(line)
+
+
+@atexit.register
+def close_log():
+    """
+    Flushes and closes the JSON span log (used on shutdown and in tests).
+    """
+    global _log_file
+    with _log_lock:
+        if _log_file is not None and _log_file is not sys.stdout:
+            _log_file.close()
+        elif _log_file is not None:
+            _log_file.flush()
+        _log_file = None
+
+
+def span_stats():
+    """
+    Returns {span name: histogram snapshot} for every span recorded so far.
+    """
+    with _lock:
+        histograms = dict(_histograms)
+    return {name: histogram.snapshot() for name, histogram in histograms.items()}
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histograms(lines, metric, label, stats, help_text):
+    lines.append(f"# HELP {metric}_seconds {help_text}")
+    lines.append(f"# TYPE {metric}_seconds histogram")
+    for key, snapshot in sorted(stats.items()):
+        labels = f'{label}="{_label(key)}"'
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f'{metric}_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{metric}_seconds_bucket{{{labels},le="+Inf"}} {snapshot["count"]}')
+        lines.append(f"{metric}_seconds_sum{{{labels}}} {snapshot['sum']:.6f}")
+        lines.append(f"{metric}_seconds_count{{{labels}}} {snapshot['count']}")
+    lines.append(f"# HELP {metric}_errors_total Failed calls")
+    lines.append(f"# TYPE {metric}_errors_total counter")
+    for key, snapshot in sorted(stats.items()):
+        lines.append(f'{metric}_errors_total{{{label}="{_label(key)}"}} {snapshot["errors"]}')
+
+
+def register_histograms(metric, label, stats, help_text):
+    """
+    Adds another family of histograms to /metrics: stats() must return
+    {label value: LatencyHistogram snapshot} (e.g. http_client.latency_stats).
+    """
+    _metric_sources[metric] = (label, stats, help_text)
+
+
+def register_counters(metric, labels, stats, help_text):
+    """
+    Adds a counter family to /metrics: stats() must return
+    {(label value, ...): value} with one value per name in labels.
+    """
+    _counter_sources[metric] = (labels, stats, help_text)
+
+
+def _render_counters(lines, metric, labels, stats, help_text):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} counter")
+    for key, value in sorted(stats.items()):
+        label_text = ",".join(f'{name}="{_label(part)}"' for name, part in zip(labels, key))
+        lines.append(f"{metric}{{{label_text}}} {value}")
+
+
+def render_metrics():
+    """
+    Span histograms plus every registered histogram and counter family in
+    the Prometheus text format.
+    """
+    lines = []
+    _render_histograms(lines, f"{METRICS_PREFIX}_span", "span", span_stats(),
+                       "Duration of traced stages (agents, tool and HTTP calls, parsing)")
+    for metric, (label, stats, help_text) in list(_metric_sources.items()):
+        _render_histograms(lines, f"{METRICS_PREFIX}_{metric}", label, stats(), help_text)
+    for metric, (labels, stats, help_text) in list(_counter_sources.items()):
+        _render_counters(lines, f"{METRICS_PREFIX}_{metric}", labels, stats(), help_text)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,167 @@
+import contextvars
+import os
+import threading
+
+import tracing
+
+# Token fields read from a response's usage_metadata
+FIELDS = {
+    "prompt_tokens": "prompt_token_count",
+    "cached_tokens": "cached_content_token_count",
+    "output_tokens": "candidates_token_count",
+    "thoughts_tokens": "thoughts_token_count",
+    "total_tokens": "total_token_count"
+}
+
+# USD per million tokens as (input, output, cached input). Override or add
+# models with GENAI_PRICES="gemini-2.5-flash=0.30/2.50/0.075,gemini-2.5-pro=1.25/10/0.31"
+DEFAULT_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50, 0.075),
+    "gemini-2.5-pro": (1.25, 10.00, 0.31)
+}
+
+_current = contextvars.ContextVar("request_usage", default=None)
+_totals = {}  # (endpoint, agent, model) -> {"calls": n, <field>: tokens}
+_lock = threading.Lock()
+
+
+def _parse_prices(value):
+    prices = dict(DEFAULT_PRICES)
+    for item in (value or "").split(","):
+        if "=" in item:
+            model, rates = item.split("=", 1)
+            prices[model.strip()] = tuple(float(rate) for rate in rates.split("/"))
+    return prices
+
+
+PRICES = _parse_prices(os.environ.get("GENAI_PRICES"))
+
+
+def estimate_cost(model, counts):
+    """
+    Estimated USD cost of the given token counts (0.0 for unknown models).
+    Cached prompt tokens are billed at the cached rate, thinking tokens as output.
+    """
+    if model not in PRICES:
+        return 0.0
+    rates = PRICES[model]
+    input_rate, output_rate = rates[:2]
+    cached_rate = rates[2] if len(rates) > 2 else input_rate
+    cached = counts.get("cached_tokens", 0)
+    output = counts.get("output_tokens", 0) + counts.get("thoughts_tokens", 0)
+    return ((counts.get("prompt_tokens", 0) - cached) * input_rate
+            + cached * cached_rate + output * output_rate) / 1_000_000
+
+
+def usage_counts(response):
+    """
+    Token counts of one model response (final stream chunk, or cached
+    content upload), or None if it carries no usage_metadata.
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return None
+    counts = {field: getattr(metadata, attr, None) or 0 for field, attr in FIELDS.items()}
+    # caches.create only reports total_token_count, all of it uploaded prompt
+    if not hasattr(metadata, "prompt_token_count"):
+        counts["prompt_tokens"] = counts["total_tokens"]
+    return counts
+
+
+class RequestUsage:
+    """
+    Token usage of one request, per agent. Shared by every thread working
+    on the request (see tracing.submit), so updates are locked.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.agents = {}
+        self._lock = threading.Lock()
+
+    def add(self, agent, model, counts):
+        with self._lock:
+            totals = self.agents.setdefault(agent, {"model": model, "calls": 0, **dict.fromkeys(FIELDS, 0)})
+            totals["calls"] += 1
+            for field in FIELDS:
+                totals[field] += counts[field]
+
+    def to_dict(self):
+        """
+        {"calls", <token fields>, "estimated_cost_usd", "agents": {agent: {...}}}
+        """
+        with self._lock:
+            agents = {agent: dict(totals) for agent, totals in self.agents.items()}
+        summary = {"calls": 0, **dict.fromkeys(FIELDS, 0), "estimated_cost_usd": 0.0}
+        for totals in agents.values():
+            totals["estimated_cost_usd"] = round(estimate_cost(totals["model"], totals), 6)
+            for key in ("calls", "estimated_cost_usd", *FIELDS):
+                summary[key] += totals[key]
+        summary["estimated_cost_usd"] = round(summary["estimated_cost_usd"], 6)
+        summary["agents"] = agents
+        return summary
+
+
+def start_request_usage(endpoint):
+    """
+    Starts accounting for the current request; model calls made in this
+    context (and in threads started with tracing.submit) are added to it.
+    """
+    request_usage = RequestUsage(endpoint)
+    _current.set(request_usage)
+    return request_usage
+
+
+def get_request_usage():
+    """
+    The current request's RequestUsage (an empty one outside a request).
+    """
+    return _current.get() or RequestUsage(None)
+
+
+def record_usage(response, agent, model):
+    """
+    Adds a Gemini response's usage_metadata to the current request and to
+    the process-wide per-endpoint counters. Returns the counts (or None).
+    """
+    counts = usage_counts(response)
+    if counts is None:
+        return None
+
+    request_usage = _current.get()
+    if request_usage is not None:
+        request_usage.add(agent, model, counts)
+
+    key = (request_usage.endpoint if request_usage else "none", agent, model)
+    with _lock:
+        totals = _totals.setdefault(key, {"calls": 0, **dict.fromkeys(FIELDS, 0)})
+        totals["calls"] += 1
+        for field in FIELDS:
+            totals[field] += counts[field]
+    return counts
+
+
+def usage_stats():
+    """
+    Returns {(endpoint, agent, model): {"calls", <token fields>}} since startup.
+    """
+    with _lock:
+        return {key: dict(totals) for key, totals in _totals.items()}
+
+
+def _token_counters():
+    return {
+        (*key, field[:-len("_tokens")]): totals[field]
+        for key, totals in usage_stats().items()
+        for field in FIELDS
+    }
+
+
+def _call_counters():
+    return {key: totals["calls"] for key, totals in usage_stats().items()}
+
+
+tracing.register_counters("genai_tokens_total", ("endpoint", "agent", "model", "type"), _token_counters,
+                          "Gemini tokens by endpoint, agent and type (prompt, cached, output, thoughts, total)")
+tracing.register_counters("genai_calls_total", ("endpoint", "agent", "model"), _call_counters,
+                          "Gemini calls that reported usage")
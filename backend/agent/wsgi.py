@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers:
+
+    cd backend/agent
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from server import app
+
+application = app
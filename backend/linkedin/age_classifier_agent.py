@@ -4,12 +4,21 @@ Linken Comments Age Classifier Agent
 Uses Google Gemini API to analyze comments and classify likely age group (18-30)
 """
 
+import argparse
 import json
 import os
+import random
+import re
 import sys
-from typing import List, Dict, Any
+import textwrap
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from dataclasses import dataclass
 import google.generativeai as genai
+import ijson
 from datetime import datetime
 
 
@@ -23,21 +32,164 @@ class CommentAnalysis:
     confidence_score: float
     reasoning: str
     keywords_identified: List[str]
+    tier: str = "llm"  # "local" when decided by the keyword scorer without Gemini
+
+
+# Rough token estimate (~4 characters per token) used to size batches
+CHARS_PER_TOKEN = 4
+DEFAULT_BATCH_TOKEN_BUDGET = 6000
+DEFAULT_MAX_BATCH_SIZE = 50
+
+ANALYSIS_CRITERIA = """Consider:
+1. Language style (casual/formal, slang usage)
+2. Vocabulary and expressions
+3. Career stage indicators (student, recent graduate, early career)
+4. Communication patterns typical of young adults
+5. Use of emojis and internet slang
+6. References to experiences or life stage"""
+
+
+# Local (keyword) tier: per-keyword evidence weights combined with noisy-OR.
+# Keywords not listed here use DEFAULT_KEYWORD_WEIGHT.
+DEFAULT_KEYWORD_WEIGHT = 0.2
+STRONG_KEYWORD_WEIGHTS = {
+    "no cap": 0.6, "bussin": 0.6, "yooo": 0.6, "ngl": 0.6, "slay": 0.6,
+    "sus": 0.6, "lowkey": 0.6, "highkey": 0.6, "fr": 0.5, "vibe check": 0.6,
+    "gen z": 0.7, "zoomer": 0.7, "💀": 0.4
+}
+
+# Phrases that point clearly away from the 18-30 group
+MATURE_KEYWORD_WEIGHTS = {
+    "years of experience": 0.6, "decades": 0.6, "my grandchildren": 0.8,
+    "grandkids": 0.8, "retired": 0.7, "retirement": 0.5, "back in my day": 0.7,
+    "my children": 0.4, "my kids": 0.4, "in my career": 0.3
+}
+
+# Approximate tokens for one single-comment Gemini call (prompt + JSON answer),
+# excluding the comment text itself. Used for the cost-savings summary.
+SINGLE_CALL_OVERHEAD_TOKENS = 250
+
+# Token fields read from each Gemini response's usage_metadata
+USAGE_FIELDS = {
+    "prompt_tokens": "prompt_token_count",
+    "cached_tokens": "cached_content_token_count",
+    "output_tokens": "candidates_token_count",
+    "total_tokens": "total_token_count"
+}
+
+# Retry policy for rate-limit (429) and server (5xx) errors
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second"""
+    
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate: Tokens (requests) added per second
+            capacity: Max burst size (default: max(1, rate))
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """True for rate-limit (429) and server-side (5xx) API errors"""
+    code = getattr(error, "code", None)
+    if not isinstance(code, int):
+        code = getattr(error, "status_code", None)
+    if isinstance(code, int):
+        return code == 429 or 500 <= code < 600
+    return False
+
+
+def noisy_or(weights: List[float]) -> float:
+    """Combine independent pieces of evidence into one probability"""
+    remaining = 1.0
+    for weight in weights:
+        remaining *= 1.0 - weight
+    return 1.0 - remaining
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for batch sizing (no tokenizer round-trip)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def parse_json_response(response_text: str) -> Any:
+    """
+    Parse a JSON model response, removing markdown code blocks if present
+    """
+    response_text = response_text.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    return json.loads(response_text.strip())
+
+
+def error_analysis(error: Exception) -> Dict[str, Any]:
+    """Stand-in analysis for a comment Gemini could not classify"""
+    return {
+        "is_young_adult": False,
+        "confidence_score": 0.0,
+        "reasoning": f"Error: {str(error)}",
+        "age_indicators": []
+    }
 
 
 class LinkedInAgeClassifierAgent:
     """Agent to classify LinkedIn comments by age group using Gemini AI"""
     
-    def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash"):
+    def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash",
+                 batch_token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 rps: float = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 local_threshold: float = None):
         """
         Initialize the agent with Gemini API
         
         Args:
             api_key: Google Gemini API key
             model_name: Gemini model to use (default: gemini-2.5-flash)
+            batch_token_budget: Max estimated prompt tokens of comment text per batch
+            max_batch_size: Max comments packed into one batch request
+            rps: Max Gemini requests per second across all workers (default: unlimited)
+            max_retries: Retries with exponential backoff on 429/5xx errors
+            local_threshold: Decide comments locally (no Gemini call) when the keyword
+                scorer's confidence reaches this value (default: always use Gemini)
         """
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model_name)
+        self.batch_token_budget = batch_token_budget
+        self.max_batch_size = max_batch_size
+        self.rate_limiter = TokenBucket(rps) if rps else None
+        self.max_retries = max_retries
+        self.local_threshold = local_threshold
+        # Actual Gemini token usage, summed across worker threads
+        self.usage = {"calls": 0, **dict.fromkeys(USAGE_FIELDS, 0)}
+        self._usage_lock = threading.Lock()
         self.young_adult_keywords = [
             # Slang and informal language
             "yooo", "lit", "fire", "fam", "bro", "dude", "sick", "af", "bussin",
@@ -58,6 +210,35 @@ class LinkedInAgeClassifierAgent:
             # Emojis (common among young adults)
             "🔥", "💯", "✨", "🎉", "🚀", "😂", "💀", "👀"
         ]
+        self._build_keyword_matcher()
+        
+    def _build_keyword_matcher(self):
+        """
+        Compile young_adult_keywords into regexes once so extract_keywords
+        scans each comment in a single pass. Word keywords only match on word
+        boundaries ("lit" doesn't match "literally"); emoji/symbol tokens are
+        matched separately, and only when the comment has non-ASCII text.
+        Call again after changing young_adult_keywords.
+        """
+        words = [k.lower() for k in self.young_adult_keywords if re.match(r"\w", k)]
+        symbols = [k for k in self.young_adult_keywords if not re.match(r"\w", k)]
+        
+        # Longest first so multi-word phrases win over their prefixes
+        def alternation(tokens):
+            return "|".join(re.escape(t) for t in sorted(tokens, key=len, reverse=True))
+        
+        # Matched against lowercased text (faster than re.IGNORECASE)
+        self._word_pattern = re.compile(rf"\b(?:{alternation(words)})\b") if words else None
+        self._symbol_pattern = re.compile(alternation(symbols)) if symbols else None
+        
+        # Matched text -> canonical keyword, and keyword -> position in the list
+        self._keyword_lookup = {k.lower(): k for k in self.young_adult_keywords}
+        self._keyword_lookup.update({k: k for k in symbols})
+        self._keyword_order = {k: idx for idx, k in enumerate(self.young_adult_keywords)}
+        
+        # Mature phrases for the local tier, on the same word boundaries
+        self._mature_pattern = re.compile(rf"\b(?:{alternation(MATURE_KEYWORD_WEIGHTS)})\b")
+        self._mature_order = {k: idx for idx, k in enumerate(MATURE_KEYWORD_WEIGHTS)}
         
     def extract_keywords(self, text: str) -> List[str]:
         """
@@ -69,14 +250,114 @@ class LinkedInAgeClassifierAgent:
         Returns:
             List of identified keywords
         """
-        text_lower = text.lower()
-        found_keywords = []
+        found = set()
+        if self._word_pattern:
+            found.update(self._word_pattern.findall(text.lower()))
+        if self._symbol_pattern and not text.isascii():
+            found.update(self._symbol_pattern.findall(text))
+        found = {self._keyword_lookup[match] for match in found}
         
-        for keyword in self.young_adult_keywords:
-            if keyword.lower() in text_lower or keyword in text:
-                found_keywords.append(keyword)
-                
-        return found_keywords
+        # Same order as young_adult_keywords
+        return sorted(found, key=self._keyword_order.__getitem__)
+    
+    def score_locally(self, text: str, keywords: List[str]) -> Dict[str, Any]:
+        """
+        Cheap keyword-based scorer for the local tier
+        
+        Args:
+            text: Comment text
+            keywords: Young adult keywords found by extract_keywords
+            
+        Returns:
+            Dictionary with 'is_young_adult', 'confidence_score' and the
+            mature markers found
+        """
+        young_score = noisy_or([STRONG_KEYWORD_WEIGHTS.get(k, DEFAULT_KEYWORD_WEIGHT) for k in keywords])
+        
+        mature_markers = sorted(set(self._mature_pattern.findall(text.lower())),
+                                key=self._mature_order.__getitem__)
+        mature_score = noisy_or([MATURE_KEYWORD_WEIGHTS[k] for k in mature_markers])
+        
+        if young_score >= mature_score:
+            return {"is_young_adult": True, "confidence_score": young_score - mature_score,
+                    "markers": keywords}
+        return {"is_young_adult": False, "confidence_score": mature_score - young_score,
+                "markers": mature_markers}
+    
+    def classify_locally(self, comment: Dict[str, Any],
+                         keywords: List[str] = None) -> Optional[CommentAnalysis]:
+        """
+        Decide a comment with the local tier if it is a clear case
+        
+        Args:
+            comment: Comment dictionary
+            keywords: Keywords already extracted from the comment, if any
+            
+        Returns:
+            CommentAnalysis with tier="local", or None if Gemini is needed
+        """
+        if self.local_threshold is None:
+            return None
+        
+        text = comment.get("text", "")
+        if keywords is None:
+            keywords = self.extract_keywords(text)
+        local = self.score_locally(text, keywords)
+        # A comment without a single marker is never a clear case
+        if not local["markers"] or local["confidence_score"] < self.local_threshold:
+            return None
+        
+        return CommentAnalysis(
+            comment_id=comment.get("comment_id", "unknown"),
+            author=comment.get("author", "Unknown"),
+            text=text,
+            is_young_adult=local["is_young_adult"],
+            confidence_score=round(local["confidence_score"], 3),
+            reasoning=f"Local keyword scorer: {', '.join(local['markers'])}",
+            keywords_identified=keywords,
+            tier="local"
+        )
+    
+    def generate(self, prompt: str):
+        """
+        Call Gemini, honouring the rate limit and retrying 429/5xx errors
+        with exponential backoff and jitter
+        
+        Args:
+            prompt: Prompt text
+            
+        Returns:
+            Gemini response
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                response = self.model.generate_content(prompt)
+                self.record_usage(response)
+                return response
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+                delay += random.uniform(0, delay / 2)
+                print(f"Retryable Gemini error ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def record_usage(self, response):
+        """
+        Add a Gemini response's usage_metadata to the running totals
+        
+        Args:
+            response: Gemini response (ignored if it reports no usage)
+        """
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is None:
+            return
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            for field, attr in USAGE_FIELDS.items():
+                self.usage[field] += getattr(metadata, attr, 0) or 0
     
     def analyze_comment_with_gemini(self, comment_text: str) -> Dict[str, Any]:
         """
@@ -92,13 +373,7 @@ class LinkedInAgeClassifierAgent:
 Analyze the following LinkedIn comment and determine if it's likely written by someone 
 in the 18-30 age group (young adult/Gen Z/young millennial).
 
-Consider:
-1. Language style (casual/formal, slang usage)
-2. Vocabulary and expressions
-3. Career stage indicators (student, recent graduate, early career)
-4. Communication patterns typical of young adults
-5. Use of emojis and internet slang
-6. References to experiences or life stage
+{ANALYSIS_CRITERIA}
 
 Comment: "{comment_text}"
 
@@ -112,29 +387,15 @@ Provide your analysis in the following JSON format ONLY (no other text):
 """
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
+            response = self.generate(prompt)
             
             # Parse JSON response
-            analysis = json.loads(response_text.strip())
+            analysis = parse_json_response(response.text)
             return analysis
             
         except Exception as e:
             print(f"Error analyzing comment with Gemini: {e}")
-            return {
-                "is_young_adult": False,
-                "confidence_score": 0.0,
-                "reasoning": f"Error: {str(e)}",
-                "age_indicators": []
-            }
+            return error_analysis(e)
     
     def analyze_comment(self, comment: Dict[str, Any]) -> CommentAnalysis:
         """
@@ -147,15 +408,25 @@ Provide your analysis in the following JSON format ONLY (no other text):
             CommentAnalysis object with results
         """
         comment_text = comment.get("text", "")
-        comment_id = comment.get("comment_id", "unknown")
-        author = comment.get("author", "Unknown")
         
         # Extract keywords first
         keywords = self.extract_keywords(comment_text)
         
+        # Clear cases are decided by the local tier without a Gemini call
+        local = self.classify_locally(comment, keywords)
+        if local:
+            return local
+        
         # Use Gemini for deeper analysis
         gemini_analysis = self.analyze_comment_with_gemini(comment_text)
         
+        return self._build_analysis(comment, keywords, gemini_analysis)
+    
+    def _build_analysis(self, comment: Dict[str, Any], keywords: List[str],
+                        gemini_analysis: Dict[str, Any]) -> CommentAnalysis:
+        """
+        Combine keyword extraction and a Gemini result into a CommentAnalysis
+        """
         # Combine results
         is_young_adult = gemini_analysis.get("is_young_adult", False)
         confidence = gemini_analysis.get("confidence_score", 0.0)
@@ -166,53 +437,375 @@ Provide your analysis in the following JSON format ONLY (no other text):
         all_keywords = list(set(keywords + age_indicators))
         
         return CommentAnalysis(
-            comment_id=comment_id,
-            author=author,
-            text=comment_text,
+            comment_id=comment.get("comment_id", "unknown"),
+            author=comment.get("author", "Unknown"),
+            text=comment.get("text", ""),
             is_young_adult=is_young_adult,
             confidence_score=confidence,
             reasoning=reasoning,
             keywords_identified=all_keywords
         )
     
-    def analyze_all_comments(self, comments: List[Dict[str, Any]]) -> List[CommentAnalysis]:
+    def iter_batches(self, comments: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
         """
-        Analyze all comments in the list
+        Greedily pack comments into batches that fit the token budget,
+        consuming the input lazily
+        
+        Comments the local tier will decide don't count towards the budget.
         
         Args:
-            comments: List of comment dictionaries
+            comments: Iterable of comment dictionaries
             
+        Yields:
+            Batches (each a list of comments, input order preserved)
+        """
+        for scored in self._iter_scored_batches(comments):
+            yield [comment for comment, _, _ in scored]
+    
+    def _score(self, comment: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str], Optional[CommentAnalysis]]:
+        """
+        Extract keywords and run the local tier once for a comment
+        
         Returns:
-            List of CommentAnalysis objects
+            (comment, keywords, local analysis or None)
+        """
+        keywords = self.extract_keywords(comment.get("text", ""))
+        return comment, keywords, self.classify_locally(comment, keywords)
+    
+    def _iter_scored_batches(self, comments: Iterable[Dict[str, Any]]) -> Iterator[List[Tuple]]:
+        """
+        Like iter_batches, but each comment comes with its keywords and local
+        result so analyze_batch doesn't have to score it again
+        """
+        current = []
+        current_tokens = 0
+        current_llm = 0
+        
+        for comment in comments:
+            scored = self._score(comment)
+            if scored[2]:
+                current.append(scored)
+                continue
+            
+            tokens = estimate_tokens(comment.get("text", ""))
+            if current_llm and (current_tokens + tokens > self.batch_token_budget
+                                or current_llm >= self.max_batch_size):
+                yield current
+                current = []
+                current_tokens = 0
+                current_llm = 0
+            current.append(scored)
+            current_tokens += tokens
+            current_llm += 1
+            
+        if current:
+            yield current
+    
+    def make_batches(self, comments: Iterable[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Greedily pack comments into batches that fit the token budget
+        
+        Args:
+            comments: Iterable of comment dictionaries
+            
+        Returns:
+            List of batches (each a list of comments, input order preserved)
+        """
+        return list(self.iter_batches(comments))
+    
+    def analyze_batch_with_gemini(self, batch: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Use Gemini API to analyze several comments in one request
+        
+        Args:
+            batch: Comment dictionaries; each must have a unique 'comment_id'
+            
+        Returns:
+            Dictionary mapping comment_id to its analysis
+            
+        Raises:
+            ValueError: If the response is not a JSON array covering every comment
         """
-        results = []
-        total = len(comments)
+        payload = [{"comment_id": c["comment_id"], "text": c.get("text", "")} for c in batch]
+        prompt = f"""
+Analyze each of the following LinkedIn comments and determine if it's likely written by
+someone in the 18-30 age group (young adult/Gen Z/young millennial).
+
+{ANALYSIS_CRITERIA}
+
+Comments (JSON array):
+{json.dumps(payload, ensure_ascii=False)}
+
+Provide your analysis as a JSON array ONLY (no other text), with exactly one object per
+comment, using the same comment_id:
+[
+    {{
+        "comment_id": "id from the input",
+        "is_young_adult": true/false,
+        "confidence_score": 0.0-1.0,
+        "reasoning": "brief explanation of your decision",
+        "age_indicators": ["list", "of", "specific", "indicators", "found"]
+    }}
+]
+"""
+        response = self.generate(prompt)
+        analyses = parse_json_response(response.text)
         
-        print(f"\n⏳ Analyzing {total} comments...\n")
+        if not isinstance(analyses, list):
+            raise ValueError("Batch response is not a JSON array")
+            
+        by_id = {}
+        for item in analyses:
+            if isinstance(item, dict) and "comment_id" in item:
+                by_id[str(item["comment_id"])] = item
+                
+        missing = [c["comment_id"] for c in batch if c["comment_id"] not in by_id]
+        if missing:
+            raise ValueError(f"Batch response missing {len(missing)} comment(s)")
+        return by_id
+    
+    def analyze_batch(self, batch: List[Dict[str, Any]]) -> List[CommentAnalysis]:
+        """
+        Analyze a batch of comments: clear cases are decided by the local tier,
+        the rest go to Gemini in one request
         
-        for idx, comment in enumerate(comments, 1):
-            print(f"  [{idx}/{total}] ", end="", flush=True)
-            analysis = self.analyze_comment(comment)
-            results.append(analysis)
-            print("✓")
+        Args:
+            batch: List of comment dictionaries
             
+        Returns:
+            List of CommentAnalysis objects in the same order as the batch
+        """
+        return self._analyze_scored_batch([self._score(comment) for comment in batch])
+    
+    def _analyze_scored_batch(self, scored: List[Tuple]) -> List[CommentAnalysis]:
+        """
+        analyze_batch for comments already run through _score
+        """
+        results = [local for _, _, local in scored]
+        pending = [idx for idx, result in enumerate(results) if result is None]
+        
+        if pending:
+            llm_results = self._analyze_llm_batch([scored[idx][:2] for idx in pending])
+            for idx, analysis in zip(pending, llm_results):
+                results[idx] = analysis
         return results
     
-    def generate_report(self, analyses: List[CommentAnalysis], output_file: str = None):
+    def _analyze_llm_batch(self, batch: List[Tuple[Dict[str, Any], List[str]]]) -> List[CommentAnalysis]:
+        """
+        Analyze a batch of (comment, keywords) pairs with Gemini, splitting and
+        retrying at smaller sizes when the batch response is malformed or incomplete
+        
+        API errors (auth, safety blocks, or 429/5xx after generate()'s own
+        retries) are not split, since that would only repeat them against the
+        same API: every comment in the batch gets an error analysis instead,
+        as in single-comment mode.
+        """
+        # Batch-local ids so duplicate or missing comment_ids still map back
+        keyed = [dict(c, comment_id=f"b{idx}") for idx, (c, _) in enumerate(batch)]
+        
+        try:
+            by_id = self.analyze_batch_with_gemini(keyed)
+        except ValueError as e:  # includes json.JSONDecodeError and missing ids
+            if len(batch) == 1:
+                print(f"Batch of 1 failed ({e}), using single-comment analysis")
+                comment, keywords = batch[0]
+                return [self._build_analysis(comment, keywords,
+                                             self.analyze_comment_with_gemini(comment.get("text", "")))]
+            
+            mid = len(batch) // 2
+            print(f"Batch of {len(batch)} failed ({e}), retrying as {mid} + {len(batch) - mid}")
+            return self._analyze_llm_batch(batch[:mid]) + self._analyze_llm_batch(batch[mid:])
+        except Exception as e:
+            print(f"Error analyzing batch of {len(batch)} with Gemini: {e}")
+            return [self._build_analysis(comment, keywords, error_analysis(e)) for comment, keywords in batch]
+        
+        return [
+            self._build_analysis(comment, keywords, by_id[k["comment_id"]])
+            for (comment, keywords), k in zip(batch, keyed)
+        ]
+    
+    def iter_analyses(self, comments: Iterable[Dict[str, Any]],
+                      batch_mode: bool = False, workers: int = 1) -> Iterator[CommentAnalysis]:
+        """
+        Analyze comments lazily, yielding results in input order
+        
+        Comments are pulled from the iterable only as workers become free,
+        so a streamed export is never fully held in memory.
+        
+        Args:
+            comments: Iterable of comment dictionaries (e.g. iter_comments_from_json)
+            batch_mode: Pack several comments into each Gemini request
+            workers: Number of concurrent Gemini requests
+            
+        Yields:
+            CommentAnalysis objects
+        """
+        if batch_mode:
+            units = self._iter_scored_batches(comments)
+            analyze_unit = self._analyze_scored_batch
+        else:
+            units = comments
+            analyze_unit = lambda comment: [self.analyze_comment(comment)]
+        
+        if workers <= 1:
+            for idx, unit in enumerate(units, 1):
+                print(f"  [{idx}] ", end="", flush=True)
+                yield from analyze_unit(unit)
+                print("✓")
+            return
+        
+        print(f"  Using {workers} workers\n")
+        
+        # Bounded in-flight window; futures are resolved in submission order
+        # so the report stays deterministic
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            done = 0
+            for unit in units:
+                in_flight.append(executor.submit(analyze_unit, unit))
+                if len(in_flight) >= workers * 2:
+                    done += 1
+                    print(f"  [{done}] ✓", flush=True)
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                done += 1
+                print(f"  [{done}] ✓", flush=True)
+                yield from in_flight.popleft().result()
+    
+    def analyze_all_comments(self, comments: Iterable[Dict[str, Any]],
+                             batch_mode: bool = False, workers: int = 1) -> List[CommentAnalysis]:
+        """
+        Analyze all comments in the list
+        
+        Args:
+            comments: Iterable of comment dictionaries
+            batch_mode: Pack several comments into each Gemini request
+            workers: Number of concurrent Gemini requests (results keep input order)
+            
+        Returns:
+            List of CommentAnalysis objects
+        """
+        if hasattr(comments, "__len__"):
+            print(f"\n⏳ Analyzing {len(comments)} comments...\n")
+        return list(self.iter_analyses(comments, batch_mode=batch_mode, workers=workers))
+    
+    def tier_summary(self, total: int, local_count: int, tokens_saved: int) -> Dict[str, Any]:
+        """
+        Per-tier hit rate and estimated Gemini cost savings
+        
+        Args:
+            total: Number of analysed comments
+            local_count: Comments decided by the local tier
+            tokens_saved: Estimated Gemini tokens not spent on those comments
+            
+        Returns:
+            Dictionary with per-tier counts/rates and savings estimates
+        """
+        return {
+            "local_threshold": self.local_threshold,
+            "tiers": {
+                tier: {
+                    "count": count,
+                    "hit_rate": count / total if total else 0.0
+                }
+                for tier, count in (("local", local_count), ("llm", total - local_count))
+            },
+            "gemini_calls_saved": local_count,
+            "estimated_tokens_saved": tokens_saved
+        }
+    
+    def generate_report(self, analyses: Iterable[CommentAnalysis], output_file: str = None):
         """
         Generate a detailed report of the analysis
         
+        The analyses are consumed in a single pass and written to the JSON
+        report as they arrive; only the 18-30 subset is kept for the summary.
+        
         Args:
-            analyses: List of CommentAnalysis objects
+            analyses: Iterable of CommentAnalysis objects (e.g. iter_analyses)
             output_file: Optional file path to save JSON report
         """
-        young_adult_comments = [a for a in analyses if a.is_young_adult]
+        total = 0
+        local_count = 0
+        tokens_saved = 0
+        young_adult_comments = []
+        
+        # Written to a temp file and renamed on success, so a failed run
+        # never leaves a truncated report behind
+        tmp_file = f"{output_file}.tmp" if output_file else None
+        report = open(tmp_file, 'w', encoding='utf-8') if output_file else None
+        try:
+            if report:
+                report.write('{\n  "analysis_timestamp": %s,\n  "all_analyses": [' %
+                             json.dumps(datetime.now().isoformat()))
+            
+            for a in analyses:
+                total += 1
+                if a.is_young_adult:
+                    young_adult_comments.append(a)
+                if a.tier == "local":
+                    local_count += 1
+                    tokens_saved += SINGLE_CALL_OVERHEAD_TOKENS + estimate_tokens(a.text)
+                
+                if report:
+                    entry = json.dumps({
+                        "comment_id": a.comment_id,
+                        "text": a.text,
+                        "is_young_adult": a.is_young_adult,
+                        "confidence_score": a.confidence_score,
+                        "keywords_identified": a.keywords_identified,
+                        "reasoning": a.reasoning,
+                        "tier": a.tier
+                    }, indent=2, ensure_ascii=False)
+                    report.write(("\n" if total == 1 else ",\n") + textwrap.indent(entry, "    "))
+            
+            percentage = len(young_adult_comments)/total*100 if total else 0.0
+            tiers = self.tier_summary(total, local_count, tokens_saved)
+            
+            if report:
+                summary = json.dumps({
+                    "total_comments": total,
+                    "young_adult_comments_count": len(young_adult_comments),
+                    "percentage": percentage,
+                    "tier_summary": tiers,
+                    "token_usage": dict(self.usage),
+                    "young_adult_comments": [
+                        {
+                            "comment_id": a.comment_id,
+                            "text": a.text,
+                            "confidence_score": a.confidence_score,
+                            "keywords_identified": a.keywords_identified,
+                            "reasoning": a.reasoning
+                        }
+                        for a in young_adult_comments
+                    ]
+                }, indent=2, ensure_ascii=False)
+                # Splice the summary keys in after the streamed array
+                report.write("\n  ]," + summary[1:] + "\n")
+                report.close()
+                os.replace(tmp_file, output_file)
+        except BaseException:
+            if report:
+                report.close()
+                os.remove(tmp_file)
+            raise
         
         print(f"\n{'='*60}")
         print(f"📊 RESULTS")
         print(f"{'='*60}")
-        print(f"  Total Comments: {len(analyses)}")
-        print(f"  Age 18-30: {len(young_adult_comments)} ({len(young_adult_comments)/len(analyses)*100:.1f}%)")
+        print(f"  Total Comments: {total}")
+        print(f"  Age 18-30: {len(young_adult_comments)} ({percentage:.1f}%)")
+        
+        if self.local_threshold is not None:
+            print(f"  Local tier: {tiers['tiers']['local']['count']} "
+                  f"({tiers['tiers']['local']['hit_rate']*100:.1f}%), "
+                  f"Gemini: {tiers['tiers']['llm']['count']}")
+            print(f"  Gemini calls saved: {tiers['gemini_calls_saved']} "
+                  f"(~{tiers['estimated_tokens_saved']} tokens)")
+        if self.usage["calls"]:
+            print(f"  Gemini tokens: {self.usage['total_tokens']:,} over {self.usage['calls']} calls "
+                  f"(prompt {self.usage['prompt_tokens']:,}, cached {self.usage['cached_tokens']:,}, "
+                  f"output {self.usage['output_tokens']:,})")
         print(f"{'='*60}\n")
         
         if young_adult_comments:
@@ -226,40 +819,81 @@ Provide your analysis in the following JSON format ONLY (no other text):
                     print(f"     Keywords: {', '.join(a.keywords_identified[:5])}")
                 print()
         
-        # Generate JSON report
-        if output_file:
-            report_data = {
-                "analysis_timestamp": datetime.now().isoformat(),
-                "total_comments": len(analyses),
-                "young_adult_comments_count": len(young_adult_comments),
-                "percentage": len(young_adult_comments)/len(analyses)*100,
-                "young_adult_comments": [
-                    {
-                        "comment_id": a.comment_id,
-                        "text": a.text,
-                        "confidence_score": a.confidence_score,
-                        "keywords_identified": a.keywords_identified,
-                        "reasoning": a.reasoning
-                    }
-                    for a in young_adult_comments
-                ],
-                "all_analyses": [
-                    {
-                        "comment_id": a.comment_id,
-                        "text": a.text,
-                        "is_young_adult": a.is_young_adult,
-                        "confidence_score": a.confidence_score,
-                        "keywords_identified": a.keywords_identified,
-                        "reasoning": a.reasoning
-                    }
-                    for a in analyses
-                ]
-            }
+        if report:
+            print(f"💾 Report saved: {output_file}\n")
+
+
+class CommentLoadError(Exception):
+    """The input file could not be read or is not a supported comments export"""
+
+
+def iter_comments_from_json(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream comments from a JSON file without loading it into memory
+    
+    Supports the "posts" format (one post object in memory at a time), the
+    old "comments" format and a bare list of comments.
+    
+    backend/agent/tools/load_json.iter_linkedin_comments walks the same
+    formats, but this agent is a standalone script (own venv, run from this
+    directory) and its records use the comment_id/author/text schema the
+    classifier and the report expect, so it keeps its own reader.
+    
+    Args:
+        file_path: Path to JSON file
+        
+    Yields:
+        Comment dictionaries
+        
+    Raises:
+        ValueError: If the file is not in one of the supported formats
+    """
+    with open(file_path, 'rb') as f:
+        events = ijson.parse(f, use_float=True)
+        for prefix, event, value in events:
+            # Bare list of comments
+            if prefix == "" and event == "start_array":
+                yield from ijson.items(events, "item", use_float=True)
+                return
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(report_data, f, indent=2, ensure_ascii=False)
+            # Handle new "posts" format
+            if prefix == "" and event == "map_key" and value == "posts":
+                posts = ijson.items(events, "posts.item", use_float=True)
+                for post_idx, post in enumerate(posts, 1):
+                    post_url = post.get("postUrl", f"post_{post_idx}")
+                    for comment_idx, comment_text in enumerate(post.get("comments", []), 1):
+                        yield {
+                            "comment_id": f"p{post_idx}_c{comment_idx}",
+                            "author": "Unknown",
+                            "text": comment_text,
+                            "post_url": post_url
+                        }
+                return
             
-            print(f"💾 Report saved: {output_file}\n")
+            # Handle old "comments" format
+            if prefix == "" and event == "map_key" and value == "comments":
+                yield from ijson.items(events, "comments.item", use_float=True)
+                return
+    
+    raise ValueError("Invalid JSON format. Expected 'posts' or 'comments' key")
+
+
+def read_comments(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    iter_comments_from_json, raising CommentLoadError for any read or parse
+    failure. The file is read lazily while the analysis runs, so this keeps
+    load errors apart from errors raised by the analysis itself.
+    
+    Args:
+        file_path: Path to JSON file
+        
+    Yields:
+        Comment dictionaries
+    """
+    try:
+        yield from iter_comments_from_json(file_path)
+    except (OSError, ValueError, ijson.JSONError) as e:
+        raise CommentLoadError(f"{file_path}: {e}") from e
 
 
 def load_comments_from_json(file_path: str) -> List[Dict[str, Any]]:
@@ -273,42 +907,48 @@ def load_comments_from_json(file_path: str) -> List[Dict[str, Any]]:
         List of comment dictionaries
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        all_comments = []
-        
-        # Handle new "posts" format
-        if isinstance(data, dict) and "posts" in data:
-            for post_idx, post in enumerate(data["posts"], 1):
-                post_url = post.get("postUrl", f"post_{post_idx}")
-                comments = post.get("comments", [])
-                
-                for comment_idx, comment_text in enumerate(comments, 1):
-                    all_comments.append({
-                        "comment_id": f"p{post_idx}_c{comment_idx}",
-                        "author": "Unknown",
-                        "text": comment_text,
-                        "post_url": post_url
-                    })
-            return all_comments
-            
-        # Handle old "comments" format
-        elif isinstance(data, dict) and "comments" in data:
-            return data["comments"]
-        elif isinstance(data, list):
-            return data
-        else:
-            raise ValueError("Invalid JSON format. Expected 'posts' or 'comments' key")
-            
+        return list(iter_comments_from_json(file_path))
     except Exception as e:
         print(f"Error loading JSON file: {e}")
         sys.exit(1)
 
 
+def positive_float(value: str) -> float:
+    """argparse type for options that must be greater than zero"""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Classify LinkedIn comments by age group (18-30)")
+    parser.add_argument("input_file", nargs="?", default="test.json",
+                        help="Input JSON file (default: test.json)")
+    parser.add_argument("output_file", nargs="?", default="age_classification_report.json",
+                        help="Output report file (default: age_classification_report.json)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Pack several comments into each Gemini request")
+    parser.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKEN_BUDGET,
+                        help=f"Token budget per batch (default: {DEFAULT_BATCH_TOKEN_BUDGET})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"Max comments per batch (default: {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Concurrent Gemini requests (default: 1)")
+    parser.add_argument("--rps", type=float, default=None,
+                        help="Max Gemini requests per second (default: unlimited)")
+    parser.add_argument("--local-threshold", type=positive_float, default=None,
+                        help="Skip Gemini when the keyword scorer's confidence reaches "
+                             "this value, e.g. 0.85 (default: always use Gemini)")
+    return parser.parse_args(argv)
+
+
 def main():
     """Main function to run the age classifier agent"""
     
+    args = parse_args()
+    
     # Get API key from environment variable
     api_key = os.getenv("GEMINI_API_KEY")
     
@@ -317,32 +957,36 @@ def main():
         print("   export GEMINI_API_KEY='your-api-key'")
         sys.exit(1)
     
-    # Get input file from command line or use default
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    else:
-        input_file = "test.json"
-    
-    # Get output file from command line or use default
-    if len(sys.argv) > 2:
-        output_file = sys.argv[2]
-    else:
-        output_file = "age_classification_report.json"
+    input_file = args.input_file
+    output_file = args.output_file
     
     print(f"\n🤖 LinkedIn Age Classifier")
     print(f"📁 Input: {input_file}")
     
-    # Load comments
-    comments = load_comments_from_json(input_file)
+    # Stream comments (the file is never fully loaded into memory)
+    comments = read_comments(input_file)
     
     # Initialize agent
-    agent = LinkedInAgeClassifierAgent(api_key=api_key)
+    agent = LinkedInAgeClassifierAgent(
+        api_key=api_key,
+        batch_token_budget=args.batch_tokens,
+        max_batch_size=args.batch_size,
+        rps=args.rps,
+        local_threshold=args.local_threshold
+    )
     
-    # Analyze comments
-    analyses = agent.analyze_all_comments(comments)
+    # Analyze and report lazily, one comment (or batch) at a time
+    print(f"\n⏳ Analyzing comments...\n")
+    analyses = agent.iter_analyses(comments, batch_mode=args.batch, workers=args.workers)
     
-    # Generate report
-    agent.generate_report(analyses, output_file=output_file)
+    try:
+        agent.generate_report(analyses, output_file=output_file)
+    except CommentLoadError as e:
+        print(f"Error loading JSON file: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ ERROR: Analysis failed: {e}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled keyword matcher vs the original substring scan
+Runs offline (no API calls) on a synthetic comment corpus
+
+Usage:
+    python bench_keywords.py            # 1,000,000 comments
+    python bench_keywords.py --n 100000
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from age_classifier_agent import LinkedInAgeClassifierAgent
+
+
+FILLER_WORDS = [
+    "great", "post", "thanks", "for", "sharing", "this", "is", "really", "helpful",
+    "literally", "after", "team", "product", "launch", "congrats", "amazing", "work",
+    "strategy", "insightful", "leadership", "growth", "experience", "years", "our",
+    "customers", "love", "the", "new", "feature", "well", "done", "everyone"
+]
+
+
+def legacy_extract_keywords(keywords: List[str], text: str) -> List[str]:
+    """The original implementation: two substring scans per keyword"""
+    text_lower = text.lower()
+    found_keywords = []
+
+    for keyword in keywords:
+        if keyword.lower() in text_lower or keyword in text:
+            found_keywords.append(keyword)
+
+    return found_keywords
+
+
+def make_corpus(n: int, keywords: List[str], seed: int = 42) -> List[str]:
+    """Build n synthetic comments mixing filler words with some keywords"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(6, 30))
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def bench(label: str, fn, corpus: List[str]) -> float:
+    started = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed:8.2f}s  {len(corpus) / elapsed:12,.0f} comments/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword extraction")
+    parser.add_argument("--n", type=int, default=1_000_000, help="Number of synthetic comments")
+    args = parser.parse_args()
+
+    # No API call is made; the key is only needed to construct the agent
+    agent = LinkedInAgeClassifierAgent(api_key="benchmark")
+    keywords = agent.young_adult_keywords
+
+    print(f"\n⏱  Building {args.n:,} synthetic comments...")
+    corpus = make_corpus(args.n, keywords)
+
+    print(f"\n📊 extract_keywords ({len(keywords)} keywords)")
+    legacy = bench("legacy", lambda text: legacy_extract_keywords(keywords, text), corpus)
+    compiled = bench("compiled", agent.extract_keywords, corpus)
+    print(f"\n  Speedup: {legacy / compiled:.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
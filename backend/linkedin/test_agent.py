@@ -5,7 +5,15 @@ Tests basic functionality without requiring API key
 """
 
 import json
-from age_classifier_agent import LinkedInAgeClassifierAgent
+import os
+import re
+import tempfile
+import threading
+import time
+import age_classifier_agent
+from age_classifier_agent import (
+    CommentAnalysis, CommentLoadError, LinkedInAgeClassifierAgent, TokenBucket, load_comments_from_json, iter_comments_from_json, read_comments
+)
 
 
 def test_keyword_extraction():
@@ -73,6 +81,31 @@ def test_keyword_extraction():
     return failed == 0
 
 
+def test_keyword_word_boundaries():
+    """Test the compiled matcher ignores keywords inside longer words"""
+    print("\nTesting keyword word boundaries...")
+    
+    agent = LinkedInAgeClassifierAgent(api_key="test-key")
+    
+    test_cases = [
+        ("I literally read this after lunch", []),
+        ("lit af bro 💯 gonna share this with my squad", ["lit", "bro", "af", "squad", "💯"]),
+        ("No cap, GEN Z will love this 🔥🔥", ["no cap", "gen z", "🔥"]),
+    ]
+    
+    passed = True
+    for text, expected in test_cases:
+        keywords = agent.extract_keywords(text)
+        if sorted(keywords) == sorted(expected):
+            print(f"  ✓ {text[:40]}")
+        else:
+            print(f"  ✗ {text[:40]}")
+            print(f"    Expected: {expected}")
+            print(f"    Got: {keywords}")
+            passed = False
+    return passed
+
+
 def test_json_loading():
     """Test JSON file loading"""
     print("\nTesting JSON loading...")
@@ -95,6 +128,66 @@ def test_json_loading():
         return False
 
 
+def test_streaming_loader():
+    """Test the streaming loader on the "posts" format"""
+    print("\nTesting streaming JSON loader...")
+    
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.json")
+    with open(path, 'r', encoding='utf-8') as f:
+        posts = json.load(f)["posts"]
+    expected = sum(len(post.get("comments", [])) for post in posts)
+    
+    comments = iter_comments_from_json(path)
+    first = next(comments)
+    count = 1 + sum(1 for _ in comments)
+    
+    if count == expected and first["comment_id"] == "p1_c1" and first["text"] == posts[0]["comments"][0]:
+        print(f"  ✓ Streamed {count} comments from {len(posts)} posts")
+        return True
+    print(f"  ✗ Expected {expected} comments, got {count}")
+    return False
+
+
+def test_load_errors():
+    """Test read/parse failures surface as CommentLoadError, analysis errors don't"""
+    print("\nTesting load vs analysis errors...")
+    
+    agent = LinkedInAgeClassifierAgent(api_key="test-key")
+    # No Gemini calls: comments read before the parse error get a stub analysis
+    agent.analyze_comment = lambda comment: CommentAnalysis(
+        comment.get("comment_id"), "Unknown", comment.get("text", ""), False, 0.0, "stub", [])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "broken.json")
+        with open(path, "w") as f:
+            f.write('{"comments": [{"comment_id": "1", "text": "hi"}, {"comment_id": ')
+        
+        checks = []
+        for file_path in (path, os.path.join(tmp_dir, "missing.json")):
+            try:
+                list(agent.iter_analyses(read_comments(file_path)))
+                checks.append(False)
+            except CommentLoadError:
+                checks.append(True)
+    
+    def failing_analysis(comment):
+        raise ValueError("bad analysis")
+    
+    agent.analyze_comment = failing_analysis
+    try:
+        list(agent.iter_analyses(read_comments(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.json"))))
+        checks.append(False)
+    except CommentLoadError:
+        checks.append(False)
+    except ValueError:
+        checks.append(True)
+    
+    if all(checks):
+        print("  ✓ Truncated and missing files raise CommentLoadError; analysis errors pass through")
+        return True
+    print(f"  ✗ Unexpected error handling: {checks}")
+    return False
+
+
 def test_data_structure():
     """Test that sample data has correct structure"""
     print("\nTesting data structure...")
@@ -125,6 +218,362 @@ def test_data_structure():
         return False
 
 
+def test_batch_analysis():
+    """Test batch packing and split-retry on malformed batch responses"""
+    print("\nTesting batch analysis...")
+    
+    class FakeResponse:
+        def __init__(self, text):
+            self.text = text
+    
+    class FakeModel:
+        """Returns garbage for batches larger than 3, valid JSON otherwise"""
+        def __init__(self):
+            self.calls = 0
+        
+        def generate_content(self, prompt):
+            self.calls += 1
+            payload = json.loads(prompt.split("Comments (JSON array):\n")[1].split("\n")[0])
+            if len(payload) > 3:
+                return FakeResponse("Sorry, I can't help with that.")
+            return FakeResponse(json.dumps([
+                {
+                    "comment_id": item["comment_id"],
+                    "is_young_adult": "🔥" in item["text"],
+                    "confidence_score": 0.9,
+                    "reasoning": "fake",
+                    "age_indicators": []
+                }
+                for item in reversed(payload)
+            ]))
+    
+    agent = LinkedInAgeClassifierAgent(api_key="test-key", batch_token_budget=10000)
+    agent.model = FakeModel()
+    sample_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linkedin_comments_sample.json")
+    comments = load_comments_from_json(sample_path)
+    
+    batches = agent.make_batches(comments)
+    analyses = agent.analyze_all_comments(comments, batch_mode=True)
+    
+    success = (
+        len(batches) == 1
+        and [a.comment_id for a in analyses] == [c["comment_id"] for c in comments]
+        and analyses[0].is_young_adult
+        and all(a.reasoning == "fake" for a in analyses)
+    )
+    
+    if success:
+        print(f"  ✓ {len(comments)} comments mapped back in order after {agent.model.calls} requests")
+    else:
+        print("  ✗ Batch results did not map back onto the input comments")
+    return success
+
+
+def test_batch_api_errors():
+    """Test API errors become error analyses instead of split retries"""
+    print("\nTesting batch API errors...")
+    
+    class AuthError(Exception):
+        code = 401
+    
+    class FailingModel:
+        def __init__(self):
+            self.calls = 0
+        
+        def generate_content(self, prompt):
+            self.calls += 1
+            raise AuthError("API key not valid")
+    
+    agent = LinkedInAgeClassifierAgent(api_key="test-key", batch_token_budget=10000)
+    agent.model = FailingModel()
+    comments = [{"comment_id": str(i), "author": "A", "text": f"comment {i}"} for i in range(8)]
+    
+    # A non-retryable error must not abort the run: every comment gets an
+    # error analysis, as in single-comment mode
+    analyses = agent.analyze_all_comments(comments, batch_mode=True)
+    success = (
+        agent.model.calls == 1
+        and [a.comment_id for a in analyses] == [c["comment_id"] for c in comments]
+        and all(a.reasoning == "Error: API key not valid" and not a.is_young_adult
+                and a.confidence_score == 0.0 for a in analyses)
+    )
+    
+    if success:
+        print("  ✓ Auth error after a single request turned into 8 error analyses (no split retries)")
+        return True
+    print(f"  ✗ Expected 8 error analyses from 1 request, got {agent.model.calls} requests: "
+          f"{[a.reasoning for a in analyses]}")
+    return False
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class ApiError(Exception):
+    """Fake API error carrying an HTTP status code like the SDK's errors"""
+    def __init__(self, code):
+        super().__init__(f"{code} error")
+        self.code = code
+
+
+def test_rate_limiter():
+    """Test the token bucket spaces requests out to the configured rate"""
+    print("\nTesting rate limiter...")
+    
+    bucket = TokenBucket(rate=20, capacity=1)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    single = time.monotonic() - started
+    
+    # Shared by several threads, the rate still holds overall
+    bucket = TokenBucket(rate=50, capacity=2)
+    started = time.monotonic()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(3)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    shared = time.monotonic() - started
+    
+    # 1 burst token + 4 at 20/s; 2 burst tokens + 10 at 50/s
+    if 0.19 <= single < 1.0 and 0.19 <= shared < 1.0:
+        print(f"  ✓ 5 requests at 20/s took {single:.2f}s, 12 requests at 50/s over 4 threads took {shared:.2f}s")
+        return True
+    print(f"  ✗ Unexpected timings: {single:.2f}s, {shared:.2f}s")
+    return False
+
+
+def test_retry_backoff():
+    """Test 429/5xx errors are retried with backoff and other errors are not"""
+    print("\nTesting retry with backoff...")
+    
+    class FlakyModel:
+        """Raises the given errors in turn, then answers"""
+        def __init__(self, errors):
+            self.errors = list(errors)
+            self.calls = 0
+        
+        def generate_content(self, prompt):
+            self.calls += 1
+            if self.errors:
+                raise self.errors.pop(0)
+            return FakeResponse('{"is_young_adult": true}')
+    
+    saved = age_classifier_agent.BACKOFF_BASE_SECONDS
+    age_classifier_agent.BACKOFF_BASE_SECONDS = 0.01
+    try:
+        agent = LinkedInAgeClassifierAgent(api_key="test-key", max_retries=3)
+        checks = []
+        
+        agent.model = FlakyModel([ApiError(429), ApiError(503)])
+        checks.append(agent.generate("prompt").text == '{"is_young_adult": true}' and agent.model.calls == 3)
+        
+        for errors, expected_calls in (([ApiError(400)], 1), ([ApiError(500)] * 5, 4)):
+            agent.model = FlakyModel(errors)
+            try:
+                agent.generate("prompt")
+                checks.append(False)
+            except ApiError:
+                checks.append(agent.model.calls == expected_calls)
+    finally:
+        age_classifier_agent.BACKOFF_BASE_SECONDS = saved
+    
+    if all(checks):
+        print("  ✓ 429/503 retried until success, 400 not retried, retries capped at max_retries")
+        return True
+    print(f"  ✗ Unexpected retry behaviour: {checks}")
+    return False
+
+
+def test_parallel_order():
+    """Test results keep input order when workers finish out of order"""
+    print("\nTesting parallel analysis order...")
+    
+    class SlowFirstModel:
+        """Earlier comments answer later, so completions arrive out of order"""
+        def __init__(self):
+            self.finished = []
+            self.lock = threading.Lock()
+        
+        def generate_content(self, prompt):
+            idx = int(re.search(r'Comment: "comment (\d+)"', prompt).group(1))
+            time.sleep(0.05 * (4 - idx % 4))
+            with self.lock:
+                self.finished.append(idx)
+            return FakeResponse(json.dumps({"is_young_adult": idx % 2 == 0, "confidence_score": 0.5,
+                                            "reasoning": f"answer {idx}", "age_indicators": []}))
+    
+    agent = LinkedInAgeClassifierAgent(api_key="test-key", rps=1000)
+    agent.model = SlowFirstModel()
+    comments = [{"comment_id": str(i), "author": "A", "text": f"comment {i}"} for i in range(8)]
+    analyses = agent.analyze_all_comments(comments, workers=4)
+    
+    in_order = [a.comment_id for a in analyses] == [c["comment_id"] for c in comments]
+    matched = all(a.reasoning == f"answer {a.comment_id}" for a in analyses)
+    out_of_order = agent.model.finished != sorted(agent.model.finished)
+    if in_order and matched and out_of_order:
+        print(f"  ✓ Finished as {agent.model.finished}, yielded in input order")
+        return True
+    print(f"  ✗ Order not preserved: {[a.comment_id for a in analyses]}")
+    return False
+
+
+def test_local_tier():
+    """Test local-tier thresholds, the mature-marker path and batch merge order"""
+    print("\nTesting local tier...")
+    
+    class CountingModel:
+        """Answers every batch, recording which comments reached Gemini"""
+        def __init__(self):
+            self.seen = []
+        
+        def generate_content(self, prompt):
+            payload = json.loads(prompt.split("Comments (JSON array):\n")[1].split("\n")[0])
+            self.seen.extend(item["text"] for item in payload)
+            return FakeResponse(json.dumps([
+                {"comment_id": item["comment_id"], "is_young_adult": False, "confidence_score": 0.4,
+                 "reasoning": "gemini", "age_indicators": []}
+                for item in payload
+            ]))
+    
+    checks = []
+    agent = LinkedInAgeClassifierAgent(api_key="test-key")
+    
+    # "no cap" alone scores exactly its weight, 0.6
+    score = agent.score_locally("no cap", agent.extract_keywords("no cap"))
+    checks.append(score["is_young_adult"] and abs(score["confidence_score"] - 0.6) < 1e-9)
+    comment = {"comment_id": "1", "author": "A", "text": "no cap"}
+    checks.append(agent.classify_locally(comment) is None)  # no threshold: always Gemini
+    agent.local_threshold = 0.6
+    local = agent.classify_locally(comment)
+    checks.append(local is not None and local.tier == "local" and local.is_young_adult)
+    agent.local_threshold = 0.61
+    checks.append(agent.classify_locally(comment) is None)
+    
+    # Mature markers outweigh young ones and flip the decision (0.88 - 0.2)
+    agent.local_threshold = 0.65
+    mature = agent.classify_locally({"comment_id": "2", "text": "Retired following decades in finance 🔥"})
+    checks.append(
+        mature is not None and not mature.is_young_adult
+        and mature.confidence_score == round(1 - 0.3 * 0.4 - 0.2, 3)
+        and mature.reasoning == "Local keyword scorer: decades, retired"
+    )
+    
+    # Batch mode: local and Gemini results are merged back in input order
+    agent.local_threshold = 0.8
+    agent.model = CountingModel()
+    batch = [
+        {"comment_id": "a", "text": "no cap fr 🔥 this slaps"},
+        {"comment_id": "b", "text": "Interesting quarterly results"},
+        {"comment_id": "c", "text": "My grandchildren love it, retired and content"},
+        {"comment_id": "d", "text": "Thanks for sharing"}
+    ]
+    analyses = agent.analyze_all_comments(batch, batch_mode=True)
+    checks.append([a.comment_id for a in analyses] == ["a", "b", "c", "d"])
+    checks.append([a.tier for a in analyses] == ["local", "llm", "local", "llm"])
+    checks.append([a.is_young_adult for a in analyses] == [True, False, False, False])
+    checks.append(agent.model.seen == ["Interesting quarterly results", "Thanks for sharing"])
+    
+    if all(checks):
+        print("  ✓ Threshold boundary, mature markers and batch merge order")
+        return True
+    print(f"  ✗ Unexpected local-tier behaviour: {checks}")
+    return False
+
+
+def test_local_tier_edges():
+    """Test markerless comments, threshold validation, mature word boundaries and single scoring"""
+    print("\nTesting local tier edge cases...")
+    
+    class CountingModel:
+        def generate_content(self, prompt):
+            if "Comments (JSON array):" in prompt:
+                payload = json.loads(prompt.split("Comments (JSON array):\n")[1].split("\n")[0])
+                return FakeResponse(json.dumps([
+                    {"comment_id": item["comment_id"], "is_young_adult": False, "confidence_score": 0.4,
+                     "reasoning": "gemini", "age_indicators": []}
+                    for item in payload
+                ]))
+            return FakeResponse('{"is_young_adult": false, "confidence_score": 0.4, "reasoning": "gemini"}')
+    
+    checks = []
+    agent = LinkedInAgeClassifierAgent(api_key="test-key", local_threshold=0.01)
+    agent.model = CountingModel()
+    
+    # No young or mature marker at all is never decided locally
+    checks.append(agent.classify_locally({"comment_id": "1", "text": "Thanks for sharing"}) is None)
+    
+    # Thresholds of 0 or below are rejected on the command line
+    for value in ("0", "-0.5"):
+        try:
+            age_classifier_agent.parse_args(["--local-threshold", value])
+            checks.append(False)
+        except SystemExit:
+            checks.append(True)
+    checks.append(age_classifier_agent.parse_args(["--local-threshold", "0.85"]).local_threshold == 0.85)
+    
+    # Mature phrases match whole words only ("retired" is not in "unretired")
+    checks.append(agent.score_locally("Happily unretired", [])["markers"] == [])
+    checks.append(agent.score_locally("Retired, with my grandchildren", [])["markers"] == ["my grandchildren", "retired"])
+    
+    # Each comment is scored once, in batch and in single-comment mode
+    extracted = []
+    extract_keywords = agent.extract_keywords
+    agent.extract_keywords = lambda text: extracted.append(text) or extract_keywords(text)
+    comments = [{"comment_id": "a", "text": "no cap fr 🔥"}, {"comment_id": "b", "text": "Interesting results"}]
+    for batch_mode in (True, False):
+        extracted.clear()
+        analyses = agent.analyze_all_comments(comments, batch_mode=batch_mode)
+        checks.append(sorted(extracted) == sorted(c["text"] for c in comments))
+        checks.append([a.tier for a in analyses] == ["local", "llm"])
+    
+    if all(checks):
+        print("  ✓ Markerless comments go to Gemini, thresholds <= 0 rejected, one scoring pass per comment")
+        return True
+    print(f"  ✗ Unexpected local-tier behaviour: {checks}")
+    return False
+
+
+def test_tier_summary():
+    """Test tier hit rates and the tokens-saved estimate in the report"""
+    print("\nTesting tier summary...")
+    
+    agent = LinkedInAgeClassifierAgent(api_key="test-key", local_threshold=0.8)
+    summary = agent.tier_summary(total=4, local_count=1, tokens_saved=300)
+    checks = [
+        summary["tiers"]["local"] == {"count": 1, "hit_rate": 0.25},
+        summary["tiers"]["llm"] == {"count": 3, "hit_rate": 0.75},
+        summary["gemini_calls_saved"] == 1 and summary["estimated_tokens_saved"] == 300,
+        agent.tier_summary(0, 0, 0)["tiers"]["local"]["hit_rate"] == 0.0
+    ]
+    
+    def analysis(comment_id, text, tier):
+        return CommentAnalysis(comment_id, "A", text, tier == "local", 0.9, "test", [], tier=tier)
+    
+    texts = ["no cap fr 🔥", "x" * 40, "Great post", "Thanks"]
+    analyses = [analysis("1", texts[0], "local"), analysis("2", texts[1], "local"),
+                analysis("3", texts[2], "llm"), analysis("4", texts[3], "llm")]
+    expected_saved = sum(age_classifier_agent.SINGLE_CALL_OVERHEAD_TOKENS + len(text) // 4 + 1 for text in texts[:2])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "report.json")
+        agent.generate_report(iter(analyses), output_file=path)
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+    tiers = report["tier_summary"]
+    checks.append(tiers["tiers"]["local"] == {"count": 2, "hit_rate": 0.5})
+    checks.append(tiers["estimated_tokens_saved"] == expected_saved)
+    checks.append([a["tier"] for a in report["all_analyses"]] == ["local", "local", "llm", "llm"])
+    
+    if all(checks):
+        print(f"  ✓ Hit rates and ~{expected_saved} tokens saved for 2 local decisions")
+        return True
+    print(f"  ✗ Unexpected tier summary: {checks}")
+    return False
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -135,8 +584,19 @@ def main():
     
     # Run tests
     results.append(("Keyword Extraction", test_keyword_extraction()))
+    results.append(("Keyword Word Boundaries", test_keyword_word_boundaries()))
     results.append(("JSON Loading", test_json_loading()))
+    results.append(("Streaming Loader", test_streaming_loader()))
+    results.append(("Load Errors", test_load_errors()))
     results.append(("Data Structure", test_data_structure()))
+    results.append(("Batch Analysis", test_batch_analysis()))
+    results.append(("Batch API Errors", test_batch_api_errors()))
+    results.append(("Rate Limiter", test_rate_limiter()))
+    results.append(("Retry Backoff", test_retry_backoff()))
+    results.append(("Parallel Order", test_parallel_order()))
+    results.append(("Local Tier", test_local_tier()))
+    results.append(("Local Tier Edges", test_local_tier_edges()))
+    results.append(("Tier Summary", test_tier_summary()))
     
     # Summary
     print("\n" + "=" * 60)
@@ -1,10 +1,10 @@
 import sys
 import os
 
-# Adjust path to find backend module
-sys.path.append(os.getcwd())
+# The agent modules import each other by plain name (e.g. "import http_client")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "agent"))
 
-from backend.agent.hashtag_scraper import scrape_hashtags
+from hashtag_scraper import scrape_hashtags
 
 def test_scraper():
     # Test complex query that previously failed